@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-from src.profile_filtering_system.constants import companies_to_remove, companies_a, companies_b
+from src.profile_filtering_system.constants import companies_to_remove, companies_a, companies_b, excel_cache_dir, background_jobs
 from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
-from src.profile_filtering_system.utils.common import streamlit_file_handler
+from src.profile_filtering_system.components.ai_ranking import get_top_25_percent
+from src.profile_filtering_system.components.title_normalization import TITLE_FEATURE_COLUMNS
+from src.profile_filtering_system.utils.llm_scheduler import get_scheduler
+from src.profile_filtering_system.utils.live_table import LiveTable
+from src.profile_filtering_system.utils.jobs import get_job_manager, is_job_id
+from src.profile_filtering_system.utils.checkpoint import run_checkpoint, prune_runs
+from src.profile_filtering_system.utils.excel import read_excel_fast
+from src.profile_filtering_system.utils.common import streamlit_files_handler
+from src.profile_filtering_system.utils.exports import (
+    EXPORT_FORMATS, ExportCache, export_file_name, result_sheets,
+    ALL_PROFILES_SHEET, TOP_PROFILES_SHEET, APPROVED_SHEET
+)
 
 # Ensure NLTK data is downloaded for Streamlit Cloud deployment
 import nltk
@@ -37,75 +47,6 @@ for item in nltk_downloads:
             st.warning(f"Could not download NLTK data: {item}. Error: {e}")
 
 
-def calculate_ai_score(row):
-    """
-    Calculate AI score for ranking profiles - higher score = better candidate
-    Uses multiple factors to determine quality of match
-    """
-    score = 0
-    
-    # Criteria scoring (40% of total score)
-    if row.get('criteria_a_passed', False):
-        score += 15  # Highest priority - both Class A and B keywords
-    if row.get('criteria_b_passed', False):
-        score += 12  # High priority - Class A + additional keywords
-    if row.get('criteria_c_passed', False):
-        score += 8   # Good - keywords in summary
-    
-    # Company category scoring (25% of total score)
-    company_category = row.get('Companies Category', '')
-    if company_category == 'Category A':
-        score += 12
-    elif company_category == 'Category B':
-        score += 8
-    elif company_category == 'Category C':
-        score += 4
-    
-    # Content quality scoring (35% of total score)
-    # Title relevance
-    title_len = len(str(row.get('title', '')))
-    if title_len > 10:
-        score += min(8, title_len // 5)  # Up to 8 points for title length
-    
-    # Summary quality
-    summary_len = len(str(row.get('summary', '')))
-    if summary_len > 50:
-        score += min(12, summary_len // 25)  # Up to 12 points for summary depth
-    
-    # Keyword criteria count bonus
-    criteria_count = sum([
-        row.get('criteria_a_passed', False),
-        row.get('criteria_b_passed', False), 
-        row.get('criteria_c_passed', False)
-    ])
-    score += criteria_count * 3  # Bonus for multiple criteria matches
-    
-    return score
-
-
-def get_top_25_percent(df):
-    """
-    Get top 25% of profiles based on AI scoring
-    """
-    if df.empty:
-        return df
-    
-    # Calculate AI scores for each profile
-    df_scored = df.copy()
-    df_scored['ai_score'] = df_scored.apply(calculate_ai_score, axis=1)
-    
-    # Sort by score (highest first) and take top 25%
-    df_sorted = df_scored.sort_values('ai_score', ascending=False)
-    top_25_count = max(1, len(df_sorted) // 4)  # At least 1 profile
-    top_25_df = df_sorted.head(top_25_count)
-    
-    # Remove the ai_score column before returning
-    if 'ai_score' in top_25_df.columns:
-        top_25_df = top_25_df.drop(columns=['ai_score'])
-    
-    return top_25_df
-
-
 st.set_page_config(
     page_title="Speaker Profile Filtering Tool", 
     layout="wide",
@@ -140,20 +81,24 @@ st.header("1. 📁 Upload Your Data")
 upload_col1, upload_col2 = st.columns([2, 1])
 
 with upload_col1:
-    input_file = st.file_uploader(
-        "Upload your profiles CSV or Excel file", 
+    input_files = st.file_uploader(
+        "Upload your profiles CSV or Excel files", 
         type=["csv", "xlsx", "xls"],
-        help="Upload a file containing professional profiles to filter"
+        accept_multiple_files=True,
+        help="Upload one or more files containing professional profiles to filter - they are merged into one list"
     )
 
 with upload_col2:
-    if input_file:
-        st.success("✅ File uploaded successfully!")
-        file_details = {
-            "filename": input_file.name,
-            "filetype": input_file.type,
-            "filesize": f"{input_file.size / 1024:.1f} KB"
-        }
+    if input_files:
+        st.success(f"✅ {len(input_files)} file(s) uploaded successfully!")
+        file_details = [
+            {
+                "filename": uploaded.name,
+                "filetype": uploaded.type,
+                "filesize": f"{uploaded.size / 1024:.1f} KB"
+            }
+            for uploaded in input_files
+        ]
         st.json(file_details)
 
 # --- Event Details ---
@@ -291,7 +236,7 @@ if 'filtered_df' not in st.session_state:
 st.header("3. 🚀 Run Analysis")
 
 # Check if all required inputs are provided (event_location is now optional)
-ready_to_run = bool(input_file and topic)
+ready_to_run = bool(input_files and topic)
 
 if ready_to_run:
     st.success("✅ All required information provided. Ready to analyze!")
@@ -299,7 +244,7 @@ if ready_to_run:
         st.info("ℹ️ No specific event location provided - will search EU countries + any additional countries specified.")
 else:
     missing_items = []
-    if not input_file:
+    if not input_files:
         missing_items.append("📁 Data file")
     if not topic:
         missing_items.append("🎯 Event topic")
@@ -315,18 +260,105 @@ with run_col2:
         use_container_width=True,
         type="primary"
     )
+    lazy_reasons = st.checkbox(
+        "⚡ Generate AI explanations on demand",
+        value=True,
+        help="Show results right away and generate AI explanations only for the profiles you view or download"
+    )
+    run_in_background = st.checkbox(
+        "🧵 Run in the background",
+        value=True,
+        help="The analysis keeps running when the page is reloaded or closed; reopen the page link to get the results"
+    )
+    stream_reasons_live = st.checkbox(
+        "📡 Stream AI explanations into a live table",
+        value=False,
+        disabled=lazy_reasons or run_in_background,
+        help="Generate all explanations now, best candidates first, and show each profile as soon as its explanation is written"
+    )
+    fast_language_detection = st.checkbox(
+        "🔤 Fast English detection",
+        value=False,
+        help="Detect English summaries with the built-in classifier instead of langdetect (deterministic, much faster on large exports)"
+    )
+
+def load_company_lists():
+    """The companies to remove (account names only) and the category A/B company lists"""
+    # the sheet is read from its Parquet copy after the first run
+    return (read_excel_fast(companies_to_remove, usecols=['Account Name'], cache_dir=excel_cache_dir),
+            pd.read_csv(companies_a), pd.read_csv(companies_b))
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def make_pipeline(**options):
+    """Pipeline of the event entered above with the run options chosen above; ``options`` adds hooks and overrides"""
+    event_loc = event_location if event_location and event_location.strip() else None
+    return ProfilesFiltering(
+        topic=topic, sub_topic=sub_topic, event_location=event_loc, additional_countries=valid_additional,
+        use_classified_keywords=True, lazy_reasons=lazy_reasons,
+        language_detector='builtin' if fast_language_detection else 'langdetect',
+        # on-demand explanations are generated concurrently (the shared scheduler enforces the rate limits)
+        reason_concurrency=get_scheduler().max_concurrency if lazy_reasons else 1,
+        **options
+    )
+
+
+# --- Dry run: stages 1-8 on a sample, so the size and cost of a run are known before it starts ---
+if ready_to_run:
+    with st.expander("📐 Estimate this run first (dry run on a sample)", expanded=False):
+        event_loc = event_location if event_location and event_location.strip() else None
+        # the estimate belongs to these inputs; changing any of them asks for a new one
+        estimate_key = (tuple((file.name, file.size) for file in input_files), topic, sub_topic, event_loc,
+                        tuple(valid_additional), lazy_reasons)
+        if st.button("Estimate profiles, runtime and AI cost"):
+            with st.spinner("Running the filters on a sample of the profiles..."):
+                sample_df, _ = streamlit_files_handler(input_files)
+                if sample_df is not None:
+                    st.session_state['dry_run'] = (estimate_key, make_pipeline().dry_run(sample_df, *load_company_lists(), verbose=False))
+        saved = st.session_state.get('dry_run')
+        if saved is not None and saved[0] == estimate_key:
+            estimate = saved[1]
+            reasons = estimate['reasons']
+            st.caption(f"Filters run on {estimate['sample_rows']:,} of {estimate['total_rows']:,} profiles; "
+                       f"ranges are {estimate['confidence']:.0%} confidence intervals")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Profiles for AI explanations", f"~{reasons['calls']:,}",
+                        help=f"{reasons['calls_low']:,} - {reasons['calls_high']:,}")
+            col2.metric("AI cost", f"~${reasons['cost_usd']:.2f}",
+                        help=f"${reasons['cost_usd_low']:.2f} - ${reasons['cost_usd_high']:.2f} "
+                             f"({reasons['model']}, ~{reasons['prompt_tokens_per_call']} prompt tokens per profile)")
+            col3.metric("Runtime", f"~{format_duration(estimate['seconds'][0])}",
+                        help=f"{format_duration(estimate['seconds'][1])} - {format_duration(estimate['seconds'][2])}, "
+                             f"AI explanations with {reasons['concurrency']} call(s) at a time")
+            if lazy_reasons:
+                st.caption("⚡ With on-demand explanations only the profiles you view or download are sent to the AI")
+            st.dataframe(pd.DataFrame(estimate['stages']), use_container_width=True, hide_index=True)
 
 if run_button:
-    if not input_file:
+    if not input_files:
         st.error("Please upload your profiles CSV or Excel file.")
         st.stop()
-    df = streamlit_file_handler(input_file)
+    df, ingestion_metrics = streamlit_files_handler(input_files)
     if df is None:
         st.stop()
+    cached_files = sum(metric['cached'] for metric in ingestion_metrics)
+    if cached_files:
+        st.caption(f"♻️ {cached_files} of {len(input_files)} file(s) reused from earlier parsing (same content)")
+    if len(input_files) > 1:
+        with st.expander(f"📥 Merged {len(input_files)} files", expanded=False):
+            st.dataframe(pd.DataFrame(ingestion_metrics), use_container_width=True, hide_index=True)
     st.info(f"Initial rows: {len(df)}")
     
-    # Store original data in session state for multi-sheet download
-    st.session_state['original_df'] = df.copy()
+    # Store original data in session state for multi-sheet download (a reference, the frame is never modified)
+    st.session_state['original_df'] = df
     
     # Check for required columns
     required_cols = ['title', 'companyName', 'summary', 'location']
@@ -334,19 +366,30 @@ if run_button:
     if missing_cols:
         st.error(f"Missing required columns in uploaded file: {', '.join(missing_cols)}")
         st.stop()
-    
-    # Add optional columns if missing
-    if 'companyLocation' not in df.columns:
-        df['companyLocation'] = df.get('location', '')
-    if 'titleDescription' not in df.columns:
-        df['titleDescription'] = ''
 
     # Load company data
-    companies_to_remove_df = pd.read_excel(companies_to_remove)
-    companies_a_df = pd.read_csv(companies_a)
-    companies_b_df = pd.read_csv(companies_b)
-
-    # Create a progress container
+    companies_to_remove_df, companies_a_df, companies_b_df = load_company_lists()
+
+    if run_in_background:
+        def run_job(job):
+            # the run is checkpointed under the job id, so it can be resumed after a failure or a restart
+            run_checkpoint(job.id).save_input(df)
+            # the saved uploads of old runs are deleted, the directories of queued and running jobs are kept
+            prune_runs(background_jobs['max_run_dirs'],
+                       keep={other.id for other in get_job_manager().jobs() if not other.finished})
+            pipeline = make_pipeline(checkpoint_dir=job.id, stage_callback=job.record_stage,
+                                     reason_progress_callback=job.set_progress, cancel_event=job.cancel_event)
+            filtered = pipeline.filter(df, companies_to_remove_df, companies_a_df, companies_b_df, verbose=False)
+            return {'filtered_df': filtered, 'original_df': df, 'lazy_reasons': pipeline.reasons}
+        
+        job_id = get_job_manager().submit(run_job, name=topic[:60])
+        # the id in the URL brings the user back to this run after a reload
+        st.session_state['job_id'] = job_id
+        st.session_state.setdefault('job_ids', []).append(job_id)
+        st.query_params['job'] = job_id
+        st.rerun()
+
+    # Progress of the run: the pipeline reports every finished stage, every chunk and every AI explanation
     progress_container = st.container()
     
     with progress_container:
@@ -367,12 +410,8 @@ if run_button:
         
     progress_bar = st.progress(0)
     status_text = st.empty()
+    live = {}
     
-    # Initialize progress tracking
-    total_steps = 9
-    current_step = 0
-    
-    # Update progress function
     def update_progress(step_name, remaining_rows, step_num):
         progress = step_num / total_steps
         progress_bar.progress(progress)
@@ -382,161 +421,86 @@ if run_button:
         else:
             st.warning(f"⚠️ {step_name}: No profiles remaining - stopping here")
     
-    # Run the modular pipeline with progress tracking
+    def show_stage(metric):
+        if metric['stage'] in ('deduplication', 'near_deduplication'):
+            if metric['duplicates_removed']:
+                kind = 'duplicate' if metric['stage'] == 'deduplication' else 'near-duplicate'
+                st.info(f"🧹 Removed {metric['duplicates_removed']:,} {kind} profiles - {metric['rows_out']:,} profiles remaining")
+        elif metric['stage'] != 'llm_reason':
+            completed.append(metric['stage'])
+            update_progress(stage_labels[metric['stage']], metric['rows_out'], len(completed))
+    
+    def show_chunk(stage, done, total):
+        if stage == 'llm_reason':
+            if 'reasons' not in live:
+                live['reasons'] = (st.empty(), st.progress(0))
+            progress_text, reasoning_progress = live['reasons']
+            progress_text.text(f"Generating AI explanations... {done}/{total}")
+            reasoning_progress.progress(done / total)
+        else:
+            status_text.text(f"Step {len(completed) + 1}/{total_steps}: {stage_labels[stage]} - {done:,} of {total:,} profiles checked")
+    
+    def live_table(row):
+        # created with the first explanation, below the stage messages
+        if 'table' not in live:
+            st.subheader("📡 Live Results")
+            live['writing'] = st.empty()
+            live_cols = [col for col in ['fullName', 'title', 'companyName', 'Companies Category', 'keyword_criteria_passed']
+                         if col in row.index] + ['llm_reason']
+            live['table'] = LiveTable(st.container(), live_cols, use_container_width=True)
+        return live['table']
+    
+    def show_text(row, text):
+        live_table(row)
+        name = row['fullName'] if 'fullName' in row.index else row['title']
+        live['writing'].markdown(f"✍️ **{name}**: {text}▌")
+    
+    def show_reason(row, reason):
+        live_table(row).append({**row.to_dict(), 'llm_reason': reason})
+    
+    # Run the pipeline with progress tracking
     filtered_df = None  # Initialize filtered_df before try block
     try:
-        # Handle optional event_location
-        event_loc = event_location if event_location and event_location.strip() else None
-        
-        # Use the new classified keyword system
-        pipeline = ProfilesFiltering(
-            topic=topic, 
-            sub_topic=sub_topic, 
-            event_location=event_loc, 
-            additional_countries=valid_additional,
-            use_classified_keywords=True  # Enable new classified keyword system
-        )
-        
-        # We'll create a custom filter method that shows progress
-        df_working = df.copy()
-        
-        # Step 1: Title elimination
-        current_step += 1
-        from src.profile_filtering_system.components.title_elimination import title_elimination
-        df_working = title_elimination(df_working)
-        update_progress("Title Elimination", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after title elimination. Please check your data or criteria.")
-            st.stop()
-        
-        # Step 2: Summary/Job description elimination
-        current_step += 1
-        from src.profile_filtering_system.components.summary_jobdesc_elimination import summary_jobdesc_elimination
-        df_working = summary_jobdesc_elimination(df_working)
-        update_progress("Summary & Job Description Filter", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after summary filtering. Please check your data or criteria.")
-            st.stop()
-        
-        # Step 3: Company exclusion
-        current_step += 1
-        from src.profile_filtering_system.components.company_exclusion import company_exclusion
-        df_working = company_exclusion(df_working, companies_to_remove_df)
-        update_progress("Company Exclusion", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after company exclusion. Please check your data or criteria.")
-            st.stop()
-        
-        # Step 4: English language filter
-        current_step += 1
-        from src.profile_filtering_system.components.english_only import english_only
-        df_working = english_only(df_working)
-        update_progress("English Language Filter", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after English language filtering. Please check your data.")
+        # Best candidates first: each finished profile is appended to the live table while the next one is written
+        streaming = {'reason_order': 'score', 'reason_text_callback': show_text, 'reason_callback': show_reason} \
+            if stream_reasons_live and not lazy_reasons else {}
+        pipeline = make_pipeline(stage_callback=show_stage, progress_callback=show_chunk, **streaming)
+        stages = pipeline.planned_stages()
+        stage_labels = {stage.name: stage.label for stage in stages}
+        completed = []
+        total_steps = len([stage for stage in stages if not stage.removed_as]) + 1
+        
+        filtered_df = pipeline.filter(df, companies_to_remove_df, companies_a_df, companies_b_df, verbose=False)
+        if 'writing' in live:
+            live['writing'].empty()
+        if pipeline.classified_keywords:
+            st.info(f"🔍 Class A Keywords (from '{topic}'): {', '.join(pipeline.classified_keywords['class_a'])}")
+            st.info(f"🔍 Class B Keywords (from '{sub_topic}'): {', '.join(pipeline.classified_keywords['class_b'])}")
+        if filtered_df.empty:
+            last_stage = stage_labels.get(completed[-1], 'filtering') if completed else 'filtering'
+            st.error(f"No profiles left after {last_stage}. Please check your data or criteria.")
             st.stop()
         
-        # Step 5: Location filter
-        current_step += 1
-        from src.profile_filtering_system.components.location_filter import location_filter
-        df_working = location_filter(df_working, event_loc, valid_additional)
-        update_progress("Location Filter", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after location filtering. Please check your location settings or add more countries.")
-            st.stop()
-        
-        # Step 6: Company category assignment
-        current_step += 1
-        from src.profile_filtering_system.components.company_category import company_category
-        df_working = company_category(df_working, companies_a_df, companies_b_df)
-        update_progress("Company Category Assignment", len(df_working), current_step)
-        
-        # Step 7: Seniority filter
-        current_step += 1
-        from src.profile_filtering_system.components.seniority_filter import seniority_filter
-        df_working = seniority_filter(df_working)
-        update_progress("Seniority Filter", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after seniority filtering. Please check your seniority requirements.")
-            st.stop()
-        
-        # Step 8: Keyword matching (using new classified system)
-        current_step += 1
-        from src.profile_filtering_system.components.keyword_extraction import extract_classified_keywords
-        from src.profile_filtering_system.components.keyword_matching import keyword_match_classified
-        
-        # Extract classified keywords
-        classified_keywords = extract_classified_keywords(topic, sub_topic)
-        class_a_keywords = classified_keywords['class_a']
-        class_b_keywords = classified_keywords['class_b']
-        
-        st.info(f"🔍 Class A Keywords (from '{topic}'): {', '.join(class_a_keywords)}")
-        st.info(f"🔍 Class B Keywords (from '{sub_topic}'): {', '.join(class_b_keywords)}")
-        
-        # Apply keyword matching with detailed criteria tracking
-        keyword_results = df_working.apply(lambda row: keyword_match_classified(row, class_a_keywords, class_b_keywords), axis=1)
-        
-        # Filter profiles that pass at least one criteria
-        df_working = df_working[keyword_results.apply(lambda x: x['passes'])].copy()
+        st.session_state['lazy_reasons'] = pipeline.reasons
+        reason_metric = pipeline.stage_metrics[-1]
+        if not lazy_reasons and reason_metric['baseline_prompt_tokens']:
+            prompt_tokens, baseline_tokens = reason_metric['prompt_tokens'], reason_metric['baseline_prompt_tokens']
+            st.caption(f"✂️ Compact prompts: ~{prompt_tokens:,} prompt tokens instead of ~{baseline_tokens:,} "
+                       f"({100 * (baseline_tokens - prompt_tokens) / baseline_tokens:.0f}% saved)")
         
-        # Add criteria information to dataframe
-        df_working['keyword_criteria_passed'] = keyword_results.apply(lambda x: ', '.join(x['criteria_passed']) if x['criteria_passed'] else 'None')
-        df_working['criteria_a_passed'] = keyword_results.apply(lambda x: x['criteria_a'])
-        df_working['criteria_b_passed'] = keyword_results.apply(lambda x: x['criteria_b'])
-        df_working['criteria_c_passed'] = keyword_results.apply(lambda x: x['criteria_c'])
-        
-        update_progress("Classified Keyword Matching", len(df_working), current_step)
-        if df_working.empty:
-            st.error("No profiles left after classified keyword matching. Please adjust your topic/subtopic or criteria.")
-            st.stop()
-            
-        # Step 9: LLM reasoning
-        current_step += 1
-        from src.profile_filtering_system.components.llm_reason import generate_llm_reason
-        
-        def get_criteria_passed(row):
-            criteria = []
-            if row.get('title', ''):
-                criteria.append('Valid title')
-            if row.get('summary', ''):
-                criteria.append('Has summary')
-            if row.get('Companies Category', ''):
-                criteria.append(f"{row.get('Companies Category')}")
-            if hasattr(row, 'keyword_criteria_passed') and row.get('keyword_criteria_passed', 'None') != 'None':
-                criteria.append(f"Keyword: {row['keyword_criteria_passed']}")
-            return ', '.join(criteria)
-        
-        df_working['criteria_passed'] = df_working.apply(get_criteria_passed, axis=1)
-        
-        # Add progress for LLM reasoning
-        progress_text = st.empty()
-        reasoning_progress = st.progress(0)
-        
-        llm_reasons = []
-        total_rows = len(df_working)
-        
-        for idx, (_, row) in enumerate(df_working.iterrows()):
-            progress_text.text(f"Generating AI explanations... {idx+1}/{total_rows}")
-            reasoning_progress.progress((idx + 1) / total_rows)
-            reason = generate_llm_reason(row, topic, sub_topic, event_loc or "Global/EU", row['criteria_passed'])
-            llm_reasons.append(reason)
-        
-        df_working['llm_reason'] = llm_reasons
-        df_working = df_working.drop(columns=['criteria_passed'])
-        
-        update_progress("AI Reasoning Complete", len(df_working), current_step)
+        update_progress("AI Reasoning Complete", len(filtered_df), total_steps)
         
         # Complete the progress
         progress_bar.progress(1.0)
         status_text.text("✅ Filtering Complete!")
         
-        filtered_df = df_working
-        
     except Exception as e:
         st.error(f"An error occurred during filtering: {str(e)}")
         st.stop()
     
-    st.session_state['filtered_df'] = filtered_df.copy() if filtered_df is not None else None
+    st.session_state['filtered_df'] = filtered_df
+    # New results: downloads are rendered again on first request
+    st.session_state['result_version'] = st.session_state.get('result_version', 0) + 1
     if filtered_df is not None and not filtered_df.empty:
         st.success(f"🎉 Filtering complete! Found {len(filtered_df)} potential speakers from {len(df)} initial profiles.")
         
@@ -557,6 +521,99 @@ if run_button:
     else:
         st.warning("No profiles found after filtering.")
 
+# --- Background runs: poll the current job and load its results once it is done ---
+def resume_job(job_id):
+    """Run a checkpointed job again under its id: only the missing or failed AI explanations are generated"""
+    def run_resume(job):
+        pipeline = ProfilesFiltering.from_checkpoint(job.id, stage_callback=job.record_stage,
+                                                     reason_progress_callback=job.set_progress,
+                                                     cancel_event=job.cancel_event)
+        filtered = pipeline.resume(verbose=False)
+        original = pipeline.checkpoint.load_input()
+        return {'filtered_df': filtered, 'original_df': original if original is not None else filtered,
+                'lazy_reasons': pipeline.reasons}
+    
+    info = run_checkpoint(job_id).load_run_info()
+    get_job_manager().submit(run_resume, name=info['topic'][:60], job_id=job_id)
+    st.session_state.pop('loaded_job', None)
+    st.rerun(scope='app')
+
+def show_job(job_id):
+    job = get_job_manager().get(job_id)
+    can_resume = run_checkpoint(job_id).has_shortlist
+    if job is None:
+        st.session_state.pop('job_id', None)
+        if can_resume:
+            st.warning("⚠️ This background run was interrupted (the server was restarted). "
+                       "The filtered profiles and the AI explanations written so far were saved.")
+            if st.button("🔁 Resume run", key=f"resume_{job_id}"):
+                st.session_state['job_id'] = job_id
+                resume_job(job_id)
+        else:
+            st.warning("⚠️ This background run is no longer available (the server was restarted). Please start the analysis again.")
+            st.query_params.pop('job', None)
+        return
+    status = job.snapshot()
+    if status['status'] in ('queued', 'running'):
+        st.info(f"🧵 Background run **{status['name']}** is {status['status']} ({status['seconds']:.0f}s) - "
+                f"you can reload or close this page, the analysis keeps running.")
+        if status['current_stage']:
+            last = status['stages'][-1]
+            st.progress(len(status['stages']) / (len(status['stages']) + 1),
+                        text=f"After {last['stage']}: {last['rows_out']:,} profiles remaining")
+        if status['progress']:
+            done, total = status['progress']
+            st.progress(done / total, text=f"Generating AI explanations... {done}/{total}")
+        if job.cancel_event.is_set():
+            st.caption("⏹ Cancelling - the run stops after the current step")
+        elif st.button("⏹ Cancel run", key=f"cancel_{job_id}",
+                       help="Stop the run after the profiles or AI explanations being processed right now"):
+            job.cancel()
+            st.rerun(scope='fragment')
+    elif st.session_state.get('loaded_job') != job_id:
+        # take the result once; a full rerun renders it in the results section (and stops the polling)
+        st.session_state['loaded_job'] = job_id
+        if status['status'] == 'done':
+            st.session_state['filtered_df'] = job.result['filtered_df']
+            st.session_state['original_df'] = job.result['original_df']
+            st.session_state['lazy_reasons'] = job.result['lazy_reasons']
+            st.session_state['result_version'] = st.session_state.get('result_version', 0) + 1
+        st.rerun(scope='app')
+    elif status['status'] == 'failed':
+        st.error(f"An error occurred during filtering: {status['error']}")
+        if can_resume and st.button("🔁 Resume run", key=f"resume_{job_id}",
+                                    help="Continue from the saved checkpoint: only the missing AI explanations are generated"):
+            resume_job(job_id)
+    elif status['status'] == 'cancelled':
+        st.warning("⏹ This background run was cancelled.")
+        if can_resume and st.button("🔁 Resume run", key=f"resume_{job_id}",
+                                    help="Continue from the saved checkpoint: only the missing AI explanations are generated"):
+            resume_job(job_id)
+    elif job.stages and job.stages[-1].get('failed'):
+        st.warning(f"⚠️ {job.stages[-1]['failed']} AI explanations could not be generated.")
+        if can_resume and st.button("🔁 Retry failed explanations", key=f"resume_{job_id}"):
+            resume_job(job_id)
+    if status['stages']:
+        with st.expander("📊 Stage progress", expanded=not job.finished):
+            st.dataframe(pd.DataFrame(status['stages']), use_container_width=True, hide_index=True)
+
+current_job = st.session_state.get('job_id') or st.query_params.get('job')
+if current_job and not is_job_id(current_job):
+    # the URL names a run directory: anything but a job id is ignored
+    st.query_params.pop('job', None)
+    current_job = None
+if current_job:
+    job = get_job_manager().get(current_job)
+    # poll every 2 seconds while the job is running, stop once it is finished
+    st.fragment(show_job, run_every=2 if job is not None and not job.finished else None)(current_job)
+
+session_jobs = [get_job_manager().get(job_id) for job_id in st.session_state.get('job_ids', [])]
+session_jobs = [job.snapshot() for job in session_jobs if job is not None]
+if len(session_jobs) > 1:
+    with st.expander(f"🧵 Background runs ({len(session_jobs)})"):
+        st.dataframe(pd.DataFrame([{key: job[key] for key in ['id', 'name', 'status', 'current_stage', 'seconds']}
+                                   for job in session_jobs]), use_container_width=True, hide_index=True)
+
 # --- Output and Checkbox (always visible if filtered_df exists) ---
 if st.session_state.get('filtered_df') is not None:
     st.header("🎯 Filtered Results")
@@ -571,6 +628,29 @@ if st.session_state.get('filtered_df') is not None:
                                    help="Display AI-generated explanations in the table view (always included in downloads)")
     
     df = st.session_state['filtered_df']
+    reasons = st.session_state.get('lazy_reasons')
+    
+    def with_reasons(frame, generate=True):
+        """Fill llm_reason of the given rows in lazy mode (generating missing explanations, best candidates first)"""
+        if reasons is None or frame.empty:
+            return frame
+        if not generate:
+            return frame.assign(llm_reason=reasons.column(frame.index))
+        progress = st.progress(0.0, text="Generating AI explanations...")
+        frame = reasons.fill(frame, lambda done, total: progress.progress(done / total, text=f"Generating AI explanations... {done}/{total}"))
+        progress.empty()
+        return frame
+    
+    if reasons is not None and not reasons.complete:
+        reasons_col1, reasons_col2 = st.columns([3, 1])
+        with reasons_col1:
+            st.info(f"⚡ AI explanations generated on demand: {len(reasons):,} of {len(reasons.df):,} ready. "
+                    "They are created for the profiles you view with 'Show AI Reasoning' and for downloads.")
+        with reasons_col2:
+            if st.button("Generate all explanations", use_container_width=True):
+                with_reasons(df)
+                st.rerun()
+    
     if companies_c_rows:
         df_filtered = df
     else:
@@ -597,20 +677,21 @@ if st.session_state.get('filtered_df') is not None:
         with col4:
             st.metric("🤖 AI Top 25%", f"{top_25_count:,} profiles")
     
-    # Prepare display columns (for viewing only)
-    display_cols = list(df_filtered.columns)
+    # Prepare display columns (for viewing only; the title normalization's working columns are left out)
+    result_cols = [col for col in df_filtered.columns if col not in TITLE_FEATURE_COLUMNS]
+    display_cols = result_cols
     if 'llm_reason' in df_filtered.columns:
         if not show_reasoning:
-            display_cols = [col for col in df_filtered.columns if col != 'llm_reason']
+            display_cols = [col for col in result_cols if col != 'llm_reason']
         else:
             # Move llm_reason to the end for visibility
-            display_cols = [col for col in df_filtered.columns if col != 'llm_reason'] + ['llm_reason']
+            display_cols = [col for col in result_cols if col != 'llm_reason'] + ['llm_reason']
     
     # Prepare download columns (always include llm_reason for client)
-    download_cols = list(df_filtered.columns)
+    download_cols = result_cols
     if 'llm_reason' in df_filtered.columns:
         # Move llm_reason to the end for download
-        download_cols = [col for col in df_filtered.columns if col != 'llm_reason'] + ['llm_reason']
+        download_cols = [col for col in result_cols if col != 'llm_reason'] + ['llm_reason']
     
     # Display results with pagination
     st.subheader(f"📋 Results ({len(df_filtered):,} profiles)")
@@ -628,6 +709,10 @@ if st.session_state.get('filtered_df') is not None:
     else:
         df_display = df_filtered
     
+    # AI Top 25% first: in lazy mode its explanations are generated before the rest
+    top_25_df = get_top_25_percent(df_filtered if not search_term else df_display)
+    top_25_view = with_reasons(top_25_df, generate=show_reasoning)
+    
     # Create tabs for different views
     tab1, tab2 = st.tabs(["📋 All Results", "🤖 AI Top 25%"])
     
@@ -635,7 +720,7 @@ if st.session_state.get('filtered_df') is not None:
         # Show all results
         if not df_display.empty:
             st.dataframe(
-                df_display[display_cols].head(100), 
+                with_reasons(df_display.head(100), generate=show_reasoning)[display_cols], 
                 use_container_width=True,
                 height=400
             )
@@ -647,12 +732,10 @@ if st.session_state.get('filtered_df') is not None:
     
     with tab2:
         # Show AI Top 25%
-        top_25_df = get_top_25_percent(df_filtered if not search_term else df_display)
-        
         if not top_25_df.empty:
             st.info(f"🤖 **AI-Selected Top Candidates:** These {len(top_25_df)} profiles scored highest based on keyword relevance, company category, and content quality.")
             st.dataframe(
-                top_25_df[display_cols], 
+                top_25_view[display_cols], 
                 use_container_width=True,
                 height=400
             )
@@ -673,57 +756,99 @@ if st.session_state.get('filtered_df') is not None:
         border-radius: 10px;
         margin: 10px 0;
     ">
-        <h4 style="color: #fdcb6e; margin-bottom: 10px;">📊 CSV Download Options:</h4>
+        <h4 style="color: #fdcb6e; margin-bottom: 10px;">📊 Download Options:</h4>
         <div style="line-height: 1.6;">
             <strong>Option 1:</strong> All Profiles (original uploaded data)<br>
             <strong>Option 2:</strong> AI Recommended (top 25% of filtered results)<br>
-            <strong>Option 3:</strong> Approved Candidates (all filtered results)
+            <strong>Option 3:</strong> Approved Candidates (all filtered results)<br>
+            <strong>Excel:</strong> all three as sheets of one workbook
         </div>
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        # CSV download for original data
-        if 'original_df' in st.session_state and st.session_state['original_df'] is not None:
-            original_data = st.session_state['original_df']
-            original_csv = original_data.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📄 All Profiles CSV",
-                data=original_csv,
-                file_name=f"all_profiles_{len(original_data)}_original.csv",
-                mime="text/csv",
-                help="Download all original uploaded profiles"
-            )
-        else:
-            st.info("Original data not available")
+    # Lazy mode: the explanations are generated here, with progress, before the downloads are offered;
+    # the download callables only serialize (a click must not wait for LLM calls)
+    pending_reasons = reasons.missing(df_filtered.index) if reasons is not None else 0
+    if pending_reasons:
+        prepare_col1, prepare_col2 = st.columns([3, 1])
+        with prepare_col1:
+            st.info(f"⚡ {pending_reasons:,} AI explanations are still missing for the downloads of the approved candidates.")
+        with prepare_col2:
+            if st.button("Prepare downloads", use_container_width=True):
+                with_reasons(df_filtered)
+                st.rerun()
+    
+    # Downloads are rendered lazily (on click) and memoized until the results (or their explanations) change
+    if 'export_cache' not in st.session_state:
+        st.session_state['export_cache'] = ExportCache()
+    export_cache = st.session_state['export_cache']
+    export_cache.set_version((st.session_state.get('result_version'), len(reasons) if reasons is not None else None))
+    
+    export_format = st.selectbox(
+        "File format",
+        options=list(EXPORT_FORMATS),
+        format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+        help="Compressed CSV and Parquet are much smaller for large result sets"
+    )
+    mime = EXPORT_FORMATS[export_format]['mime']
+    original_data = st.session_state.get('original_df')
+    view_key = companies_c_rows
     
-    with col2:
-        # CSV download for AI Top 25%
-        top_25_df = get_top_25_percent(df_filtered)
-        if not top_25_df.empty:
-            top_25_csv = top_25_df[download_cols].to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="🤖 AI Top 25% CSV",
-                data=top_25_csv,
-                file_name=f"ai_recommended_top25_{len(top_25_df)}_profiles.csv",
-                mime="text/csv",
-                help="Download AI-selected top 25% candidates"
-            )
-        else:
-            st.info("No top 25% data available")
+    def top_25_sheet():
+        return with_reasons(get_top_25_percent(df_filtered), generate=False)[download_cols]
     
-    with col3:
-        # CSV download for all filtered results
-        filtered_csv = df_filtered[download_cols].to_csv(index=False).encode('utf-8')
+    if export_format == 'xlsx':
+        def all_sheets():
+            return result_sheets(with_reasons(df_filtered, generate=False)[download_cols], top_25_sheet(), original_data)
         st.download_button(
-            label="✅ Approved Candidates CSV",
-            data=filtered_csv,
-            file_name=f"approved_candidates_{len(df_filtered)}_filtered.csv",
-            mime="text/csv",
-            help="Download all filtered/approved candidates"
+            label="📊 All Results XLSX",
+            data=export_cache.loader(('all_sheets', view_key), export_format, all_sheets),
+            file_name=export_file_name(f"speaker_profiles_{len(df_filtered)}_results", export_format),
+            mime=mime,
+            disabled=bool(pending_reasons),
+            help="Download original profiles, AI top 25% and approved candidates as sheets of one workbook"
         )
+    else:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            # Download for original data
+            if original_data is not None:
+                st.download_button(
+                    label=f"📄 All Profiles {EXPORT_FORMATS[export_format]['label']}",
+                    data=export_cache.loader('original', export_format, lambda: {ALL_PROFILES_SHEET: original_data}),
+                    file_name=export_file_name(f"all_profiles_{len(original_data)}_original", export_format),
+                    mime=mime,
+                    help="Download all original uploaded profiles"
+                )
+            else:
+                st.info("Original data not available")
+        
+        with col2:
+            # Download for AI Top 25%
+            top_25_count = max(1, len(df_filtered) // 4) if not df_filtered.empty else 0
+            if top_25_count:
+                st.download_button(
+                    label=f"🤖 AI Top 25% {EXPORT_FORMATS[export_format]['label']}",
+                    data=export_cache.loader(('top_25', view_key), export_format, lambda: {TOP_PROFILES_SHEET: top_25_sheet()}),
+                    file_name=export_file_name(f"ai_recommended_top25_{top_25_count}_profiles", export_format),
+                    mime=mime,
+                    disabled=bool(pending_reasons),
+                    help="Download AI-selected top 25% candidates"
+                )
+            else:
+                st.info("No top 25% data available")
+        
+        with col3:
+            # Download for all filtered results
+            st.download_button(
+                label=f"✅ Approved Candidates {EXPORT_FORMATS[export_format]['label']}",
+                data=export_cache.loader(('approved', view_key), export_format, lambda: {APPROVED_SHEET: with_reasons(df_filtered, generate=False)[download_cols]}),
+                file_name=export_file_name(f"approved_candidates_{len(df_filtered)}_filtered", export_format),
+                mime=mime,
+                disabled=bool(pending_reasons),
+                help="Download all filtered/approved candidates"
+            )
 else:
     st.info("👆 Please upload a file and run filtering to see results.")
     
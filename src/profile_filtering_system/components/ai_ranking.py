@@ -0,0 +1,152 @@
+"""
+AI ranking component - scores filtered profiles and selects the top candidates
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.constants import ai_score_weights, top_profiles_fraction
+
+
+def _flag(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[column].fillna(False).to_numpy(dtype=bool)
+
+
+def _length_points(df: pd.DataFrame, column: str, rule: dict, length_column: str = None) -> np.ndarray:
+    if length_column in df.columns:
+        # precomputed by the title normalization
+        lengths = df[length_column].to_numpy(dtype=np.int64)
+    elif column not in df.columns:
+        lengths = np.zeros(len(df), dtype=np.int64)
+    else:
+        # len(str(value)) without materializing the converted strings as a Series
+        values = df[column].to_numpy()
+        lengths = np.fromiter(map(len, map(str, values)), dtype=np.int64, count=len(values))
+    points = np.minimum(rule['max_points'], lengths // rule['divisor'])
+    return np.where(lengths > rule['min_length'], points, 0)
+
+
+def calculate_ai_scores(df: pd.DataFrame, weights: dict = None) -> np.ndarray:
+    """
+    Calculate AI scores for ranking profiles - higher score = better candidate
+
+    Args:
+        df: Filtered DataFrame (criteria flags, Companies Category, title, summary)
+        weights: Score weights, defaults to ai_score_weights
+
+    Returns:
+        Integer score per row, in row order
+    """
+    weights = ai_score_weights if weights is None else weights
+    scores = np.zeros(len(df), dtype=np.int64)
+
+    # Criteria scoring and bonus for multiple criteria matches
+    criteria_count = np.zeros(len(df), dtype=np.int64)
+    for column, points in weights['criteria'].items():
+        flags = _flag(df, column)
+        scores += flags * points
+        criteria_count += flags
+    scores += criteria_count * weights['criteria_count_bonus']
+
+    # Company category scoring
+    if 'Companies Category' in df.columns:
+        category_points = df['Companies Category'].map(weights['company_category'])
+        scores += category_points.fillna(0).to_numpy(dtype=np.int64)
+
+    # Content quality scoring
+    scores += _length_points(df, 'title', weights['title_length'], length_column='title_length')
+    scores += _length_points(df, 'summary', weights['summary_length'])
+    return scores
+
+
+def top_k_positions(scores: np.ndarray, k: int, order: np.ndarray = None) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first, without sorting all scores
+
+    Ties are broken by ``order`` (ascending), which defaults to the row position,
+    so earlier rows win ties deterministically.
+
+    Args:
+        scores: Score per row
+        k: Number of positions to select
+        order: Tie-breaking key per row (unique), defaults to 0..n-1
+
+    Returns:
+        Array of k positions into ``scores``
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    order = np.arange(n) if order is None else np.asarray(order)
+    k = min(max(k, 0), n)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if k < n:
+        # value of the k-th best score; everything above it is in, ties on it are taken by order
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)
+        ties = ties[np.argsort(order[ties], kind='stable')[:k - len(above)]]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(n)
+
+    # only the k selected rows are sorted: score descending, then order ascending
+    return selected[np.lexsort((order[selected], -scores[selected]))]
+
+
+def get_top_k(df: pd.DataFrame, k: int, scores: np.ndarray = None) -> pd.DataFrame:
+    """
+    Get the k best profiles by AI score, best first
+    """
+    scores = calculate_ai_scores(df) if scores is None else scores
+    return df.iloc[top_k_positions(scores, k)]
+
+
+def get_top_25_percent(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Get top 25% of profiles based on AI scoring (at least 1 profile)
+    """
+    if df.empty:
+        return df
+    return get_top_k(df, max(1, int(len(df) * top_profiles_fraction)))
+
+
+class StreamingTopK:
+    """
+    Keeps the k best profiles across DataFrame chunks
+
+    Only the current best k rows are held between chunks. Ties are broken by
+    arrival order, so the result equals ``get_top_k`` on the concatenated chunks.
+    """
+
+    def __init__(self, k: int, weights: dict = None):
+        self.k = k
+        self.weights = weights
+        self.rows_seen = 0
+        self._best = None
+        self._scores = np.zeros(0, dtype=np.int64)
+        self._order = np.zeros(0, dtype=np.int64)
+
+    def push(self, chunk: pd.DataFrame) -> None:
+        """Score a chunk and merge it into the current top k"""
+        chunk_scores = calculate_ai_scores(chunk, self.weights)
+        chunk_order = np.arange(self.rows_seen, self.rows_seen + len(chunk))
+        self.rows_seen += len(chunk)
+
+        candidates = chunk if self._best is None else pd.concat([self._best, chunk])
+        scores = np.concatenate([self._scores, chunk_scores])
+        order = np.concatenate([self._order, chunk_order])
+
+        positions = top_k_positions(scores, self.k, order)
+        self._best = candidates.iloc[positions]
+        self._scores = scores[positions]
+        self._order = order[positions]
+
+    def result(self) -> pd.DataFrame:
+        """The k best rows seen so far, best first"""
+        return self._best if self._best is not None else pd.DataFrame()
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self._scores
@@ -4,6 +4,28 @@ Company category assignment component
 import pandas as pd
 
 
+def company_categories(df: pd.DataFrame, companies_a_df: pd.DataFrame, companies_b_df: pd.DataFrame) -> pd.Series:
+    """
+    Company category (A, B, C) of every profile
+
+    Args:
+        df: Input DataFrame
+        companies_a_df: DataFrame containing Category A companies
+        companies_b_df: DataFrame containing Category B companies
+
+    Returns:
+        Series of 'Category A', 'Category B' or 'Category C', aligned to df
+    """
+    # the lowercased company lists are built once, not for every profile
+    companies_a = set(companies_a_df['company'].str.lower().dropna())
+    companies_b = set(companies_b_df['company'].str.lower().dropna())
+    return df['companyName'].str.lower().apply(
+        lambda x: "Category A" if x in companies_a
+        else "Category B" if x in companies_b
+        else "Category C"
+    )
+
+
 def company_category(df: pd.DataFrame, companies_a_df: pd.DataFrame, companies_b_df: pd.DataFrame) -> pd.DataFrame:
     """
     Assign company categories (A, B, C) based on company lists
@@ -17,9 +39,5 @@ def company_category(df: pd.DataFrame, companies_a_df: pd.DataFrame, companies_b
         DataFrame with Companies Category column added
     """
     df = df.copy()
-    df["Companies Category"] = df['companyName'].str.lower().apply(
-        lambda x: "Category A" if x in companies_a_df['company'].str.lower().values
-        else "Category B" if x in companies_b_df['company'].str.lower().values
-        else "Category C"
-    )
+    df["Companies Category"] = company_categories(df, companies_a_df, companies_b_df)
     return df
@@ -1,19 +1,37 @@
 """
 Company exclusion component - removes profiles from blacklisted companies
 """
+import numpy as np
 import pandas as pd
+from src.profile_filtering_system.utils.string_engine import isin
 
 
-def company_exclusion(df: pd.DataFrame, companies_to_remove_df: pd.DataFrame) -> pd.DataFrame:
+def company_exclusion_mask(df: pd.DataFrame, companies_to_remove_df: pd.DataFrame, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of the profiles to keep: companies not on the blacklist
+
+    Args:
+        df: Input DataFrame
+        companies_to_remove_df: DataFrame containing companies to exclude
+        engine: String engine used for the predicate ('pandas' or 'pyarrow')
+
+    Returns:
+        Boolean numpy array, True for rows to keep
+    """
+    return ~isin(df['companyName'], companies_to_remove_df['Account Name'], engine)
+
+
+def company_exclusion(df: pd.DataFrame, companies_to_remove_df: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
     """
     Exclude profiles from blacklisted companies
     
     Args:
         df: Input DataFrame
         companies_to_remove_df: DataFrame containing companies to exclude
+        engine: String engine used for the predicate ('pandas' or 'pyarrow')
         
     Returns:
         Filtered DataFrame
     """
-    filtered_df = df[df['companyName'].fillna('').isin(companies_to_remove_df['Account Name']) == False]
+    filtered_df = df[company_exclusion_mask(df, companies_to_remove_df, engine)]
     return filtered_df
@@ -0,0 +1,116 @@
+"""
+Deduplication component - removes repeated profiles of the same person before the expensive stages
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.constants import dedup_key_columns
+
+DEDUP_KEEP_OPTIONS = ('first', 'richest')
+
+
+def identity_keys(df: pd.DataFrame, key_columns: list = None):
+    """
+    Build each profile's identity key
+
+    The key is the first non-empty value among ``key_columns`` (in priority order),
+    prefixed with its column name so values of different columns never collide.
+
+    Args:
+        df: Input DataFrame
+        key_columns: Identity columns in priority order
+
+    Returns:
+        Tuple of (object array of keys, None where missing; mask of rows that have a key)
+    """
+    key_columns = dedup_key_columns if key_columns is None else key_columns
+    keys = np.full(len(df), None, dtype=object)
+    has_key = np.zeros(len(df), dtype=bool)
+
+    for column in key_columns:
+        if column not in df.columns:
+            continue
+        # only rows still without a key are looked at
+        candidates = np.flatnonzero(~has_key & df[column].notna().to_numpy())
+        values = df[column].iloc[candidates].astype(str).str.strip().str.rstrip('/')
+        non_empty = (values != '').to_numpy()
+        keys[candidates[non_empty]] = (column + '\x1f' + values[non_empty]).to_numpy()
+        has_key[candidates[non_empty]] = True
+    return keys, has_key
+
+
+def identity_hashes(df: pd.DataFrame, key_columns: list = None):
+    """
+    Hash each profile's identity key (see ``identity_keys``)
+
+    Returns:
+        Tuple of (uint64 hash per row, mask of rows that have a key)
+    """
+    keys, has_key = identity_keys(df, key_columns)
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    if has_key.any():
+        hashes[has_key] = pd.util.hash_array(keys[has_key])
+    return hashes, has_key
+
+
+def _richness(df: pd.DataFrame, positions: np.ndarray) -> np.ndarray:
+    """Number of non-empty fields of the rows at ``positions``"""
+    richness = np.zeros(len(positions), dtype=np.int64)
+    for column in df.columns:
+        values = df[column].iloc[positions]
+        filled = values.notna().to_numpy()
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            filled &= (values != '').to_numpy(dtype=bool, na_value=False)
+        richness += filled
+    return richness
+
+
+def duplicate_mask(df: pd.DataFrame, key_columns: list = None, keep: str = 'first') -> np.ndarray:
+    """
+    Mask of the rows to keep after removing exact duplicate profiles
+
+    Rows without any identity key are always kept.
+
+    Args:
+        df: Input DataFrame
+        key_columns: Identity columns in priority order (defaults to dedup_key_columns)
+        keep: 'first' keeps the first occurrence, 'richest' keeps the occurrence
+              with the most non-empty fields (first one on ties)
+
+    Returns:
+        Boolean numpy array, True for rows to keep
+    """
+    if keep not in DEDUP_KEEP_OPTIONS:
+        raise ValueError(f"Unknown keep option '{keep}', expected one of {DEDUP_KEEP_OPTIONS}")
+
+    hashes, has_key = identity_hashes(df, key_columns)
+    keyed_positions = np.flatnonzero(has_key)
+    keep_mask = np.ones(len(df), dtype=bool)
+    if len(keyed_positions) == 0:
+        return keep_mask
+
+    if keep == 'richest':
+        # only rows that share their key with another row need a richness score
+        shared = pd.Series(hashes[keyed_positions]).duplicated(keep=False).to_numpy()
+        richness = np.zeros(len(keyed_positions), dtype=np.int64)
+        richness[shared] = _richness(df, keyed_positions[shared])
+        keyed_positions = keyed_positions[np.lexsort((keyed_positions, -richness))]
+
+    # hash table lookup - O(n)
+    duplicated = pd.Series(hashes[keyed_positions]).duplicated(keep='first').to_numpy()
+    keep_mask[keyed_positions[duplicated]] = False
+    return keep_mask
+
+
+def deduplicate_profiles(df: pd.DataFrame, key_columns: list = None, keep: str = 'first') -> pd.DataFrame:
+    """
+    Remove exact duplicate profiles (same profile URL / vmid / LinkedIn URL)
+
+    Args:
+        df: Input DataFrame
+        key_columns: Identity columns in priority order (defaults to dedup_key_columns)
+        keep: 'first' or 'richest'
+
+    Returns:
+        Filtered DataFrame, original row order preserved
+    """
+    return df[duplicate_mask(df, key_columns, keep)]
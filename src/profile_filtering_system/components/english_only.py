@@ -1,26 +1,62 @@
 """
 English language filter component
 """
+import numpy as np
 import pandas as pd
 from langdetect import detect
+from langdetect.detector_factory import init_factory
 from langdetect.lang_detect_exception import LangDetectException
+from src.profile_filtering_system.utils.english_classifier import get_english_classifier
 
+# 'langdetect' (55-language detector, one summary at a time) or 'builtin' (English-vs-other n-gram tables, in batches);
+# on short headlines of job words the two can disagree (see the margin of utils/english_classifier.py)
+DETECTORS = ('langdetect', 'builtin')
 
-def english_only(df: pd.DataFrame) -> pd.DataFrame:
+
+def is_english(text) -> bool:
+    try:
+        return detect(str(text)) == 'en'
+    except LangDetectException:
+        return False
+
+
+def load_language_detector(detector: str = 'langdetect') -> None:
+    """Load the detector's language profiles (or n-gram tables) now instead of on the first summary"""
+    if detector == 'builtin':
+        get_english_classifier()
+    else:
+        init_factory()
+
+
+def english_only_mask(df: pd.DataFrame, detector: str = 'langdetect') -> np.ndarray:
+    """
+    Mask of the profiles to keep: summaries detected as English
+
+    Args:
+        df: Input DataFrame
+        detector: 'langdetect' or 'builtin' (see utils/english_classifier.py)
+
+    Returns:
+        Boolean numpy array, True for rows to keep
+    """
+    if detector not in DETECTORS:
+        raise ValueError(f"Unknown language detector '{detector}', expected one of {DETECTORS}")
+    summaries = df['summary'].fillna('')
+    if detector == 'builtin':
+        return get_english_classifier().is_english(summaries)
+    return np.fromiter(map(is_english, summaries), dtype=bool, count=len(df))
+
+
+def english_only(df: pd.DataFrame, detector: str = 'langdetect') -> pd.DataFrame:
     """
     Filter profiles to keep only English language content
     
     Args:
         df: Input DataFrame
+        detector: 'langdetect' or 'builtin' (see utils/english_classifier.py)
         
     Returns:
         Filtered DataFrame with only English profiles
     """
-    def is_english(text):
-        try:
-            return detect(str(text)) == 'en'
-        except LangDetectException:
-            return False
-    
-    filtered_df = df[df['summary'].fillna('').apply(is_english)]
+    filtered_df = df[english_only_mask(df, detector)]
     return filtered_df
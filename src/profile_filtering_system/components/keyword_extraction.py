@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from src.profile_filtering_system.constants import GENERIC_WORDS
 from src.profile_filtering_system.utils.prompts import keyword_extraction_prompt, class_a_keyword_prompt, class_b_keyword_prompt
 from src.profile_filtering_system.utils.common import OPENAI_SECRET_KEY
+from src.profile_filtering_system.utils.llm_scheduler import get_scheduler
 
 # Ensure NLTK data is available
 try:
@@ -113,11 +114,12 @@ def extract_class_a_keywords_llm(event_name: str) -> list:
     llm_model = ChatOpenAI(
         model="gpt-3.5-turbo", 
         temperature=0,
-        api_key=OPENAI_SECRET_KEY
+        api_key=OPENAI_SECRET_KEY,
+        max_retries=0
     )
     
     full_prompt = f"{class_a_keyword_prompt}\n\nEvent Name: {event_name}"
-    response = llm_model.invoke(full_prompt)
+    response = get_scheduler().invoke(llm_model, full_prompt)
     keywords_str = response.content if hasattr(response, "content") else str(response)
     keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
     
@@ -138,11 +140,12 @@ def extract_class_b_keywords_llm(event_subtitle: str) -> list:
     llm_model = ChatOpenAI(
         model="gpt-3.5-turbo", 
         temperature=0,
-        api_key=OPENAI_SECRET_KEY
+        api_key=OPENAI_SECRET_KEY,
+        max_retries=0
     )
     
     full_prompt = f"{class_b_keyword_prompt}\n\nEvent Subtitle: {event_subtitle}"
-    response = llm_model.invoke(full_prompt)
+    response = get_scheduler().invoke(llm_model, full_prompt)
     keywords_str = response.content if hasattr(response, "content") else str(response)
     keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
     
@@ -214,12 +217,13 @@ def extract_profile_keywords_llm(topic: str, sub_topic: str) -> list:
     llm_model = ChatOpenAI(
         model="gpt-3.5-turbo", 
         temperature=0,
-        api_key=OPENAI_SECRET_KEY
+        api_key=OPENAI_SECRET_KEY,
+        max_retries=0
     )
     
     text = topic + ' ' + sub_topic
     full_prompt = f"{keyword_extraction_prompt}\n\nText: {text}"
-    response = llm_model.invoke(full_prompt)
+    response = get_scheduler().invoke(llm_model, full_prompt)
     keywords_str = response.content if hasattr(response, "content") else str(response)
     keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
     return keywords
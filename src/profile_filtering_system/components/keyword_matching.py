@@ -1,5 +1,7 @@
 import re
+import numpy as np
 import pandas as pd
+from src.profile_filtering_system.utils.token_cache import TokenCache
 
 
 def count_keyword_matches_in_text(text: str, keywords: list) -> int:
@@ -149,6 +151,58 @@ def keyword_match_classified(row: pd.Series, class_a_keywords: list, class_b_key
     }
 
 
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    # str(row.get(column, '')) of keyword_match_classified, for a whole column
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[column].astype(str)
+
+
+def classified_keyword_criteria(df: pd.DataFrame, class_a_keywords: list, class_b_keywords: list, cache=None) -> pd.DataFrame:
+    """
+    Evaluate the three keyword criteria for every profile at once
+
+    Same result as ``keyword_match_classified`` per row, but the token sets come
+    from a TokenCache, so texts seen in earlier runs are not tokenized again and
+    each criteria is a vectorized count of keyword tokens.
+
+    Args:
+        df: Profiles (title, titleDescription, summary)
+        class_a_keywords: List of Class A keywords (from event name)
+        class_b_keywords: List of Class B keywords (from event subtitle)
+        cache: TokenCache, a fresh in-memory cache if not given
+
+    Returns:
+        DataFrame with boolean columns criteria_a, criteria_b, criteria_c and passes, aligned to df
+    """
+    cache = TokenCache() if cache is None else cache
+    title_desc = (_text_column(df, 'title') + ' ' + _text_column(df, 'titleDescription')).to_numpy()
+    summary = _text_column(df, 'summary').to_numpy()
+
+    title_a, title_b = cache.keyword_counts(title_desc, class_a_keywords, class_b_keywords)
+    summary_a, summary_b = cache.keyword_counts(summary, class_a_keywords, class_b_keywords)
+
+    criteria = pd.DataFrame({
+        'criteria_a': (title_a >= 1) & (title_b >= 1),
+        'criteria_b': (title_a >= 1) & (title_a + title_b >= 2),
+        'criteria_c': (summary_a >= 1) & (summary_a + summary_b >= 3),
+    }, index=df.index)
+    criteria['passes'] = criteria.any(axis=1)
+    return criteria
+
+
+def criteria_labels(criteria: pd.DataFrame) -> pd.Series:
+    """
+    'Criteria A, Criteria C'-style label per row ('None' if no criteria passed)
+    """
+    labels = np.full(len(criteria), '', dtype=object)
+    for column, label in [('criteria_a', 'Criteria A'), ('criteria_b', 'Criteria B'), ('criteria_c', 'Criteria C')]:
+        flags = criteria[column].to_numpy(dtype=bool)
+        labels[flags] = labels[flags] + np.where(labels[flags] == '', '', ', ') + label
+    labels[labels == ''] = 'None'
+    return pd.Series(labels, index=criteria.index)
+
+
 # Legacy function for backward compatibility
 def count_keyword_matches(text: str, keywords: list) -> int:
     """
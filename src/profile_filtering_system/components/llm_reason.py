@@ -1,16 +1,22 @@
 """
 LLM reasoning component - generates explanations for profile selection
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
-from src.profile_filtering_system.utils.prompts import reason_generation_llm_prompt
+from src.profile_filtering_system.utils.prompt_builder import build_reason_prompt
 from src.profile_filtering_system.utils.common import OPENAI_SECRET_KEY
+from src.profile_filtering_system.utils.llm_scheduler import get_scheduler
+from src.profile_filtering_system.components.ai_ranking import calculate_ai_scores, top_k_positions
 
 load_dotenv()
 
 
-def generate_llm_reason(row: pd.Series, topic: str, sub_topic: str, event_location: str, criteria_passed: str) -> str:
+def generate_llm_reason(row: pd.Series, topic: str, sub_topic: str, event_location: str, criteria_passed: str,
+                        keywords: list = None, compact: bool = True, on_text=None) -> str:
     """
     Generate LLM-powered explanation for why a profile was selected
     
@@ -20,31 +26,146 @@ def generate_llm_reason(row: pd.Series, topic: str, sub_topic: str, event_locati
         sub_topic: Event subtopic
         event_location: Event location
         criteria_passed: String describing which criteria this profile passed
+        keywords: Matched Class A/B keywords; the summary is trimmed to the sentences containing them
+        compact: Compact profile block within reason_prompt_token_budget (False sends the full profile)
+        on_text: Streams the explanation - called with the text generated so far as tokens arrive
         
     Returns:
         Generated explanation string
     """
-    llm_model = ChatOpenAI(api_key=OPENAI_SECRET_KEY)
+    # retries and rate limits are handled by the shared scheduler
+    llm_model = ChatOpenAI(api_key=OPENAI_SECRET_KEY, max_retries=0)
     
-    profile = {
-        'title': row.get('title', ''),
-        'companyName': row.get('companyName', ''),
-        'summary': row.get('summary', ''),
-        'description': row.get('description', ''),
-        'location': row.get('location', ''),
-        'companyLocation': row.get('companyLocation', ''),
-        'Companies Category': row.get('Companies Category', '')
-    }
+    prompt = build_reason_prompt(row, topic, sub_topic, event_location, criteria_passed,
+                                 keywords=keywords, compact=compact)
     
-    prompt = reason_generation_llm_prompt.format(
-        profile=profile,
-        topic=topic,
-        sub_topic=sub_topic,
-        event_location=event_location,
-        criteria_passed=criteria_passed
-    )
-    
-    response = llm_model.invoke(prompt)
+    if on_text is not None:
+        response = get_scheduler().stream(llm_model, prompt, on_text)
+    else:
+        response = get_scheduler().invoke(llm_model, prompt)
+    if response is None:
+        return ''
     if hasattr(response, 'content'):
         return response.content.strip()
     return str(response).strip()
+
+
+def stream_reasons(df: pd.DataFrame, topic: str, sub_topic: str, event_location: str,
+                   criteria_passed: pd.Series, generator=None, on_text=None):
+    """
+    Generate reasons one profile at a time, best AI score first, streaming each explanation
+
+    Args:
+        df: Shortlisted profiles
+        topic: Event topic
+        sub_topic: Event subtopic
+        event_location: Event location
+        criteria_passed: Criteria description per row, aligned to df
+        generator: Reason function with the signature of generate_llm_reason
+        on_text: Called with (label, text so far) while a reason is being generated
+
+    Yields:
+        Tuples of (index label, reason) as each reason is finished
+    """
+    generator = generator or generate_llm_reason
+    for position in top_k_positions(calculate_ai_scores(df), len(df)):
+        label = df.index[position]
+        stream = None if on_text is None else (lambda text, label=label: on_text(label, text))
+        reason = generator(df.iloc[position], topic, sub_topic, event_location, criteria_passed.iloc[position], on_text=stream)
+        yield label, reason
+
+
+class LazyReasons:
+    """
+    Deferred ``llm_reason`` column - reasons are generated only for the rows that are
+    shown, selected or exported, and each reason is generated once.
+
+    Missing reasons are generated in priority order (best AI score first), so the
+    rows users look at first are ready first. ``generate_all`` fills the whole
+    shortlist as an explicit action.
+    """
+
+    def __init__(self, df: pd.DataFrame, topic: str, sub_topic: str, event_location: str,
+                 criteria_passed: pd.Series, generator=None, max_workers: int = 1):
+        """
+        Args:
+            df: Shortlisted profiles (unique index labels)
+            topic: Event topic
+            sub_topic: Event subtopic
+            event_location: Event location
+            criteria_passed: Criteria description per row, aligned to df
+            generator: Reason function with the signature of generate_llm_reason
+            max_workers: Reasons generated concurrently (the LLM scheduler still enforces the rate limits)
+        """
+        if not df.index.is_unique:
+            raise ValueError("LazyReasons needs unique index labels")
+        self.df = df
+        self.topic = topic
+        self.sub_topic = sub_topic
+        self.event_location = event_location
+        self.criteria_passed = criteria_passed
+        self.generator = generator or generate_llm_reason
+        self.max_workers = max_workers
+        self._reasons = {}
+        self._lock = threading.Lock()
+        # rank of every row: 0 = best AI score
+        order = top_k_positions(calculate_ai_scores(df), len(df))
+        self._rank = pd.Series(np.argsort(order), index=df.index)
+
+    def __len__(self) -> int:
+        return len(self._reasons)
+
+    @property
+    def complete(self) -> bool:
+        return len(self._reasons) == len(self.df)
+
+    def missing(self, labels) -> int:
+        """Number of ``labels`` without a reason yet"""
+        return sum(label not in self._reasons for label in pd.unique(pd.Index(labels)))
+
+    def ensure(self, labels, progress_callback=None) -> None:
+        """
+        Generate the missing reasons of ``labels`` (best AI score first)
+
+        Args:
+            labels: Index labels of the rows that need a reason
+            progress_callback: Called with (done, total) after each generated reason
+        """
+        with self._lock:
+            missing = [label for label in pd.unique(pd.Index(labels)) if label not in self._reasons]
+            missing.sort(key=self._rank.__getitem__)
+            if self.max_workers <= 1:
+                for done, label in enumerate(missing, start=1):
+                    self._reasons[label] = self._generate(label)
+                    if progress_callback is not None:
+                        progress_callback(done, len(missing))
+                return
+            # the pool starts tasks in submission order, so better candidates are still served first
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._generate, label): label for label in missing}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    self._reasons[futures[future]] = future.result()
+                    if progress_callback is not None:
+                        progress_callback(done, len(missing))
+
+    def _generate(self, label) -> str:
+        return self.generator(self.df.loc[label], self.topic, self.sub_topic, self.event_location,
+                              self.criteria_passed.loc[label])
+
+    def generate_all(self, progress_callback=None) -> None:
+        """Generate the reasons of the whole shortlist"""
+        self.ensure(self.df.index, progress_callback)
+
+    def column(self, labels) -> pd.Series:
+        """Reasons generated so far for ``labels`` (None where not generated yet)"""
+        labels = pd.Index(labels)
+        return pd.Series([self._reasons.get(label) for label in labels], index=labels, dtype=object)
+
+    def fill(self, df: pd.DataFrame, progress_callback=None) -> pd.DataFrame:
+        """
+        Copy of ``df`` (a subset of the shortlist) with its llm_reason column generated
+        """
+        self.ensure(df.index, progress_callback)
+        df = df.copy()
+        df['llm_reason'] = self.column(df.index)
+        return df
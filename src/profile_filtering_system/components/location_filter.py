@@ -1,21 +1,32 @@
 """
 Location filter component - filters profiles based on company location
 """
+import numpy as np
 import pandas as pd
 from src.profile_filtering_system.constants import eu_countries
+from src.profile_filtering_system.utils.string_engine import lower, contains_any, endswith_any
 
 
-def location_filter(df: pd.DataFrame, event_location: str, additional_countries: list = None) -> pd.DataFrame:
+def company_locations(df: pd.DataFrame, engine: str = 'pandas') -> pd.Series:
+    """Lowercased company location of every profile (the profile location where it is missing as a column)"""
+    if 'companyLocation' not in df.columns:
+        return lower(pd.Series(df.get('location', ''), index=df.index, name='companyLocation'), engine)
+    return lower(df['companyLocation'], engine)
+
+
+def location_mask(locations: pd.Series, event_location: str, additional_countries: list = None,
+                  engine: str = 'pandas') -> np.ndarray:
     """
-    Filter profiles based on company location relative to event location
-    
+    Mask of the profiles to keep: company locations in the event's countries
+
     Args:
-        df: Input DataFrame
+        locations: Lowercased company locations (see company_locations)
         event_location: Event location string (can be None for EU default)
         additional_countries: List of additional countries to include beyond EU defaults
-        
+        engine: String engine used for the predicates ('pandas' or 'pyarrow')
+
     Returns:
-        Filtered DataFrame
+        Boolean numpy array, True for rows to keep
     """
     countries_to_match = [c.lower() for c in eu_countries]
     
@@ -23,26 +34,31 @@ def location_filter(df: pd.DataFrame, event_location: str, additional_countries:
     if additional_countries:
         countries_to_match.extend([c.lower() for c in additional_countries])
     
-    # Ensure companyLocation column exists and is properly formatted
-    if 'companyLocation' not in df.columns:
-        df['companyLocation'] = df.get('location', '')
-    
-    df['companyLocation'] = df['companyLocation'].fillna('').str.lower()
-    
     # If no event location specified, use EU + additional countries only
     if not event_location or not event_location.strip():
-        mask = df['companyLocation'].apply(lambda loc: any(country in loc for country in countries_to_match))
-        return df[mask]
+        return contains_any(locations, countries_to_match, engine)
     
     user_location = event_location.strip().lower()
     
     if user_location in ["china", "usa", "united states", "united states of america"]:
         countries_to_match += ["china", "united states", "usa"]
-        mask = df['companyLocation'].apply(lambda loc: any(country in loc for country in countries_to_match))
-        df = df[mask]
-    else:
-        mask = df['companyLocation'].apply(lambda loc: any(country in loc for country in countries_to_match))
-        df = df[mask]
-        df = df[~df['companyLocation'].str.strip().str.endswith(('united states', 'usa', 'china'))]
+        return contains_any(locations, countries_to_match, engine)
+    return contains_any(locations, countries_to_match, engine) & ~endswith_any(locations, ('united states', 'usa', 'china'), engine)
+
+
+def location_filter(df: pd.DataFrame, event_location: str, additional_countries: list = None, engine: str = 'pandas') -> pd.DataFrame:
+    """
+    Filter profiles based on company location relative to event location
     
-    return df
+    Args:
+        df: Input DataFrame
+        event_location: Event location string (can be None for EU default)
+        additional_countries: List of additional countries to include beyond EU defaults
+        engine: String engine used for the predicates ('pandas' or 'pyarrow')
+        
+    Returns:
+        Filtered DataFrame (with the lowercased companyLocation)
+    """
+    # Ensure companyLocation column exists and is properly formatted (assign: df can be a chunk of a larger frame)
+    df = df.assign(companyLocation=company_locations(df, engine))
+    return df[location_mask(df['companyLocation'], event_location, additional_countries, engine)]
@@ -0,0 +1,290 @@
+"""
+Near-duplicate component - collapses the same person appearing under different lead URLs
+
+Profiles are shingled (word bigrams of name + company + summary), summarised by
+MinHash signatures and grouped with locality-sensitive hashing, so only profiles
+that share a band bucket are compared. Candidate pairs above the similarity
+threshold are merged into clusters and the first profile of each cluster is kept.
+
+Only profiles with a name or enough text take part: without a name, the company
+alone (empty summaries) would make every colleague look like the same person.
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.constants import (
+    near_duplicate_columns, near_duplicate_name_column, near_duplicate_min_shingles, near_duplicate_max_bucket
+)
+
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BASE = np.uint64(0x100000001B3)
+# inverse of _BASE modulo 2**64, so substring hashes can be taken from one cumulative sum
+_BASE_INVERSE = np.uint64(pow(0x100000001B3, -1, 2 ** 64))
+
+# bytes that belong to words: ASCII letters, digits, underscore and every byte of a non-ASCII character
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[[ord(c) for c in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_']] = True
+_WORD_BYTES[128:] = True
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple:
+    """
+    Choose (bands, rows per band) so the LSH S-curve turns at ``threshold``
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def _profile_texts(df: pd.DataFrame, columns: list) -> pd.Series:
+    parts = [df[col].fillna('').astype(str) for col in columns if col in df.columns]
+    if not parts:
+        return pd.Series([''] * len(df), index=df.index)
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + ' ' + part
+    return text.str.lower()
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """Finalizer (xor-shift multiply) so that similar inputs get unrelated hashes"""
+    with np.errstate(over='ignore'):
+        hashes = hashes ^ (hashes >> np.uint64(31))
+        hashes = hashes * _MIX
+        return hashes ^ (hashes >> np.uint64(29))
+
+
+def _token_hashes(texts) -> tuple:
+    """
+    Split texts into words and hash every word, without a Python loop over the words
+
+    The texts are encoded into one byte buffer; word boundaries come from a byte
+    lookup table and each word's polynomial hash from a single cumulative sum.
+
+    Returns:
+        Tuple of (uint64 hash per word, row of each word)
+    """
+    encoded = [text.encode('utf-8') for text in texts]
+    row_ends = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)) + 1)
+    buffer = np.frombuffer(b'\x00'.join(encoded) + b'\x00', dtype=np.uint8)
+
+    is_word = _WORD_BYTES[buffer].astype(np.int8)
+    edges = np.diff(np.concatenate([[0], is_word, [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+
+    # hash(s..e) = BASE**(e-1) * sum(byte[i] * BASE**-i) for i in [s, e), all modulo 2**64
+    with np.errstate(over='ignore'):
+        inverse_powers = np.cumprod(np.concatenate([[np.uint64(1)], np.full(len(buffer), _BASE_INVERSE)]))
+        powers = np.cumprod(np.concatenate([[np.uint64(1)], np.full(len(buffer), _BASE)]))
+        prefix = np.concatenate([[np.uint64(0)], np.cumsum(buffer.astype(np.uint64) * inverse_powers[:-1])])
+        hashes = (prefix[ends] - prefix[starts]) * powers[ends - 1]
+    return _mix(hashes), np.searchsorted(row_ends, starts, side='right')
+
+
+def _shingle_hashes(texts) -> tuple:
+    """
+    Hash the word bigrams of each text (single-word texts keep their one word)
+
+    Returns:
+        Tuple of (uint64 shingle hashes, row of each shingle)
+    """
+    token_hashes, token_rows = _token_hashes(texts)
+    if len(token_hashes) == 0:
+        return token_hashes, token_rows
+
+    # bigram i combines words i and i + 1 when both belong to the same row
+    same_row = token_rows[:-1] == token_rows[1:]
+    with np.errstate(over='ignore'):
+        bigrams = _mix(token_hashes[:-1] * _MIX + token_hashes[1:])[same_row]
+    lengths = np.bincount(token_rows, minlength=len(texts))
+    unigram_rows = np.flatnonzero(lengths == 1)
+    unigrams = token_hashes[np.searchsorted(token_rows, unigram_rows)]
+    return np.concatenate([bigrams, unigrams]), np.concatenate([token_rows[:-1][same_row], unigram_rows])
+
+
+def minhash_signatures(texts, num_perm: int = 64, chunksize: int = 20000, return_counts: bool = False):
+    """
+    MinHash signatures of the word-bigram sets of ``texts``
+
+    Uses one-permutation hashing: each shingle hash is assigned to one of
+    ``num_perm`` bins and the bin keeps the minimum, so the signature costs a
+    single pass over the shingles. Empty bins are filled from the next non-empty
+    bin (rotation densification).
+
+    Args:
+        texts: Sequence of (lowercased) profile texts
+        num_perm: Signature length
+        chunksize: Rows processed at a time (bounds memory)
+        return_counts: Also return the number of shingles of every text
+
+    Returns:
+        uint32 array of shape (len(texts), num_perm); rows without any shingle are all 0xFFFFFFFF
+        (with return_counts: tuple of that array and an int64 array of shingle counts)
+    """
+    texts = list(texts)
+    signatures = np.full((len(texts), num_perm), _MAX_HASH, dtype=np.uint32)
+    counts = np.zeros(len(texts), dtype=np.int64)
+
+    for start in range(0, len(texts), chunksize):
+        chunk = texts[start:start + chunksize]
+        shingles, rows = _shingle_hashes(chunk)
+        if len(shingles) == 0:
+            continue
+        counts[start:start + len(chunk)] = np.bincount(rows, minlength=len(chunk))
+        bins = ((shingles >> np.uint64(32)) % np.uint64(num_perm)).astype(np.int64)
+        values = (shingles & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        block = np.full(len(chunk) * num_perm, _MAX_HASH, dtype=np.uint32)
+        np.minimum.at(block, rows * num_perm + bins, values)
+        signatures[start:start + len(chunk)] = _densify(block.reshape(len(chunk), num_perm))
+    return (signatures, counts) if return_counts else signatures
+
+
+def _densify(block: np.ndarray) -> np.ndarray:
+    """
+    Fill empty bins with the value of the next non-empty bin (circularly), offset by the distance
+    """
+    empty = block == _MAX_HASH
+    rows_to_fill = empty.any(axis=1) & ~empty.all(axis=1)
+    if not rows_to_fill.any():
+        return block
+    sub = block[rows_to_fill]
+    num_perm = sub.shape[1]
+    doubled = np.concatenate([sub, sub], axis=1)
+    index = np.where(doubled != _MAX_HASH, np.arange(2 * num_perm), 2 * num_perm)
+    # index of the next non-empty bin for every position, scanning from the right
+    next_index = np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+    distance = (next_index - np.arange(num_perm)).astype(np.uint32)
+    filled = np.take_along_axis(doubled, next_index, axis=1)
+    with np.errstate(over='ignore'):
+        block[rows_to_fill] = np.where(distance > 0, filled + distance * np.uint32(0x9E3779B1), filled)
+    return block
+
+
+def _band_hashes(band: np.ndarray) -> np.ndarray:
+    hashes = np.zeros(len(band), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for col in range(band.shape[1]):
+            hashes = hashes * _MIX + band[:, col].astype(np.uint64)
+    return hashes
+
+
+def _bucket_pairs(order: np.ndarray, sorted_hash: np.ndarray, max_bucket: int) -> tuple:
+    """
+    Candidate pairs of the rows sharing a band bucket (``order`` sorted by ``sorted_hash``)
+
+    Buckets of up to ``max_bucket`` rows pair every two members. A larger bucket pairs
+    each member with the previous one and with the first one, which keeps it linear.
+    """
+    new_bucket = np.ones(len(order), dtype=bool)
+    new_bucket[1:] = sorted_hash[1:] != sorted_hash[:-1]
+    bucket = np.cumsum(new_bucket) - 1
+    small = np.bincount(bucket)[bucket] <= max_bucket
+
+    left_parts, right_parts = [], []
+    for distance in range(1, min(max_bucket, len(order))):
+        same = bucket[:-distance] == bucket[distance:]
+        if distance > 1:
+            same &= small[:-distance]
+        if not same.any():
+            break
+        left_parts.append(order[:-distance][same])
+        right_parts.append(order[distance:][same])
+    large = ~small & ~new_bucket
+    if large.any():
+        bucket_first = order[np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))]
+        left_parts.append(bucket_first[large])
+        right_parts.append(order[large])
+    if not left_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(left_parts), np.concatenate(right_parts)
+
+
+def _connected_labels(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Label every row with the smallest row position of its cluster (min-label propagation)
+    """
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        pair_min = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, left, pair_min)
+        np.minimum.at(labels, right, pair_min)
+        labels = labels[labels]  # pointer jumping
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def near_duplicate_mask(df: pd.DataFrame, columns: list = None, threshold: float = 0.8,
+                        num_perm: int = 64, min_shingles: int = None) -> np.ndarray:
+    """
+    Mask of the rows to keep after collapsing near-duplicate profiles
+
+    Args:
+        df: Input DataFrame
+        columns: Text columns compared (defaults to near_duplicate_columns)
+        threshold: Estimated Jaccard similarity above which two profiles are the same person
+        num_perm: MinHash signature length
+        min_shingles: Shingles a profile without a name needs to be compared (defaults to near_duplicate_min_shingles)
+
+    Returns:
+        Boolean numpy array, True for the first profile of each cluster, all unique profiles
+        and the profiles with neither a name nor enough text
+    """
+    columns = near_duplicate_columns if columns is None else columns
+    min_shingles = near_duplicate_min_shingles if min_shingles is None else min_shingles
+    n = len(df)
+    if n < 2:
+        return np.ones(n, dtype=bool)
+
+    signatures, counts = minhash_signatures(_profile_texts(df, columns).to_numpy(), num_perm, return_counts=True)
+    eligible = counts >= min_shingles
+    if near_duplicate_name_column in columns and near_duplicate_name_column in df.columns:
+        names = df[near_duplicate_name_column].fillna('').astype(str).str.strip()
+        eligible |= (names != '').to_numpy() & (counts > 0)
+    bands, rows = _lsh_params(threshold, num_perm)
+
+    left_parts, right_parts = [], []
+    candidates = np.flatnonzero(eligible)
+    for band in range(bands):
+        band_hash = _band_hashes(signatures[:, band * rows:(band + 1) * rows])
+        order = candidates[np.argsort(band_hash[candidates], kind='stable')]
+        left, right = _bucket_pairs(order, band_hash[order], near_duplicate_max_bucket)
+        left_parts.append(left)
+        right_parts.append(right)
+
+    left = np.concatenate(left_parts)
+    right = np.concatenate(right_parts)
+    if len(left) == 0:
+        return np.ones(n, dtype=bool)
+
+    # verify candidates with the signature agreement (estimated Jaccard similarity)
+    pairs = np.unique(np.stack([left, right], axis=1), axis=0)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs = pairs[similarity >= threshold]
+
+    labels = _connected_labels(n, pairs[:, 0], pairs[:, 1])
+    return labels == np.arange(n)
+
+
+def remove_near_duplicates(df: pd.DataFrame, columns: list = None, threshold: float = 0.8) -> pd.DataFrame:
+    """
+    Collapse near-duplicate profiles, keeping the first profile of each cluster
+
+    Args:
+        df: Input DataFrame
+        columns: Text columns compared (defaults to near_duplicate_columns)
+        threshold: Estimated Jaccard similarity above which two profiles are the same person
+
+    Returns:
+        Filtered DataFrame, original row order preserved
+    """
+    return df[near_duplicate_mask(df, columns, threshold)]
@@ -1,8 +1,31 @@
 """
 Seniority filter component - filters based on job title seniority levels
 """
+import numpy as np
 import pandas as pd
-from src.profile_filtering_system.constants import cat_a, cat_b, cat_c
+from src.profile_filtering_system.components.title_normalization import CATEGORY_LEVELS, seniority_level, title_features
+
+# level no title reaches, for rows without a known company category
+_UNREACHABLE = 127
+
+
+def match_title(title, category) -> bool:
+    return seniority_level(str(title)) >= CATEGORY_LEVELS.get(category, _UNREACHABLE)
+
+
+def seniority_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    Mask of the profiles to keep: titles senior enough for their company category
+
+    Args:
+        df: Input DataFrame with Companies Category column (and the seniority_level of the title normalization)
+
+    Returns:
+        Boolean numpy array, True for rows to keep
+    """
+    levels = df['seniority_level'] if 'seniority_level' in df.columns else title_features(df)['seniority_level']
+    required = df['Companies Category'].map(CATEGORY_LEVELS).fillna(_UNREACHABLE)
+    return levels.to_numpy(dtype=np.int16) >= required.to_numpy(dtype=np.int16)
 
 
 def seniority_filter(df: pd.DataFrame) -> pd.DataFrame:
@@ -15,15 +38,5 @@ def seniority_filter(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Filtered DataFrame
     """
-    def match_title(row):
-        t = str(row['title']).lower()
-        if row['Companies Category'] == "Category A":
-            return any(word in t for word in cat_a)
-        elif row['Companies Category'] == "Category B":
-            return any(word in t for word in cat_b)
-        elif row['Companies Category'] == "Category C":
-            return any(word in t for word in cat_c)
-        return False
-    
-    filtered_df = df[df.apply(match_title, axis=1)]
+    filtered_df = df[seniority_mask(df)]
     return filtered_df
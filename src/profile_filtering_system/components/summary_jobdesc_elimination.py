@@ -1,27 +1,44 @@
 """
 Summary and job description elimination component
 """
+import numpy as np
 import pandas as pd
-from src.profile_filtering_system.constants import profile_elimination_words, columns_list
+from src.profile_filtering_system.constants import profile_elimination_words
+from src.profile_filtering_system.utils.string_engine import contains_pattern
 
 
-def summary_jobdesc_elimination(df: pd.DataFrame) -> pd.DataFrame:
+def summary_jobdesc_mask(df: pd.DataFrame, engine: str = 'pandas') -> np.ndarray:
     """
-    Exclude profiles based on unwanted keywords in summary and titleDescription
-    
+    Mask of the profiles to keep: no unwanted keyword in summary and titleDescription
+
     Args:
         df: Input DataFrame
-        
+        engine: String engine used for the predicates ('pandas' or 'pyarrow')
+
     Returns:
-        Filtered DataFrame
+        Boolean numpy array, True for rows to keep
     """
     words_pattern = "|".join(profile_elimination_words)
     
     # Filter summary column
-    df = df[df['summary'].fillna('').str.lower().str.contains(words_pattern, na=False) == False]
+    keep = ~contains_pattern(df['summary'], words_pattern, engine)
     
     # Filter titleDescription column if exists
     if 'titleDescription' in df.columns:
-        df = df[df['titleDescription'].fillna('').str.lower().str.contains(words_pattern, na=False) == False]
+        keep &= ~contains_pattern(df['titleDescription'], words_pattern, engine)
     
-    return df
+    return keep
+
+
+def summary_jobdesc_elimination(df: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
+    """
+    Exclude profiles based on unwanted keywords in summary and titleDescription
+    
+    Args:
+        df: Input DataFrame
+        engine: String engine used for the predicates ('pandas' or 'pyarrow')
+        
+    Returns:
+        Filtered DataFrame
+    """
+    return df[summary_jobdesc_mask(df, engine)]
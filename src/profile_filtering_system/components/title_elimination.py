@@ -1,20 +1,37 @@
 """
 Title elimination component - filters out profiles based on unwanted titles
 """
+import numpy as np
 import pandas as pd
 from src.profile_filtering_system.constants import title_to_remove
+from src.profile_filtering_system.utils.string_engine import contains_pattern
 
 
-def title_elimination(df: pd.DataFrame) -> pd.DataFrame:
+def title_elimination_mask(df: pd.DataFrame, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of the profiles to keep: titles without any unwanted title word
+
+    Args:
+        df: Input DataFrame
+        engine: String engine used for the predicate ('pandas' or 'pyarrow')
+
+    Returns:
+        Boolean numpy array, True for rows to keep
+    """
+    pattern = "|".join(title_to_remove)
+    return ~contains_pattern(df['title'], pattern, engine)
+
+
+def title_elimination(df: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
     """
     Exclude profiles based on unwanted titles
     
     Args:
         df: Input DataFrame
+        engine: String engine used for the predicate ('pandas' or 'pyarrow')
         
     Returns:
         Filtered DataFrame
     """
-    pattern = "|".join(title_to_remove)
-    filtered_df = df[df['title'].fillna('').str.lower().str.contains(pattern, na=False) == False]
+    filtered_df = df[title_elimination_mask(df, engine)]
     return filtered_df
@@ -0,0 +1,95 @@
+"""
+Title normalization component - seniority level and length of every title, computed once per unique title
+"""
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.constants import (
+    cat_a, cat_b, cat_c, title_abbreviations, c_level_abbreviations, title_cache_size
+)
+
+# emojis, bullets, pipes and other separators become spaces
+_SEPARATORS = re.compile(r"[^\w&+]+")
+# C-level abbreviations without an expansion of their own
+_C_LEVEL = frozenset(c_level_abbreviations)
+
+# seniority level of a word: the number of company categories accepting it (cat_c is within cat_b within cat_a)
+SENIORITY_WORDS = {word: sum(word in words for words in (cat_a, cat_b, cat_c)) for word in cat_a}
+# an abbreviation's expansion counts like the abbreviation ("vice president" like "vp")
+SENIORITY_WORDS.update({expansion: SENIORITY_WORDS[abbreviation]
+                        for abbreviation, expansion in title_abbreviations.items() if abbreviation in SENIORITY_WORDS})
+# lowest seniority level accepted for each company category
+CATEGORY_LEVELS = {category: min(SENIORITY_WORDS[word] for word in words)
+                   for category, words in (("Category A", cat_a), ("Category B", cat_b), ("Category C", cat_c))}
+
+
+@lru_cache(maxsize=title_cache_size)
+def normalize_title(title: str) -> str:
+    """
+    Lowercase title without emojis and separators, abbreviations expanded
+
+    Args:
+        title: Raw title, e.g. "Group Head of Research 🔹 SVP"
+
+    Returns:
+        Normalized title, e.g. "group head of research senior vice president"
+    """
+    words = _SEPARATORS.sub(' ', title.lower()).split()
+    return ' '.join(title_abbreviations.get(word) or ("chief officer" if word in _C_LEVEL else word)
+                    for word in words)
+
+
+@lru_cache(maxsize=title_cache_size)
+def seniority_level(title: str) -> int:
+    """
+    Seniority level of a title: 3 (director, head, vp, chief), 2 (senior, manager), 1 (lead) or 0
+
+    Words are matched within the normalized title, so "leadership" counts as "lead"
+    """
+    normalized = normalize_title(title)
+    return max((level for word, level in SENIORITY_WORDS.items() if word in normalized), default=0)
+
+
+def title_features(df: pd.DataFrame) -> dict:
+    """
+    Seniority level and length of every title, computed once per unique title
+
+    Args:
+        df: Input DataFrame with a title column
+
+    Returns:
+        Dictionary of columns aligned to df: seniority_level (int8) and title_length (int32, len(str(title)))
+    """
+    codes, uniques = pd.factorize(df['title'])
+    uniques = uniques.astype(str)
+    levels = np.fromiter(map(seniority_level, uniques), dtype=np.int8, count=len(uniques))
+    lengths = np.fromiter(map(len, uniques), dtype=np.int32, count=len(uniques))
+    level, length = levels.take(codes), lengths.take(codes)
+    missing = codes < 0
+    if missing.any():
+        # str() of the missing titles, as the row-wise code saw them
+        values = df['title'].to_numpy()[missing]
+        level[missing] = [seniority_level(str(value)) for value in values]
+        length[missing] = [len(str(value)) for value in values]
+    return {
+        'seniority_level': pd.Series(level, index=df.index),
+        'title_length': pd.Series(length, index=df.index),
+    }
+
+
+# columns added by the title normalization for the later stages, not part of the exported shortlist
+TITLE_FEATURE_COLUMNS = ['seniority_level', 'title_length']
+
+
+def title_normalization(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the seniority_level and title_length columns read by the seniority filter and the AI ranking
+
+    Args:
+        df: Input DataFrame with a title column
+
+    Returns:
+        DataFrame with seniority_level and title_length columns added
+    """
+    return df.assign(**title_features(df))
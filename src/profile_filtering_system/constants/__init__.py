@@ -61,16 +61,163 @@ cat_a = ["director", "head", "vp", "senior", "manager", "lead", "chief"]
 cat_b = ["director", "head", "vp", "senior", "manager", "chief"]
 cat_c = ["director", "head", "vp", "chief"]
 
+# title abbreviations expanded by the title normalization
+# ("md" and "gm" are not: "Pediatrician MD" is a physician, not a managing director)
+title_abbreviations = {
+    "vp": "vice president", "svp": "senior vice president", "evp": "executive vice president",
+    "avp": "assistant vice president", "sr": "senior", "snr": "senior", "mgr": "manager", "dir": "director",
+    "ceo": "chief executive officer", "coo": "chief operating officer", "cfo": "chief financial officer",
+    "cto": "chief technology officer", "cio": "chief information officer", "cdo": "chief digital officer",
+    "cmo": "chief marketing officer", "cpo": "chief product officer", "cso": "chief strategy officer",
+    "chro": "chief human resources officer", "cino": "chief innovation officer",
+}
+
+# other C-level abbreviations, normalized to "chief officer" (an explicit list: "cisco" or "cargo" are not titles)
+c_level_abbreviations = [
+    "cxo", "cao", "caio", "cbo", "cco", "ccxo", "cdao", "cdio", "cdto", "ceno", "cgo", "chco", "cho", "ciso",
+    "cko", "clo", "cnio", "cno", "cqo", "cro", "csco", "csmo", "csuo", "cvo", "cwo",
+]
+
+# entries of the process-wide cache of normalized titles (see components/title_normalization.py)
+title_cache_size = 100000
+
 # list of columns for elimination of keywords
 columns_list= ['summary', 'titleDescription']
 
+# columns read by the filtering stages; every other column of an export is only joined back for the survivors
+pipeline_columns = ['title', 'titleDescription', 'summary', 'companyName', 'location', 'companyLocation', 'description']
+
+# name of the row id (position in the uploaded file) carried by the narrow projection
+row_id_column = '_row_id'
+
+# identity columns used to detect the same person across overlapping exports, in priority order
+dedup_key_columns = ['profileUrl', 'vmid', 'linkedInProfileUrl']
+
+# text compared to find the same person under different lead URLs (name + company + summary)
+near_duplicate_columns = ['fullName', 'companyName', 'summary']
+
+# near-duplicate eligibility: a profile needs a name or this many shingles (word bigrams) to be collapsed,
+# otherwise different people of one company with empty summaries would look identical
+near_duplicate_name_column = 'fullName'
+near_duplicate_min_shingles = 8
+
+# LSH buckets up to this size compare every pair of members; larger buckets compare neighbours and the first member
+near_duplicate_max_bucket = 64
+
+# AI ranking weights - points per component of the AI score (higher score = better candidate)
+ai_score_weights = {
+    # keyword criteria flags (40% of total score)
+    'criteria': {'criteria_a_passed': 15, 'criteria_b_passed': 12, 'criteria_c_passed': 8},
+    # company category (25% of total score)
+    'company_category': {'Category A': 12, 'Category B': 8, 'Category C': 4},
+    # content quality (35% of total score): min(max_points, length // divisor) once length > min_length
+    'title_length': {'min_length': 10, 'divisor': 5, 'max_points': 8},
+    'summary_length': {'min_length': 50, 'divisor': 25, 'max_points': 12},
+    # bonus per keyword criteria passed
+    'criteria_count_bonus': 3,
+}
+
+# share of the filtered profiles recommended by the AI ranking
+top_profiles_fraction = 0.25
+
 # paths for the datasets
 companies_to_remove= Path('data/companies to remove.xlsx')
 companies_a= Path('data/companies_a.csv')
 companies_b= Path('data/companies_b.csv')
 
+# local profile store (SQLite + FTS5) accumulating uploaded exports across events
+profile_store_path = Path('data/profile_store.sqlite')
+
+# token id sets of profile texts, reused by the keyword criteria of every run
+token_cache_path = Path('data/token_cache.npz')
+
+# memory cap of the process-wide cache of parsed uploads (least recently used files are evicted first)
+upload_cache_max_bytes = 2 * 1024 ** 3
+
+# Parquet copies of parsed Excel sheets, keyed by the workbook's content hash (see utils/excel.py)
+excel_cache_dir = Path('data/excel_cache')
+
+# run directories with the checkpoints of pipeline runs (shortlist + reasons), used to resume interrupted runs
+runs_dir = Path('data/runs')
+
+# batch directories of the distributed batch mode (see utils/batch_queue.py): shard files, leases and shard results
+batches_dir = Path('data/batches')
+
+# distributed batch mode: rows per shard file, lease expiry and heartbeat of the workers, attempts before a shard fails
+batch_queue_settings = {
+    'shard_rows': 100000,
+    'lease_seconds': 120.0,
+    'heartbeat_seconds': 15.0,
+    'max_attempts': 3,
+    # idle workers look for expired leases this often until every shard is finished
+    'poll_seconds': 2.0,
+}
+
+# OpenAI rate limits and retry policy shared by every LLM call of the process (see utils/llm_scheduler.py)
+llm_rate_limits = {
+    'requests_per_minute': 500,
+    'tokens_per_minute': 200000,
+    # adaptive (AIMD) concurrency: starts at initial, never leaves [min, max]
+    'initial_concurrency': 4,
+    'min_concurrency': 1,
+    'max_concurrency': 16,
+    # calls slower than this count as congestion and shrink the concurrency
+    'target_latency_seconds': 20.0,
+    'max_retries': 6,
+    'base_delay_seconds': 1.0,
+    'max_delay_seconds': 60.0,
+    # completion tokens reserved per call before the real usage is known
+    'expected_output_tokens': 300,
+}
+
+# background pipeline runs (see utils/jobs.py): runs executed at the same time, finished runs kept for the UI,
+# run directories (checkpoint and saved upload) kept in runs_dir
+background_jobs = {
+    'max_concurrent_jobs': 2,
+    'max_finished_jobs': 20,
+    'max_run_dirs': 20,
+}
+
+# estimated tokens of the profile block in the reason prompt (the summary is trimmed to fit)
+reason_prompt_token_budget = 200
+
+# dry runs (ProfilesFiltering.dry_run): stages 0-8 on a stratified sample, split into replicates for the runtime intervals
+dry_run_settings = {
+    'sample_size': 2000,
+    'replicates': 4,
+    # strata are the most common countries of the profile locations, the rest form one stratum
+    'max_strata': 20,
+    'confidence': 0.95,
+    # prompts built to measure the reason prompt size
+    'max_prompt_samples': 300,
+}
+
+# price and typical latency of a reason call (ChatOpenAI default model), for the stage 9 estimate
+llm_cost_estimate = {
+    'model': 'gpt-3.5-turbo',
+    'input_usd_per_million_tokens': 0.50,
+    'output_usd_per_million_tokens': 1.50,
+    'seconds_per_call': 4.0,
+}
+
+# rows per chunk of the row-wise pipeline stages (progress is reported and cancellation checked between chunks)
+pipeline_chunksize = 50000
+
+# rejection reason bits of the mask evaluation (ProfilesFiltering(evaluation='mask')), one per filtering stage
+rejection_reason_bits = {
+    'deduplication': 1 << 0,
+    'near_deduplication': 1 << 1,
+    'title_elimination': 1 << 2,
+    'summary_jobdesc_elimination': 1 << 3,
+    'company_exclusion': 1 << 4,
+    'english_only': 1 << 5,
+    'location_filter': 1 << 6,
+    'seniority_filter': 1 << 7,
+    'keyword_matching': 1 << 8,
+}
+
 # List of generic words to exclude from keyword extraction
 GENERIC_WORDS = {
     "business", "organization", "organizational", "culture", "capabilities",
     "process", "system", "management", "operations", "building"
-}
\ No newline at end of file
+}
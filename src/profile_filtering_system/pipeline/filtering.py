@@ -1,15 +1,304 @@
+import copy
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import numpy as np
 import pandas as pd
-from src.profile_filtering_system.components.title_elimination import title_elimination
-from src.profile_filtering_system.components.summary_jobdesc_elimination import summary_jobdesc_elimination
-from src.profile_filtering_system.components.company_exclusion import company_exclusion
-from src.profile_filtering_system.components.english_only import english_only
-from src.profile_filtering_system.components.location_filter import location_filter
-from src.profile_filtering_system.components.company_category import company_category
-from src.profile_filtering_system.components.seniority_filter import seniority_filter
+from src.profile_filtering_system.components.deduplication import duplicate_mask
+from src.profile_filtering_system.components.near_duplicates import near_duplicate_mask
+from src.profile_filtering_system.components.title_elimination import title_elimination, title_elimination_mask
+from src.profile_filtering_system.components.summary_jobdesc_elimination import summary_jobdesc_elimination, summary_jobdesc_mask
+from src.profile_filtering_system.components.company_exclusion import company_exclusion, company_exclusion_mask
+from src.profile_filtering_system.components.english_only import (
+    english_only, english_only_mask, load_language_detector, DETECTORS
+)
+from src.profile_filtering_system.components.location_filter import location_filter, location_mask, company_locations
+from src.profile_filtering_system.components.company_category import company_category, company_categories
+from src.profile_filtering_system.components.title_normalization import title_normalization, title_features
+from src.profile_filtering_system.components.seniority_filter import seniority_filter, seniority_mask
 from src.profile_filtering_system.components.keyword_extraction import extract_classified_keywords, extract_profile_keywords
-from src.profile_filtering_system.components.keyword_matching import keyword_match_classified, keyword_match
-from src.profile_filtering_system.components.llm_reason import generate_llm_reason
-from src.profile_filtering_system.utils.common import return_if_empty
+from src.profile_filtering_system.components.keyword_matching import classified_keyword_criteria, criteria_labels, keyword_match
+from src.profile_filtering_system.components.llm_reason import generate_llm_reason, LazyReasons
+from src.profile_filtering_system.components.ai_ranking import calculate_ai_scores, top_k_positions
+from src.profile_filtering_system.pipeline.stages import Stage, StageGraph, check_cancelled
+from src.profile_filtering_system.utils.common import return_if_empty, project_columns, materialize_columns
+from src.profile_filtering_system.utils.string_engine import check_engine, to_object_strings
+from src.profile_filtering_system.utils.token_cache import TokenCache, default_token_cache
+from src.profile_filtering_system.utils.prompt_builder import prompt_token_stats, build_reason_prompt
+from src.profile_filtering_system.utils.checkpoint import RunCheckpoint
+from src.profile_filtering_system.utils.llm_scheduler import estimate_tokens
+from src.profile_filtering_system.utils.dry_run import (
+    profile_strata, stratified_sample, stratified_proportion, mean_interval, estimate_reason_stage
+)
+from src.profile_filtering_system.constants import dry_run_settings, pipeline_chunksize, rejection_reason_bits
+
+REASON_ORDERS = ('input', 'score')
+EVALUATIONS = ('frame', 'mask')
+
+
+
+def process_context():
+    """
+    Start method of the worker processes (sharded runs, predicate processes): a fork server, or spawn
+    where there is none. Never a plain fork: runs start from background job threads, and the other
+    threads of the app (jobs, LLM scheduler, caches, logging) may hold locks a forked child inherits
+    locked. Workers get their inputs pickled and import the package themselves.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # the server imports the pipeline once; each worker forked from it starts with the modules loaded
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+# worker pool of the sharded runs, started by the first one and reused by the next ones (see shard_pool)
+_shard_pool = None
+_shard_pool_workers = 0
+_shard_pool_lock = threading.Lock()
+# in a shard worker: (run id, pipeline, stages, inputs) of the run it last loaded
+_worker_run = None
+
+
+def shard_pool(workers: int) -> ProcessPoolExecutor:
+    """Process-wide pool of shard workers, started once and replaced only by a larger (or broken) one"""
+    global _shard_pool, _shard_pool_workers
+    with _shard_pool_lock:
+        if _shard_pool is None or _shard_pool_workers < workers:
+            if _shard_pool is not None:
+                _shard_pool.shutdown(wait=False)
+            _shard_pool = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+            _shard_pool_workers = workers
+        return _shard_pool
+
+
+def _discard_shard_pool(pool: ProcessPoolExecutor) -> None:
+    # a worker died: the next sharded run starts a new pool
+    global _shard_pool, _shard_pool_workers
+    with _shard_pool_lock:
+        if _shard_pool is pool:
+            _shard_pool, _shard_pool_workers = None, 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def criteria_passed_text(row) -> str:
+    """Criteria a shortlisted profile passed, as described in its reason prompt"""
+    criteria = []
+    if row.get('title', ''):
+        criteria.append('Has valid title')
+    if row.get('summary', ''):
+        criteria.append('Has summary')
+    if row.get('Companies Category', ''):
+        criteria.append(f"Company category: {row.get('Companies Category')}")
+    if hasattr(row, 'keyword_criteria_passed') and row['keyword_criteria_passed'] != 'None':
+        criteria.append(f"Keyword criteria: {row['keyword_criteria_passed']}")
+    return ', '.join(criteria)
+
+
+def criteria_passed_column(df: pd.DataFrame) -> pd.Series:
+    """
+    criteria_passed_text of every row, vectorized: the rows are grouped by their combination of
+    criteria (title, summary, category, keyword criteria) and each combination is described once
+    """
+    missing = pd.Series(False, index=df.index)
+
+    def truthy(col):
+        # the truthiness row.get() gives (NaN counts as a value, '' and None do not)
+        return df[col].astype(object).astype(bool) if col in df.columns else missing
+
+    def text(col, described):
+        # values as the f-strings format them, blanked where the criterion is not described
+        return df[col].astype(str).where(described, '') if col in df.columns else ''
+
+    has_category = truthy('Companies Category')
+    has_keyword = df['keyword_criteria_passed'] != 'None' if 'keyword_criteria_passed' in df.columns else missing
+    combinations = pd.DataFrame({'title': truthy('title'), 'summary': truthy('summary'),
+                                 'has_category': has_category, 'category': text('Companies Category', has_category),
+                                 'has_keyword': has_keyword, 'keyword': text('keyword_criteria_passed', has_keyword)},
+                                index=df.index)
+    codes, uniques = pd.MultiIndex.from_frame(combinations).factorize()
+    texts = []
+    for has_title, has_summary, has_category, category, has_keyword, keyword in uniques:
+        criteria = []
+        if has_title:
+            criteria.append('Has valid title')
+        if has_summary:
+            criteria.append('Has summary')
+        if has_category:
+            criteria.append(f"Company category: {category}")
+        if has_keyword:
+            criteria.append(f"Keyword criteria: {keyword}")
+        texts.append(', '.join(criteria))
+    return pd.Series(np.asarray(texts, dtype=object)[codes], index=df.index, dtype=object)
+
+
+def predicate_result(result) -> tuple:
+    """A predicate's return value as (keep mask or None, dict of added columns)"""
+    return result if isinstance(result, tuple) else (result, {})
+
+
+def combine_predicate_results(results: list) -> tuple:
+    """The (keep, columns) of consecutive chunks of rows, as one (keep, columns) over all of them"""
+    keeps, columns = [], {}
+    for keep, added in results:
+        keeps.append(keep)
+        for name, values in added.items():
+            columns.setdefault(name, []).append(values)
+    keep = None if keeps[0] is None else np.concatenate(keeps)
+    return keep, {name: pd.concat(parts) for name, parts in columns.items()}
+
+
+def exact_duplicates_mask(df, full_df, dedup_keys=None, dedup_keep='first'):
+    """Stage 0 predicate: rows of the narrow frame kept by exact duplicate removal (identity keys of the full rows)"""
+    rows = full_df if len(df) == len(full_df) else full_df.iloc[df.index]
+    return duplicate_mask(rows, dedup_keys, dedup_keep)
+
+
+def exact_duplicates(df, full_df, dedup_keys=None, dedup_keep='first'):
+    """Stage 0: rows left after exact duplicate removal"""
+    return df[exact_duplicates_mask(df, full_df, dedup_keys, dedup_keep)]
+
+
+def near_duplicates_mask(df, full_df, threshold=0.8):
+    """Stage 0b predicate: rows kept by collapsing near duplicates (similar name + company + summary)"""
+    return near_duplicate_mask(full_df.iloc[df.index], threshold=threshold)
+
+
+def near_duplicates(df, full_df, threshold=0.8):
+    """Stage 0b: rows left after collapsing near duplicates"""
+    return df[near_duplicates_mask(df, full_df, threshold)]
+
+
+def location_predicate(df, event_location, additional_countries, engine):
+    """Stage 5 predicate: the location mask and the lowercased companyLocation the stage leaves behind"""
+    locations = company_locations(df, engine)
+    return location_mask(locations, event_location, additional_countries, engine), {'companyLocation': locations}
+
+
+def category_predicate(df, companies_a, companies_b):
+    """Stage 6 predicate: no row is rejected, the category column is added"""
+    return None, {'Companies Category': company_categories(df, companies_a, companies_b)}
+
+
+def language_setup(language_detector):
+    """Language profiles loaded once before the English filter runs"""
+    load_language_detector(language_detector)
+    return {}
+
+
+def title_predicate(df):
+    """Title normalization predicate: no row is rejected, the seniority level and title length columns are added"""
+    return None, title_features(df)
+
+
+def keyword_setup(topic, sub_topic, use_classified_keywords, token_cache, verbose):
+    """Keywords of the event, extracted once before the keyword stage runs on its chunks"""
+    if not use_classified_keywords:
+        keywords = extract_profile_keywords(topic, sub_topic)
+        if verbose: print(f"Legacy Keywords: {keywords}")
+        return {'class_a_keywords': [], 'class_b_keywords': [], 'reason_keywords': keywords}
+    classified_keywords = extract_classified_keywords(topic, sub_topic)
+    class_a_keywords = classified_keywords['class_a']
+    class_b_keywords = classified_keywords['class_b']
+    if verbose:
+        print(f"Class A Keywords (from '{topic}'): {class_a_keywords}")
+        print(f"Class B Keywords (from '{sub_topic}'): {class_b_keywords}")
+    return {
+        'class_a_keywords': class_a_keywords,
+        'class_b_keywords': class_b_keywords,
+        'reason_keywords': class_a_keywords + class_b_keywords,
+        # token sets of texts seen in earlier runs are not tokenized again
+        'token_cache': token_cache if token_cache is not None else default_token_cache(),
+    }
+
+
+def keyword_predicate(df, use_classified_keywords, class_a_keywords, class_b_keywords, reason_keywords, token_cache):
+    """Stage 8 predicate: profiles passing at least one keyword criterion and the criteria columns"""
+    if not use_classified_keywords:
+        keep = np.fromiter((keyword_match(row, reason_keywords) for _, row in df.iterrows()), dtype=bool, count=len(df))
+        return keep, {'keyword_criteria_passed': pd.Series('Legacy keyword matching', index=df.index)}
+    criteria = classified_keyword_criteria(df, class_a_keywords, class_b_keywords, token_cache)
+    return criteria['passes'].to_numpy(dtype=bool), {
+        'keyword_criteria_passed': criteria_labels(criteria),
+        'criteria_a_passed': criteria['criteria_a'],
+        'criteria_b_passed': criteria['criteria_b'],
+        'criteria_c_passed': criteria['criteria_c'],
+    }
+
+
+def keyword_criteria(df, use_classified_keywords, class_a_keywords, class_b_keywords, reason_keywords, token_cache):
+    """Stage 8: profiles passing at least one keyword criterion, with the criteria they passed"""
+    keep, columns = keyword_predicate(df, use_classified_keywords, class_a_keywords, class_b_keywords,
+                                      reason_keywords, token_cache)
+    df = df[keep].copy()
+    for name, values in columns.items():
+        df[name] = values[keep]
+    return df
+
+
+# Stages 0-8 of a run; the inputs named in args are built by ProfilesFiltering.shortlist
+PIPELINE_STAGES = StageGraph([
+    Stage('deduplication', exact_duplicates, args=('full_df', 'dedup_keys', 'dedup_keep'),
+          label='Duplicate Removal', switch='deduplicate', removed_as='duplicates_removed',
+          predicate=exact_duplicates_mask),
+    Stage('near_deduplication', near_duplicates, args=('full_df', 'near_duplicate_threshold'),
+          label='Near-Duplicate Removal', switch='near_duplicates', removed_as='duplicates_removed',
+          predicate=near_duplicates_mask),
+    Stage('title_elimination', title_elimination, args=('engine',), label='Title Elimination', chunked=True,
+          predicate=title_elimination_mask, every_row=True, parallel=True),
+    Stage('summary_jobdesc_elimination', summary_jobdesc_elimination, args=('engine',),
+          label='Summary & Job Description Filter', chunked=True, predicate=summary_jobdesc_mask, every_row=True,
+          parallel=True),
+    Stage('company_exclusion', company_exclusion, args=('companies_to_remove', 'engine'),
+          label='Company Exclusion', chunked=True, predicate=company_exclusion_mask, every_row=True,
+          parallel=True),
+    Stage('english_only', english_only, args=('language_detector',), label='English Language Filter', chunked=True,
+          predicate=english_only_mask, parallel=True, gil_bound=True,
+          setup=language_setup, setup_args=('language_detector',)),
+    Stage('location_filter', location_filter, args=('event_location', 'additional_countries', 'engine'),
+          label='Location Filter', chunked=True, predicate=location_predicate, every_row=True,
+          parallel=True),
+    Stage('company_category', company_category, args=('companies_a', 'companies_b'),
+          label='Company Category Assignment', chunked=True, object_strings=True, predicate=category_predicate),
+    Stage('title_normalization', title_normalization, label='Title Normalization', chunked=True,
+          predicate=title_predicate),
+    Stage('seniority_filter', seniority_filter, after=('company_category', 'title_normalization'),
+          label='Seniority Filter', chunked=True, object_strings=True, predicate=seniority_mask),
+    Stage('keyword_matching', keyword_criteria,
+          args=('use_classified_keywords', 'class_a_keywords', 'class_b_keywords', 'reason_keywords', 'token_cache'),
+          label='Classified Keyword Matching', chunked=True, object_strings=True, predicate=keyword_predicate,
+          setup=keyword_setup, setup_args=('topic', 'sub_topic', 'use_classified_keywords', 'token_cache', 'verbose')),
+])
+
+
+def _run_shard(run_id, references_path, df, rejections):
+    """
+    Worker process of a sharded run: one partition. The run's references (settings, stages, company
+    lists, keywords, token cache) are read from ``references_path`` by the first partition of the run
+    this worker gets, and kept for the next ones; only the rows travel with each task.
+    """
+    global _worker_run
+    if _worker_run is None or _worker_run[0] != run_id:
+        # the references of an earlier run are released first
+        _worker_run = None
+        with open(references_path, 'rb') as f:
+            _worker_run = (run_id, *pickle.load(f))
+    _, pipeline, stages, inputs = _worker_run
+    token_cache = inputs.get('token_cache')
+    if token_cache is not None:
+        token_cache.record_additions()
+    df, rejections, metrics = pipeline._shard(stages, df, inputs, rejections)
+    # the texts this partition tokenized go back to the run's cache
+    return df, rejections, metrics, None if token_cache is None else token_cache.additions()
+
 
 class ProfilesFiltering:
     def __init__(self, topic, sub_topic, event_location=None, additional_countries=None, **kwargs):
@@ -19,118 +308,753 @@ class ProfilesFiltering:
         self.additional_countries = additional_countries or []
         # Handle use_classified_keywords parameter (default to True)
         self.use_classified_keywords = kwargs.get('use_classified_keywords', True)
+        # String engine for stages 1-5: 'pandas' (object dtype .str methods) or 'pyarrow' (Arrow compute kernels)
+        self.engine = check_engine(kwargs.get('engine', 'pandas'))
+        # English filter detector: 'langdetect' or 'builtin' (n-gram tables shipped with the package, ~10x faster);
+        # they agree on the summaries of the sample exports, 'builtin' keeps the short headlines that are a near tie
+        # with another language (e.g. "Data scientist | ML | Python"), where langdetect's answer is random
+        self.language_detector = kwargs.get('language_detector', 'langdetect')
+        if self.language_detector not in DETECTORS:
+            raise ValueError(f"Unknown language detector '{self.language_detector}', expected one of {DETECTORS}")
+        # Exact duplicate removal at pipeline entry (identity columns in priority order, keep 'first' or 'richest')
+        self.deduplicate = kwargs.get('deduplicate', True)
+        self.dedup_keys = kwargs.get('dedup_keys', None)
+        self.dedup_keep = kwargs.get('dedup_keep', 'first')
+        # Near-duplicate collapsing (same person under different lead URLs), MinHash similarity threshold
+        self.near_duplicates = kwargs.get('near_duplicates', True)
+        self.near_duplicate_threshold = kwargs.get('near_duplicate_threshold', 0.8)
+        # Token sets of profile texts for keyword matching (persisted between runs unless disabled)
+        self.token_cache = kwargs.get('token_cache', None)
+        self.persist_token_cache = kwargs.get('persist_token_cache', True)
+        # Lazy mode: llm_reason is left empty and generated on demand through self.reasons
+        self.lazy_reasons = kwargs.get('lazy_reasons', False)
+        # Compact reason prompts: empty fields dropped, summary trimmed to keyword sentences within a token budget
+        self.compact_prompts = kwargs.get('compact_prompts', True)
+        # Reason function with the signature of generate_llm_reason (defaults to it)
+        self.reason_generator = kwargs.get('reason_generator', None)
+        # Reasons generated at the same time (LLM calls in flight), and their order: 'input' or 'score' (best AI score first)
+        self.reason_concurrency = kwargs.get('reason_concurrency', 1)
+        self.reason_order = kwargs.get('reason_order', 'input')
+        if self.reason_order not in REASON_ORDERS:
+            raise ValueError(f"Unknown reason order '{self.reason_order}', expected one of {REASON_ORDERS}")
+        # Progress hooks (used by background jobs): each stage metric as it is recorded, and (done, total) of the reasons
+        self.stage_callback = kwargs.get('stage_callback', None)
+        self.reason_progress_callback = kwargs.get('reason_progress_callback', None)
+        # (stage, done, total) after each chunk of a chunked stage and each reason
+        self.progress_callback = kwargs.get('progress_callback', None)
+        # Live results: (row, reason) as each reason is finished, (row, text so far) while it is written (one call at a time)
+        self.reason_callback = kwargs.get('reason_callback', None)
+        self.reason_text_callback = kwargs.get('reason_text_callback', None)
+        # threading.Event: once set, the run raises RunCancelled at the next chunk or after the LLM calls in flight
+        self.cancel_event = kwargs.get('cancel_event', None)
+        # Stage graph, rows per chunk of the chunked stages, and per-stage options ({stage: {'enabled', 'chunksize'}})
+        self.stages = kwargs.get('stages', PIPELINE_STAGES)
+        self.chunksize = kwargs.get('chunksize', pipeline_chunksize)
+        self.stage_options = kwargs.get('stage_options', None) or {}
+        # Stage evaluation: 'frame' (each stage filters a frame) or 'mask' (boolean masks over one row index,
+        # survivors selected once, rejection reason bits per uploaded row in self.rejections)
+        self.evaluation = kwargs.get('evaluation', 'frame')
+        if self.evaluation not in EVALUATIONS:
+            raise ValueError(f"Unknown evaluation '{self.evaluation}', expected one of {EVALUATIONS}")
+        # Mask evaluation: threads evaluating the independent predicates (stages 1-5) at the same time, and a process
+        # pool of as many workers for the GIL-bound ones (langdetect); 1 evaluates the predicates in turn
+        self.predicate_workers = kwargs.get('predicate_workers', 1)
+        self.predicate_processes = kwargs.get('predicate_processes', False)
+        if self.predicate_workers > 1 and self.evaluation != 'mask':
+            raise ValueError("predicate_workers > 1 needs evaluation='mask'")
+        # Sharded mode: after deduplication the rows are split into this many partitions, and the row-local stages
+        # run on them in worker processes (see process_context: stage functions and their inputs must be picklable,
+        # i.e. module-level functions, and a script starting a sharded run needs an `if __name__ == "__main__":`
+        # guard, since the workers import it); 1 runs in-process
+        self.shards = kwargs.get('shards', 1)
+        unknown = [name for name in self.stage_options if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Options for unknown stages: {unknown}")
+        # Run directory (or run id) for checkpoints: the shortlist and every reason are saved as they are produced
+        checkpoint_dir = kwargs.get('checkpoint_dir', None)
+        self.checkpoint = RunCheckpoint(checkpoint_dir) if checkpoint_dir is not None else None
+        self.reasons = None
+        # uint16 rejection reason bits (rejection_reason_bits) per uploaded row of the last mask evaluation
+        self.rejections = None
+        # Class A + B (or legacy) keywords of the last shortlist, used by the reason prompts
+        self.reason_keywords = None
+        self.classified_keywords = None
+        # Per-stage row counts and timings of the last filter() call
+        self.stage_metrics = []
+        self._stage_rows = None
+
+    def _record_stage(self, stage, rows_in, rows_out, started, rows=None, **extra):
+        if self._stage_rows is not None and rows is not None:
+            # dry runs: the index of the rows that passed the stage
+            self._stage_rows[stage] = rows
+        self.stage_metrics.append({
+            'stage': stage,
+            'rows_in': rows_in,
+            'rows_out': rows_out,
+            'seconds': round(time.perf_counter() - started, 4),
+            **extra
+        })
+        if self.stage_callback is not None:
+            self.stage_callback(self.stage_metrics[-1])
+
+    def _progress(self, stage, done, total):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, done, total)
+        if stage == 'llm_reason' and self.reason_progress_callback is not None:
+            self.reason_progress_callback(done, total)
+
+    def _stage_enabled(self, stage):
+        options = self.stage_options.get(stage.name, {})
+        if 'enabled' in options:
+            return bool(options['enabled'])
+        return stage.switch is None or bool(getattr(self, stage.switch))
+
+    def planned_stages(self):
+        """The stages 0-8 a run executes, in order (per the stage graph and the stage options)"""
+        return self.stages.plan(self._stage_enabled)
+
+    def _run_stage(self, stage, df, inputs):
+        check_cancelled(self.cancel_event)
+        if stage.setup is not None:
+            inputs.update(stage.setup(*[inputs[name] for name in stage.setup_args]))
+        started, rows_in = time.perf_counter(), len(df)
+        args = [inputs[name] for name in stage.args]
+        chunksize = self.stage_options.get(stage.name, {}).get('chunksize', self.chunksize)
+        if stage.chunked and chunksize and len(df) > chunksize:
+            parts = []
+            for start in range(0, len(df), chunksize):
+                check_cancelled(self.cancel_event)
+                parts.append(stage.func(df.iloc[start:start + chunksize], *args))
+                self._progress(stage.name, min(start + chunksize, len(df)), len(df))
+            # empty chunks are left out of the concat (their columns can have other dtypes)
+            kept = [part for part in parts if len(part)]
+            df = pd.concat(kept) if kept else parts[0]
+        else:
+            df = stage.func(df, *args)
+        extra = {stage.removed_as: rows_in - len(df)} if stage.removed_as else {}
+        self._record_stage(stage.name, rows_in, len(df), started, rows=df.index, **extra)
+        return df
+
+    def _predicate_chunks(self, stage, df, args):
+        # the predicate over the rows of df, a chunk at a time for chunked stages: (keep mask or None, added columns)
+        chunksize = self.stage_options.get(stage.name, {}).get('chunksize', self.chunksize)
+        if not (stage.chunked and chunksize and len(df) > chunksize):
+            return predicate_result(stage.predicate(df, *args))
+        results = []
+        for start in range(0, len(df), chunksize):
+            check_cancelled(self.cancel_event)
+            results.append(predicate_result(stage.predicate(df.iloc[start:start + chunksize], *args)))
+            self._progress(stage.name, min(start + chunksize, len(df)), len(df))
+        return combine_predicate_results(results)
+
+    def _predicate_batches(self, stages):
+        # consecutive parallel stages form one batch when predicates are evaluated by several workers
+        batches = []
+        for stage in stages:
+            if self.predicate_workers > 1 and stage.parallel and batches and batches[-1][-1].parallel:
+                batches[-1].append(stage)
+            else:
+                batches.append([stage])
+        return batches
+
+    def _parallel_predicates(self, batch, df, inputs):
+        """
+        The predicates of a batch of independent stages, evaluated at the same time on every row:
+        one thread per stage, GIL-bound predicates split over a process pool when it is enabled.
+        Returns ((keep, columns), seconds) per stage.
+        """
+        workers = self.predicate_workers
+        processes = ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) if self.predicate_processes and any(
+            stage.gil_bound for stage in batch) else nullcontext()
+
+        def evaluate(stage, pool):
+            started, args = time.perf_counter(), [inputs[name] for name in stage.args]
+            if pool is None or not stage.gil_bound or len(df) < workers:
+                result = predicate_result(stage.predicate(df, *args))
+            else:
+                bounds = np.linspace(0, len(df), workers + 1, dtype=int)
+                chunks = [pool.submit(stage.predicate, df.iloc[start:end], *args) for start, end in zip(bounds, bounds[1:])]
+                result = combine_predicate_results([predicate_result(chunk.result()) for chunk in chunks])
+            return result, time.perf_counter() - started
+
+        with processes as pool, ThreadPoolExecutor(max_workers=min(workers, len(batch))) as threads:
+            futures = [threads.submit(evaluate, stage, pool) for stage in batch]
+            results = []
+            for stage, future in zip(batch, futures):
+                results.append(future.result())
+                # progress is reported from the calling thread, where the caller's callbacks may run
+                self._progress(stage.name, len(df), len(df))
+            return results
+
+    def _evaluate_masks(self, stages, df, inputs, verbose, rejections=None):
+        """
+        Mask evaluation of the planned stages: each predicate gives a boolean mask over the rows
+        of ``df``, a rejected row gets the stage's bit, and the survivors are selected once.
+        Cheap ``every_row`` predicates are evaluated on all rows, so every reason they find is
+        recorded; the other predicates only see the rows still alive. With several predicate
+        workers, each run of consecutive ``parallel`` stages is evaluated at the same time on
+        all rows and the masks are combined in stage order.
+
+        Returns the survivors and the rejection codes of every row of ``df`` (starting from
+        ``rejections``, the codes of earlier stages, when given).
+        """
+        df = df.copy(deep=False)
+        rejections = np.zeros(len(df), dtype=np.uint16) if rejections is None else rejections.copy()
+        alive = rejections == 0
+        added = {}
+        object_strings = False
+        for batch in self._predicate_batches(stages):
+            check_cancelled(self.cancel_event)
+            if len(batch) > 1:
+                for stage in batch:
+                    if stage.setup is not None:
+                        inputs.update(stage.setup(*[inputs[name] for name in stage.setup_args]))
+                results = self._parallel_predicates(batch, df, inputs)
+                evaluated = [np.arange(len(df))] * len(batch)
+            else:
+                stage = batch[0]
+                if stage.setup is not None:
+                    inputs.update(stage.setup(*[inputs[name] for name in stage.setup_args]))
+                if stage.object_strings and not object_strings:
+                    df, object_strings = to_object_strings(df), True
+                started = time.perf_counter()
+                rows = np.arange(len(df)) if stage.every_row else np.flatnonzero(alive)
+                result = self._predicate_chunks(stage, df if len(rows) == len(df) else df.iloc[rows],
+                                                [inputs[name] for name in stage.args])
+                results, evaluated = [(result, time.perf_counter() - started)], [rows]
+            for stage, rows, ((keep, columns), seconds) in zip(batch, evaluated, results):
+                rows_in = int(alive.sum())
+                for name, values in columns.items():
+                    if len(rows) == len(df):
+                        df[name] = values
+                    else:
+                        # a column of the rows still alive: the others are never selected
+                        if name not in df.columns:
+                            df[name] = pd.Series(None, index=df.index, dtype=object)
+                            added[name] = values.dtype
+                        df.iloc[rows, df.columns.get_loc(name)] = values.to_numpy(dtype=object)
+                if keep is not None:
+                    rejected = rows[~keep]
+                    rejections[rejected] |= rejection_reason_bits[stage.name]
+                    alive[rejected] = False
+                rows_out = int(alive.sum())
+                extra = {stage.removed_as: rows_in - rows_out} if stage.removed_as else {}
+                # the seconds the stage's own predicate took, also when it ran next to others
+                self._record_stage(stage.name, rows_in, rows_out, time.perf_counter() - seconds,
+                                   rows=df.index[alive], **extra)
+                if verbose: print(f"After {stage.name.replace('_', ' ')}: {rows_out} rows")
+            if rows_out == 0:
+                break
+        return df[alive].astype(added), rejections
+
+    def _filter_frames(self, stages, df, inputs, verbose):
+        # frame evaluation: each stage filters the frame the previous one returned
+        object_strings = False
+        for stage in stages:
+            if stage.object_strings and not object_strings:
+                # row-wise Python stages need plain object strings
+                df, object_strings = to_object_strings(df), True
+            df = self._run_stage(stage, df, inputs)
+            if verbose: print(f"After {stage.name.replace('_', ' ')}: {len(df)} rows")
+            if return_if_empty(df) is not None:
+                break
+        return df
+
+    def _run_stages(self, stages, df, inputs, verbose, rejections=None):
+        # the survivors of the stages, and the rejection codes of every row in mask evaluation (None otherwise)
+        if self.evaluation == 'mask':
+            return self._evaluate_masks(stages, df, inputs, verbose, rejections)
+        return self._filter_frames(stages, df, inputs, verbose), None
+
+    def _run_sharded(self, stages, df, inputs, verbose):
+        """
+        Sharded execution: the leading stages that need every row (deduplication) run here, then
+        the rows are split into ``shards`` contiguous partitions and the row-local (``chunked``)
+        stages run on each partition in a worker process. The partitions are merged in row order
+        and the stage metrics of the shards are summed (seconds: the slowest shard).
+
+        The workers are fresh processes (``process_context``), safe to start from a background job
+        thread, and are kept for the next sharded runs (``shard_pool``). The references the stages
+        read are pickled once per run and loaded once per worker, the tasks carry only their rows;
+        the texts the workers tokenized are merged into the run's token cache.
+        """
+        split = next((i for i, stage in enumerate(stages) if stage.chunked), len(stages))
+        survivors, rejections = self._run_stages(stages[:split], df, inputs, verbose)
+        if split == len(stages) or survivors.empty:
+            return survivors, rejections
+        # setups (keyword extraction) run once, here; the shards get their outputs as inputs
+        sharded = []
+        for stage in stages[split:]:
+            if stage.setup is not None:
+                inputs.update(stage.setup(*[inputs[name] for name in stage.setup_args]))
+            stage = copy.copy(stage)
+            stage.setup = None
+            sharded.append(stage)
+        # in mask evaluation every row goes to a shard, so the rows rejected above still get their other reasons
+        rows = survivors if rejections is None else df
+        bounds = np.linspace(0, len(rows), min(self.shards, len(rows)) + 1, dtype=int)
+        results = self._map_shards(sharded, rows, inputs, rejections, list(zip(bounds[:-1], bounds[1:])))
+
+        metrics = {}
+        for _, _, shard_metrics in results:
+            for metric in shard_metrics:
+                merged = metrics.setdefault(metric['stage'], {'seconds': 0.0})
+                merged['seconds'] = max(merged['seconds'], metric['seconds'])
+                for key, value in metric.items():
+                    if key not in ('stage', 'seconds') and isinstance(value, (int, np.integer)):
+                        merged[key] = merged.get(key, 0) + value
+        for stage in sharded:
+            if stage.name in metrics:
+                merged = metrics[stage.name]
+                seconds, rows_in, rows_out = merged.pop('seconds'), merged.pop('rows_in'), merged.pop('rows_out')
+                self._record_stage(stage.name, rows_in, rows_out, time.perf_counter() - seconds,
+                                   shards=len(results), **merged)
+                if verbose: print(f"After {stage.name.replace('_', ' ')}: {rows_out} rows")
+        parts = [part for part, _, _ in results]
+        kept = [part for part in parts if len(part)]
+        df = pd.concat(kept) if kept else parts[0]
+        return df, None if rejections is None else np.concatenate([codes for _, codes, _ in results])
+
+    def _map_shards(self, stages, df, inputs, rejections, bounds):
+        # (survivors, rejection codes, stage metrics) of every partition, in partition order
+        # only the inputs the sharded stages read are passed (not the upload or the company lists they do not use)
+        inputs = {name: inputs[name] for stage in stages for name in stage.args}
+        with tempfile.NamedTemporaryFile(prefix='shard-run-', suffix='.pkl', delete=False) as f:
+            pickle.dump((self._shard_pipeline(), stages, inputs), f, protocol=pickle.HIGHEST_PROTOCOL)
+        run_id, pool = uuid.uuid4().hex, shard_pool(len(bounds))
+        try:
+            futures = [pool.submit(_run_shard, run_id, f.name, df.iloc[start:end],
+                                   None if rejections is None else rejections[start:end])
+                       for start, end in bounds]
+            pending, done_rows = set(futures), 0
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end = bounds[futures.index(future)]
+                    done_rows += end - start
+                    self._progress(stages[0].name, done_rows, len(df))
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    # the shards already running finish in the background, their results are dropped
+                    for future in pending:
+                        future.cancel()
+                    check_cancelled(self.cancel_event)
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            _discard_shard_pool(pool)
+            raise
+        finally:
+            os.unlink(f.name)
+        token_cache = inputs.get('token_cache')
+        for _, _, _, additions in results:
+            if token_cache is not None and additions is not None:
+                token_cache.merge(additions)
+        return [(part, codes, metrics) for part, codes, metrics, _ in results]
+
+    def _shard_pipeline(self):
+        # a copy of the run for the shard workers: settings only, without hooks, events and caches
+        pipeline = copy.copy(self)
+        for name in ('stage_callback', 'progress_callback', 'reason_progress_callback', 'reason_callback',
+                     'reason_text_callback', 'cancel_event', 'reason_generator', 'checkpoint', 'token_cache',
+                     'reasons', 'stages', '_stage_rows'):
+            setattr(pipeline, name, None)
+        pipeline.stage_metrics = []
+        return pipeline
+
+    def _shard(self, stages, df, inputs, rejections):
+        # one partition, in a worker process
+        self.stage_metrics = []
+        df, rejections = self._run_stages(stages, df, dict(inputs), verbose=False, rejections=rejections)
+        return df, rejections, self.stage_metrics
 
     def filter(self, df, companies_to_remove, companies_a, companies_b, verbose=True):
+        df = self.shortlist(df, companies_to_remove, companies_a, companies_b, verbose)
+        if return_if_empty(df) is not None:
+            return df
+        check_cancelled(self.cancel_event)
+            
+        # 9. Generate criteria tracking and LLM reasoning
+        started = time.perf_counter()
+        df['criteria_passed'] = criteria_passed_column(df)
+        if self.checkpoint is not None:
+            # stages 1-8 are done: a resumed run continues from here
+            self.checkpoint.save_shortlist(df, self._run_info(self.reason_keywords))
+        return self._reason_stage(df, self.reason_keywords, started, verbose)
+
+    def shortlist(self, df, companies_to_remove, companies_a, companies_b, verbose=True):
+        """
+        Stages 0-8 (the enabled stages of the stage graph): the profiles that reach the
+        reasoning stage, with all their columns and the keyword criteria they passed
+        """
         # Check for required columns
         required_cols = ['title', 'companyName', 'summary', 'location']
         missing_cols = [col for col in required_cols if col not in df.columns]
         if missing_cols:
             if verbose: print(f"ERROR: Missing required columns: {missing_cols}")
             return df.iloc[0:0]  # Return empty dataframe with same structure
+        
+        self.stage_metrics = []
+        self.reasons = None
+        self.reason_keywords = None
+        self.classified_keywords = None
+        self.rejections = None
+        stages = self.planned_stages()
+        
+        # Stages 1-8 work on a narrow projection; the other columns are joined back for the survivors
+        full_df = df
+        df = project_columns(full_df)
             
-        # Optional columns - add if missing
+        # Optional columns - add if missing (assign: df can be a slice of the upload)
         if 'titleDescription' not in df.columns:
-            df['titleDescription'] = ''
+            df = df.assign(titleDescription='')
         if 'companyLocation' not in df.columns:
-            df['companyLocation'] = df.get('location', '')
+            df = df.assign(companyLocation=df.get('location', ''))
             
         if verbose: print(f"Initial rows: {len(df)}")
         
-        # 1. Title elimination
-        df = title_elimination(df)
-        if verbose: print(f"After title elimination: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 2. Summary/Job description elimination  
-        df = summary_jobdesc_elimination(df)
-        if verbose: print(f"After summary/jobdesc elimination: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 3. Company exclusion
-        df = company_exclusion(df, companies_to_remove)
-        if verbose: print(f"After company exclusion: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 4. English only filter
-        df = english_only(df)
-        if verbose: print(f"After english only: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 5. Location filter
-        df = location_filter(df, self.event_location, self.additional_countries)
-        if verbose: print(f"After location filter: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 6. Company category assignment
-        df = company_category(df, companies_a, companies_b)
-        if verbose: print(f"After company category: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 7. Seniority filter
-        df = seniority_filter(df)
-        if verbose: print(f"After seniority filter: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 8. Keyword extraction and matching
-        if self.use_classified_keywords:
-            # Use new classified keyword system according to client requirements
-            classified_keywords = extract_classified_keywords(self.topic, self.sub_topic)
-            class_a_keywords = classified_keywords['class_a']
-            class_b_keywords = classified_keywords['class_b']
-            
-            if verbose:
-                print(f"Class A Keywords (from '{self.topic}'): {class_a_keywords}")
-                print(f"Class B Keywords (from '{self.sub_topic}'): {class_b_keywords}")
-            
-            # Apply keyword matching with detailed criteria tracking
-            keyword_results = df.apply(lambda row: keyword_match_classified(row, class_a_keywords, class_b_keywords), axis=1)
-            
-            # Filter profiles that pass at least one criteria
-            df = df[keyword_results.apply(lambda x: x['passes'])].copy()
-            
-            # Add criteria information to dataframe
-            df['keyword_criteria_passed'] = keyword_results.apply(lambda x: ', '.join(x['criteria_passed']) if x['criteria_passed'] else 'None')
-            df['criteria_a_passed'] = keyword_results.apply(lambda x: x['criteria_a'])
-            df['criteria_b_passed'] = keyword_results.apply(lambda x: x['criteria_b'])
-            df['criteria_c_passed'] = keyword_results.apply(lambda x: x['criteria_c'])
-            
+        # Inputs the stages name in their args
+        inputs = {
+            'full_df': full_df,
+            'companies_to_remove': companies_to_remove,
+            'companies_a': companies_a,
+            'companies_b': companies_b,
+            'engine': self.engine,
+            'language_detector': self.language_detector,
+            'event_location': self.event_location,
+            'additional_countries': self.additional_countries,
+            'topic': self.topic,
+            'sub_topic': self.sub_topic,
+            'dedup_keys': self.dedup_keys,
+            'dedup_keep': self.dedup_keep,
+            'near_duplicate_threshold': self.near_duplicate_threshold,
+            'use_classified_keywords': self.use_classified_keywords,
+            'token_cache': self.token_cache,
+            'verbose': verbose,
+        }
+        if self.shards > 1:
+            df, rejections = self._run_sharded(stages, df, inputs, verbose)
         else:
-            # Use legacy keyword matching system
-            keywords = extract_profile_keywords(self.topic, self.sub_topic)
-            if verbose:
-                print(f"Legacy Keywords: {keywords}")
-            df = df[df.apply(lambda row: keyword_match(row, keywords), axis=1)].copy()
-            df['keyword_criteria_passed'] = 'Legacy keyword matching'
+            df, rejections = self._run_stages(stages, df, inputs, verbose)
+        if rejections is not None:
+            self.rejections = pd.Series(rejections, index=full_df.index, name='rejection_reasons')
         
-        if verbose: print(f"After keyword matching: {len(df)} rows")
-        if return_if_empty(df) is not None:
-            return df
-            
-        # 9. Generate criteria tracking and LLM reasoning
-        def get_criteria_passed(row):
-            criteria = []
-            if row.get('title', ''):
-                criteria.append('Has valid title')
-            if row.get('summary', ''):
-                criteria.append('Has summary')
-            if row.get('Companies Category', ''):
-                criteria.append(f"Company category: {row.get('Companies Category')}")
-            if hasattr(row, 'keyword_criteria_passed') and row['keyword_criteria_passed'] != 'None':
-                criteria.append(f"Keyword criteria: {row['keyword_criteria_passed']}")
-            return ', '.join(criteria)
-        
-        df['criteria_passed'] = df.apply(get_criteria_passed, axis=1)
-        df['llm_reason'] = df.apply(lambda row: generate_llm_reason(row, self.topic, self.sub_topic, self.event_location, row['criteria_passed']), axis=1)
+        self.reason_keywords = inputs.get('reason_keywords')
+        if self.use_classified_keywords and 'class_a_keywords' in inputs:
+            self.classified_keywords = {'class_a': inputs['class_a_keywords'], 'class_b': inputs['class_b_keywords']}
+        if self.persist_token_cache and inputs['token_cache'] is not None:
+            inputs['token_cache'].save_if_dirty()
+        return materialize_columns(df, full_df)
+
+    def _run_info(self, reason_keywords):
+        return {
+            'topic': self.topic,
+            'sub_topic': self.sub_topic,
+            'event_location': self.event_location,
+            'additional_countries': self.additional_countries,
+            'reason_keywords': list(reason_keywords),
+            'options': {'lazy_reasons': self.lazy_reasons, 'compact_prompts': self.compact_prompts,
+                        'reason_concurrency': self.reason_concurrency},
+            'stage_metrics': self.stage_metrics,
+        }
+
+    def _reason_stage(self, df, reason_keywords, started, verbose):
+        prompt_stats = prompt_token_stats.snapshot()
+        reason = partial(self.reason_generator or generate_llm_reason, keywords=reason_keywords, compact=self.compact_prompts)
+        resumed, failed = 0, 0
+        if self.lazy_reasons:
+            # reasons are generated later for the rows that are shown or exported (self.reasons.fill)
+            self.reasons = LazyReasons(df.drop(columns=['criteria_passed']), self.topic, self.sub_topic,
+                                       self.event_location, df['criteria_passed'], generator=reason,
+                                       max_workers=self.reason_concurrency)
+            df['llm_reason'] = None
+        else:
+            df['llm_reason'], resumed, failed = self._generate_reasons(df, reason)
         
         # Clean up temporary columns but keep keyword criteria for analysis
         df = df.drop(columns=['criteria_passed'])
+        after = prompt_token_stats.snapshot()
+        extra = {'resumed': resumed, 'failed': failed} if self.checkpoint is not None else {}
+        self._record_stage('llm_reason', len(df), len(df), started, deferred=self.lazy_reasons,
+                           prompt_tokens=after['prompt_tokens'] - prompt_stats['prompt_tokens'],
+                           baseline_prompt_tokens=after['baseline_prompt_tokens'] - prompt_stats['baseline_prompt_tokens'],
+                           **extra)
         
         if verbose: print(f"After llm_reason: {len(df)} rows")
         return df
+
+    def _generate_reasons(self, df, reason):
+        """
+        Reasons of the shortlist, with at most ``reason_concurrency`` LLM calls in flight.
+        A cancelled run stops submitting calls and raises once the calls in flight are finished.
+
+        With a checkpoint, rows with a logged reason are skipped and the others are appended
+        to the reason log; a failed row is logged and left empty (resume retries it) instead
+        of ending the run.
+        """
+        done = self.checkpoint.load_reasons()[0] if self.checkpoint is not None else {}
+        if self.reason_order == 'score':
+            order = top_k_positions(calculate_ai_scores(df), len(df))
+        else:
+            order = range(len(df))
+        reasons = pd.Series(None, index=df.index, dtype=object)
+        pending, finished, failed = [], 0, 0
+        for position in order:
+            label = df.index[position]
+            if label in done:
+                reasons.iloc[position] = done[label]
+                finished += 1
+                self._progress('llm_reason', finished, len(df))
+            else:
+                pending.append(position)
+        resumed = finished
+
+        def generate(position):
+            row = df.iloc[position]
+            # streamed text is only requested by callers that show it
+            stream = {} if self.reason_text_callback is None else {'on_text': partial(self.reason_text_callback, row)}
+            return reason(row, self.topic, self.sub_topic, self.event_location, row['criteria_passed'], **stream)
+
+        with self.checkpoint.reason_log() if self.checkpoint is not None else nullcontext() as log:
+            def finish(position, result):
+                nonlocal finished, failed
+                label = df.index[position]
+                try:
+                    text = result()
+                except Exception as error:
+                    if log is None:
+                        raise
+                    log.write_error(label, error)
+                    text, failed = None, failed + 1
+                else:
+                    if log is not None:
+                        log.write(label, text)
+                reasons.iloc[position] = text
+                finished += 1
+                if self.reason_callback is not None:
+                    self.reason_callback(df.iloc[position], text)
+                self._progress('llm_reason', finished, len(df))
+
+            # streamed text is shown by the calling thread, so it is written one call at a time
+            workers = 1 if self.reason_text_callback is not None else max(1, self.reason_concurrency)
+            if workers == 1:
+                for position in pending:
+                    check_cancelled(self.cancel_event)
+                    finish(position, partial(generate, position))
+                return reasons, resumed, failed
+
+            # a new call is submitted as soon as one finishes; callbacks run on the calling thread
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                queue, in_flight = iter(pending), {}
+                while True:
+                    while len(in_flight) < workers and not (self.cancel_event is not None and self.cancel_event.is_set()):
+                        position = next(queue, None)
+                        if position is None:
+                            break
+                        in_flight[pool.submit(generate, position)] = position
+                    if not in_flight:
+                        break
+                    completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        finish(in_flight.pop(future), future.result)
+            check_cancelled(self.cancel_event)
+        return reasons, resumed, failed
+
+    @classmethod
+    def from_checkpoint(cls, run_dir, **kwargs):
+        """Pipeline with the event inputs and options of a checkpointed run (kwargs override the options)"""
+        info = RunCheckpoint(run_dir).load_run_info()
+        options = {**info['options'], **kwargs, 'checkpoint_dir': run_dir}
+        return cls(info['topic'], info['sub_topic'], info['event_location'], info['additional_countries'], **options)
+
+    def resume(self, verbose=True):
+        """
+        Finish a checkpointed run from its saved shortlist: stages 1-8 and keyword extraction
+        are not run again, and only the rows without a logged reason (missing or failed) are generated
+        """
+        if self.checkpoint is None or not self.checkpoint.has_shortlist:
+            raise ValueError("No checkpointed shortlist to resume from")
+        info = self.checkpoint.load_run_info()
+        df = self.checkpoint.load_shortlist()
+        self.stage_metrics = []
+        self.reasons = None
+        for metric in info['stage_metrics']:
+            self.stage_metrics.append(metric)
+            if self.stage_callback is not None:
+                self.stage_callback(metric)
+        if verbose: print(f"Resuming {len(df)} shortlisted rows from {self.checkpoint.path}")
+        return self._reason_stage(df, info['reason_keywords'], time.perf_counter(), verbose)
+
+    def dry_run(self, df, companies_to_remove, companies_a, companies_b, sample_size=None, replicates=None,
+                seed=0, concurrency=None, verbose=False):
+        """
+        Estimate a filter() run from a stratified sample: exact duplicates are removed from all
+        rows, the other stages up to 8 run on the sample (in replicates), stage 9 is not run but
+        costed from the prompts of the sampled survivors. Near duplicates are only found within the
+        sample, so their removal is underestimated.
+
+        Args:
+            df: All uploaded profiles
+            sample_size: Sampled profiles (defaults to dry_run_settings)
+            replicates: Separate runs the sample is split into, for the runtime intervals
+            seed: Random seed of the sample
+            concurrency: Reason calls in flight (defaults to reason_concurrency, 1 while streaming reason texts)
+
+        Returns:
+            Dict with 'total_rows', 'sample_rows', 'confidence', 'stages' (per-stage rows and seconds
+            with '_low'/'_high' bounds), 'reasons' (see estimate_reason_stage) and 'seconds' (whole run)
+        """
+        confidence = dry_run_settings['confidence']
+        total = len(df)
+        estimates = []
+        deduplicate = 'deduplication' in self.stages and self._stage_enabled(self.stages['deduplication'])
+        if deduplicate:
+            # a duplicate pair is rarely sampled together: exact duplicates are removed from all rows (a fast hash)
+            started = time.perf_counter()
+            df = df[duplicate_mask(df, self.dedup_keys, self.dedup_keep)]
+            seconds = round(time.perf_counter() - started, 2)
+            estimates.append({'stage': 'deduplication', 'rows_in': total,
+                              'rows_out': len(df), 'rows_out_low': len(df), 'rows_out_high': len(df),
+                              'selectivity': round(len(df) / total, 4) if total else 0.0,
+                              'seconds': seconds, 'seconds_low': seconds, 'seconds_high': seconds})
+
+        strata = profile_strata(df, dry_run_settings['max_strata'])
+        sample = stratified_sample(strata, sample_size or dry_run_settings['sample_size'],
+                                   replicates or dry_run_settings['replicates'], seed)
+        stages, passed, seconds_per_row, shortlists, keywords = [], {}, {}, [], None
+        # the sample runs are not reported to progress hooks, and duplicates are already removed
+        hooks = (self.stage_callback, self.progress_callback, self.stage_options, self.shards)
+        # the sample is small, and the dry run reads the rows passing each stage: not sharded
+        self.stage_callback, self.progress_callback, self.shards = None, None, 1
+        if deduplicate:
+            self.stage_options = {**self.stage_options, 'deduplication': {'enabled': False}}
+        try:
+            # warm-up on a few rows: one-off loading (language profiles, token cache) is not timed as per-row cost
+            self.shortlist(df.iloc[sample['position'][:20]].reset_index(drop=True),
+                           companies_to_remove, companies_a, companies_b, verbose=False)
+            for _, part in sample.groupby('replicate'):
+                positions = part['position'].to_numpy()
+                self._stage_rows = {}
+                # a fresh 0..n-1 index, as for an upload (maps back to the sampled positions)
+                shortlist = self.shortlist(df.iloc[positions].reset_index(drop=True),
+                                           companies_to_remove, companies_a, companies_b, verbose=False)
+                for metric in self.stage_metrics:
+                    stage = metric['stage']
+                    if stage not in stages:
+                        stages.append(stage)
+                    seconds_per_row.setdefault(stage, []).append(metric['seconds'] / max(1, metric['rows_in']))
+                    passed.setdefault(stage, set()).update(positions[self._stage_rows[stage]])
+                shortlists.append(shortlist)
+                keywords = keywords or self.reason_keywords
+        finally:
+            self._stage_rows = None
+            self.stage_callback, self.progress_callback, self.stage_options, self.shards = hooks
+        self.stage_metrics = []
+
+        # stages: rows passing each stage (stratified estimate) and seconds per input row (over the replicates)
+        population = strata.value_counts()
+        rows_in = (len(df), len(df), len(df))
+        for stage in stages:
+            share = stratified_proportion(sample['position'].isin(passed[stage]), sample['stratum'], population, confidence)
+            rows_out = tuple(len(df) * p for p in share)
+            per_row = mean_interval(seconds_per_row[stage], confidence)
+            estimates.append({
+                'stage': stage,
+                'rows_in': round(rows_in[0]),
+                'rows_out': round(rows_out[0]), 'rows_out_low': round(rows_out[1]), 'rows_out_high': round(rows_out[2]),
+                'selectivity': round(rows_out[0] / rows_in[0], 4) if rows_in[0] else 0.0,
+                'seconds': round(per_row[0] * rows_in[0], 2),
+                'seconds_low': round(per_row[1] * rows_in[1], 2), 'seconds_high': round(per_row[2] * rows_in[2], 2),
+            })
+            rows_in = rows_out
+
+        # stage 9: prompt size of the sampled survivors (of the sample itself if none survived)
+        survivors = [shortlist for shortlist in shortlists if not shortlist.empty]
+        prompt_rows = pd.concat(survivors) if survivors else df.iloc[sample['position']]
+        prompt_rows = prompt_rows.head(dry_run_settings['max_prompt_samples'])
+        prompt_tokens = [
+            estimate_tokens(build_reason_prompt(row, self.topic, self.sub_topic, self.event_location,
+                                                criteria_passed_text(row), keywords=keywords or [],
+                                                compact=self.compact_prompts, record=False))
+            for _, row in prompt_rows.iterrows()
+        ]
+        if concurrency is None:
+            concurrency = 1 if self.reason_text_callback is not None and not self.lazy_reasons else self.reason_concurrency
+        reasons = estimate_reason_stage(rows_in, sum(prompt_tokens) / max(1, len(prompt_tokens)), concurrency)
+
+        seconds = tuple(round(sum(stage[f'seconds{suffix}'] for stage in estimates) + reasons[f'seconds{suffix}'], 1)
+                        for suffix in ('', '_low', '_high'))
+        if verbose:
+            print(f"Dry run on {len(sample)} of {total} profiles: ~{reasons['calls']} profiles reach the reasoning stage "
+                  f"({reasons['calls_low']}-{reasons['calls_high']}), ~${reasons['cost_usd']:.2f}, ~{seconds[0]:.0f}s")
+        return {
+            'total_rows': total,
+            'sample_rows': len(sample),
+            'confidence': confidence,
+            'stages': estimates,
+            'reasons': reasons,
+            'seconds': seconds,
+        }
+
+    def filter_store(self, store, companies_to_remove, companies_a, companies_b, verbose=True):
+        """
+        Shortlist an event against a ProfileStore: the keyword criteria preselect
+        candidates with an indexed query and only those are loaded and filtered
+        """
+        started = time.perf_counter()
+        if self.use_classified_keywords:
+            class_a_keywords = extract_classified_keywords(self.topic, self.sub_topic)['class_a']
+            candidates = store.shortlist(class_a_keywords)
+        else:
+            # the legacy rules have no required keyword class - every stored profile is a candidate
+            candidates = store.fetch()
+        if verbose: print(f"Store shortlist: {len(candidates)} candidate profiles")
+        if candidates.empty:
+            self.stage_metrics = []
+            return candidates
+
+        df = self.filter(candidates, companies_to_remove, companies_a, companies_b, verbose)
+        self.stage_metrics.insert(0, {
+            'stage': 'store_shortlist',
+            'rows_in': len(store),
+            'rows_out': len(candidates),
+            'seconds': round(time.perf_counter() - started, 4),
+        })
+        return df
+
+
+def benchmark_shards(df, companies_to_remove, companies_a, companies_b, topic, sub_topic,
+                     shard_counts=(1, 2, 4, 8, 16), **kwargs) -> list:
+    """
+    Time the shortlist (stages 0-8) of the same run with each shard count, to measure the scaling
+    of the sharded mode on this machine
+
+    The worker pool is started by an untimed first run, and every run gets an empty token cache
+    (each one tokenizes the texts).
+
+    Args:
+        df: Profiles
+        companies_to_remove, companies_a, companies_b: Company lists, as for ``shortlist``
+        topic, sub_topic: Event
+        shard_counts: Shard counts to time, the first one is the baseline
+        **kwargs: Other ProfilesFiltering options
+
+    Returns:
+        One dictionary per shard count: shards, seconds, speedup and efficiency (speedup per shard)
+        against the first count, and the CPU cores of the machine
+    """
+    def run(shards):
+        pipeline = ProfilesFiltering(topic, sub_topic, shards=shards, token_cache=TokenCache(),
+                                     persist_token_cache=False, **kwargs)
+        started = time.perf_counter()
+        pipeline.shortlist(df, companies_to_remove, companies_a, companies_b, verbose=False)
+        return time.perf_counter() - started
+
+    run(max(shard_counts))
+    timings = [(shards, run(shards)) for shards in shard_counts]
+    baseline_shards, baseline = timings[0]
+    return [{
+        'shards': shards,
+        'seconds': round(seconds, 3),
+        'speedup': round(baseline / seconds, 2),
+        'efficiency': round(baseline / seconds * baseline_shards / shards, 2),
+        'cores': os.cpu_count(),
+    } for shards, seconds in timings]
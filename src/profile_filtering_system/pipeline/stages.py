@@ -0,0 +1,162 @@
+"""
+Stage graph - the filtering stages of a run, declared once and executed by ProfilesFiltering
+
+A stage names the function it runs, the run inputs passed to it (by name) and the
+stages whose output it needs. The executor orders the enabled stages by these
+dependencies (declaration order among independent stages), so the library, the
+background jobs and the Streamlit app all run the same graph.
+
+Row-wise stages are ``chunked``: a large frame is filtered a chunk at a time,
+which is where progress is reported and cancellation is checked.
+
+A stage can also declare a ``predicate`` returning a boolean mask of the rows to
+keep (and the columns it adds), used by the mask evaluation: the predicates are
+combined over one shared row index, each rejected row gets the stage's bit of
+``rejection_reason_bits``, and the survivors are selected once at the end.
+Predicates marked ``parallel`` read only uploaded columns: consecutive ones can
+be evaluated at the same time (threads for the Arrow kernels and regexes,
+processes for GIL-bound Python such as langdetect) and their masks intersected.
+"""
+import threading
+import pandas as pd
+from src.profile_filtering_system.constants import rejection_reason_bits
+
+
+class RunCancelled(Exception):
+    """Raised by a run whose cancel event was set, at the next chunk or LLM batch boundary"""
+
+
+class Stage:
+    """
+    One node of the stage graph
+
+    Args:
+        name: Stage name, as in the stage metrics
+        func: Called with the frame and the ``args`` inputs; returns the rows that pass
+        args: Names of the run inputs passed after the frame (see ProfilesFiltering.shortlist)
+        after: Stages that must run first (their output columns are read by this stage)
+        label: Display name
+        chunked: Rows are independent, so the frame may be processed in chunks (and in shards)
+        object_strings: The stage is row-wise Python code and needs plain object strings
+        switch: Pipeline attribute enabling the stage (e.g. 'deduplicate'), always enabled if None
+        setup: Called once with the ``setup_args`` inputs before the first chunk; returns more inputs
+        removed_as: Metric key reporting the rows the stage removed
+        predicate: Mask evaluation - called like ``func``; returns the boolean keep mask, or a tuple
+            (keep mask or None, dict of added columns)
+        every_row: The predicate is cheap and evaluated on every row (all its rejections are recorded),
+            not only on the rows still alive
+        parallel: The predicate only reads uploaded columns, so it may run at the same time as the
+            neighbouring parallel stages (no object strings)
+        gil_bound: The predicate is pure Python code holding the GIL, worth a process pool
+    """
+
+    def __init__(self, name: str, func, args: tuple = (), after: tuple = (), label: str = None,
+                 chunked: bool = False, object_strings: bool = False, switch: str = None,
+                 setup=None, setup_args: tuple = (), removed_as: str = None, predicate=None,
+                 every_row: bool = False, parallel: bool = False, gil_bound: bool = False):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.after = tuple(after)
+        self.label = label or name.replace('_', ' ').capitalize()
+        self.chunked = chunked
+        self.object_strings = object_strings
+        self.switch = switch
+        self.setup = setup
+        self.setup_args = tuple(setup_args)
+        self.removed_as = removed_as
+        self.predicate = predicate
+        self.every_row = every_row
+        self.parallel = parallel
+        self.gil_bound = gil_bound
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r})"
+
+
+class StageGraph:
+    """
+    Dependency-ordered stages
+
+    Usage:
+        graph = StageGraph([Stage('a', f), Stage('b', g, after=('a',))])
+        for stage in graph.plan(enabled=lambda stage: True):
+            ...
+    """
+
+    def __init__(self, stages: list):
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self._by_name = {stage.name: stage for stage in self.stages}
+        for stage in self.stages:
+            unknown = [name for name in stage.after if name not in self._by_name]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} runs after unknown stages: {unknown}")
+        self.order = self._topological_order()
+
+    def __getitem__(self, name: str) -> Stage:
+        return self._by_name[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def _topological_order(self) -> list:
+        # Kahn's algorithm, the first declared stage among the ready ones runs first
+        done, order = set(), []
+        while len(order) < len(self.stages):
+            ready = [stage for stage in self.stages if stage.name not in done and set(stage.after) <= done]
+            if not ready:
+                raise ValueError(f"Cycle in the stage graph: {[s.name for s in self.stages if s.name not in done]}")
+            order.append(ready[0])
+            done.add(ready[0].name)
+        return order
+
+    def plan(self, enabled) -> list:
+        """
+        The stages to run, in order
+
+        Args:
+            enabled: Called with a stage; False skips it
+
+        Returns:
+            List of stages (a stage whose dependency is disabled raises ValueError)
+        """
+        stages = [stage for stage in self.order if enabled(stage)]
+        names = {stage.name for stage in stages}
+        for stage in stages:
+            missing = [name for name in stage.after if name not in names]
+            if missing:
+                raise ValueError(f"Stage {stage.name} needs the disabled stages {missing}")
+        return stages
+
+
+def check_cancelled(cancel_event: threading.Event = None) -> None:
+    """Raise RunCancelled if the run's cancel event is set"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise RunCancelled("The run was cancelled")
+
+
+def rejection_labels(codes, bits: dict = None) -> pd.Series:
+    """
+    Decode rejection reason codes
+
+    Args:
+        codes: uint16 rejection codes (see ProfilesFiltering.rejections)
+        bits: Stage name to bit (defaults to rejection_reason_bits)
+
+    Returns:
+        Series of comma-separated stage names, '' for the rows that were kept
+    """
+    bits = rejection_reason_bits if bits is None else bits
+    codes = pd.Series(codes)
+    # a handful of distinct codes: each is decoded once
+    names = {code: ', '.join(stage for stage, bit in bits.items() if code & bit) for code in codes.unique()}
+    return codes.map(names)
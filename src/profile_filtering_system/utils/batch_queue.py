@@ -0,0 +1,427 @@
+"""
+Distributed batch mode - a shared-directory work queue of profile shards for runs larger than one machine
+
+A coordinator splits the profiles into shard files (``BatchQueue.create``); any
+number of workers on any host that sees the directory lease shards, run stages
+0-8 (``ProfilesFiltering.shortlist``) on them and write the survivors; a reducer
+merges the shard results into the shortlist of the whole input and its top k.
+
+A batch directory holds:
+- ``batch.json``: event inputs, pipeline options and queue settings
+- ``companies.pkl``, ``index.pkl``: the company lists and the index labels of the input rows
+- ``shards/shard-NNNNN.pkl``: the rows of each shard, indexed by their position in the input
+- ``leases/shard-NNNNN.json``: the worker processing a shard; its mtime is the heartbeat
+- ``results/shard-NNNNN.pkl``: survivors, rejection codes and stage metrics of a finished shard
+- ``attempts/shard-NNNNN.jsonl``: failed attempts (errors and expired leases)
+
+Rows are assigned to shards by the hash of their identity key, so the copies of a
+profile land in the same shard and the exact deduplication of a shard is the
+deduplication of the whole input. Near-duplicate collapsing only sees one shard.
+
+Leases are created with ``O_EXCL``. A lease whose heartbeat is older than
+``lease_seconds`` (a crashed or lost worker) is renamed away by the first worker
+that notices it and the shard is leased again. A shard is processed at least once:
+its result is deterministic and written atomically, so a shard finished twice is
+harmless. Workers on several hosts need synchronized clocks.
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.constants import batches_dir, batch_queue_settings
+from src.profile_filtering_system.components.ai_ranking import get_top_k
+from src.profile_filtering_system.components.deduplication import identity_hashes
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+
+BATCH_FILE = 'batch.json'
+COMPANIES_FILE = 'companies.pkl'
+INDEX_FILE = 'index.pkl'
+SHARDS_DIR, LEASES_DIR, RESULTS_DIR, ATTEMPTS_DIR = 'shards', 'leases', 'results', 'attempts'
+
+
+def _write_atomic(path: Path, write) -> None:
+    # written to a temporary file first, so readers never see a partial file
+    temporary = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def worker_name() -> str:
+    """Identity of this worker process: host, pid and a random suffix"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def shard_assignment(df: pd.DataFrame, shards: int, key_columns: list = None) -> np.ndarray:
+    """
+    Shard of every row: the hash of its identity key, rows without a key spread by position
+
+    Args:
+        df: Input DataFrame
+        shards: Number of shards
+        key_columns: Identity columns in priority order (defaults to dedup_key_columns)
+
+    Returns:
+        int64 array of shard numbers
+    """
+    hashes, has_key = identity_hashes(df, key_columns)
+    assignment = (np.arange(len(df)) % shards).astype(np.int64)
+    assignment[has_key] = (hashes[has_key] % np.uint64(shards)).astype(np.int64)
+    return assignment
+
+
+class ShardLease:
+    """
+    A leased shard; ``heartbeat()`` keeps the lease alive, ``release()`` gives it up
+    """
+
+    def __init__(self, queue: 'BatchQueue', shard: int, worker: str):
+        self.queue = queue
+        self.shard = shard
+        self.worker = worker
+        self.path = queue.lease_path(shard)
+
+    @property
+    def held(self) -> bool:
+        """Whether the lease file is still this worker's (it is re-leased once its heartbeat expired)"""
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))['worker'] == self.worker
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return False
+
+    def heartbeat(self) -> bool:
+        """Renew the lease (touch the lease file); False once it was lost"""
+        if not self.held:
+            return False
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self) -> None:
+        if self.held:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class BatchQueue:
+    """
+    Shared-directory queue of the shards of one batch
+
+    Usage:
+        queue = BatchQueue.create('quarterly', df, companies_to_remove, companies_a, companies_b, topic, sub_topic)
+        # on every host, as many processes as wanted:
+        run_worker('quarterly')
+        # once queue.finished:
+        result = queue.reduce(top_k=500)
+    """
+
+    def __init__(self, batch_dir):
+        """
+        Args:
+            batch_dir: Batch directory, or a batch id (a directory in batches_dir)
+        """
+        batch_dir = Path(batch_dir)
+        self.path = batch_dir if batch_dir.is_absolute() or len(batch_dir.parts) > 1 else batches_dir / batch_dir
+        self.info = json.loads((self.path / BATCH_FILE).read_text(encoding='utf-8'))
+        self.shards = self.info['shards']
+        self.settings = self.info['settings']
+        self._companies = None
+
+    @classmethod
+    def create(cls, batch_dir, df, companies_to_remove, companies_a, companies_b, topic, sub_topic,
+               event_location=None, additional_countries=None, options: dict = None, **settings) -> 'BatchQueue':
+        """
+        Coordinator: split the profiles into shard files and enqueue them
+
+        Args:
+            batch_dir: Batch directory, or a batch id (a directory in batches_dir); must not hold a batch yet
+            df: Uploaded profiles
+            companies_to_remove, companies_a, companies_b: Company lists of ProfilesFiltering.shortlist
+            topic, sub_topic, event_location, additional_countries: Event inputs of ProfilesFiltering
+            options: JSON-serializable ProfilesFiltering options (evaluation, engine, near_duplicates, ...)
+            **settings: Overrides of batch_queue_settings (shard_rows, lease_seconds, ...)
+
+        Returns:
+            The BatchQueue
+        """
+        settings = {**batch_queue_settings, **settings}
+        unknown = [name for name in settings if name not in batch_queue_settings]
+        if unknown:
+            raise ValueError(f"Unknown batch queue settings: {unknown}")
+        options = dict(options or {})
+        batch_dir = Path(batch_dir)
+        path = batch_dir if batch_dir.is_absolute() or len(batch_dir.parts) > 1 else batches_dir / batch_dir
+        if (path / BATCH_FILE).exists():
+            raise FileExistsError(f"{path} already holds a batch")
+        for name in (SHARDS_DIR, LEASES_DIR, RESULTS_DIR, ATTEMPTS_DIR):
+            (path / name).mkdir(parents=True, exist_ok=True)
+
+        shards = max(1, math.ceil(len(df) / settings['shard_rows']))
+        assignment = shard_assignment(df, shards, options.get('dedup_keys'))
+        for shard in range(shards):
+            # input order within a shard, so 'first' keeps the same copy as an unsharded run
+            positions = np.flatnonzero(assignment == shard)
+            rows = df.iloc[positions].set_axis(pd.RangeIndex(len(df))[positions])
+            _write_atomic(path / SHARDS_DIR / f"shard-{shard:05d}.pkl", rows.to_pickle)
+        pd.to_pickle((companies_to_remove, companies_a, companies_b), path / COMPANIES_FILE)
+        pd.to_pickle(df.index, path / INDEX_FILE)
+        info = {
+            'topic': topic,
+            'sub_topic': sub_topic,
+            'event_location': event_location,
+            'additional_countries': additional_countries,
+            'options': options,
+            'rows': len(df),
+            'shards': shards,
+            'settings': settings,
+            'created_at': time.time(),
+        }
+        # batch.json last: workers only start on a complete batch
+        _write_atomic(path / BATCH_FILE, lambda p: p.write_text(json.dumps(info, indent=2), encoding='utf-8'))
+        return cls(path)
+
+    def _shard_file(self, directory: str, shard: int, suffix: str) -> Path:
+        return self.path / directory / f"shard-{shard:05d}{suffix}"
+
+    def lease_path(self, shard: int) -> Path:
+        return self._shard_file(LEASES_DIR, shard, '.json')
+
+    def is_done(self, shard: int) -> bool:
+        return self._shard_file(RESULTS_DIR, shard, '.pkl').exists()
+
+    def attempts(self, shard: int) -> list:
+        """Failed attempts of a shard: errors of the run and expired leases"""
+        path = self._shard_file(ATTEMPTS_DIR, shard, '.jsonl')
+        if not path.exists():
+            return []
+        attempts = []
+        for line in path.read_text(encoding='utf-8').splitlines():
+            try:
+                attempts.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return attempts
+
+    def record_attempt(self, shard: int, worker: str, error: str) -> None:
+        with open(self._shard_file(ATTEMPTS_DIR, shard, '.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'worker': worker, 'error': error, 'at': time.time()}) + '\n')
+
+    def is_failed(self, shard: int) -> bool:
+        return not self.is_done(shard) and len(self.attempts(shard)) >= self.settings['max_attempts']
+
+    def _lease_age(self, shard: int):
+        try:
+            return time.time() - self.lease_path(shard).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def status(self) -> dict:
+        """Number of shards done, leased, failed and pending"""
+        status = {'shards': self.shards, 'done': 0, 'leased': 0, 'failed': 0, 'pending': 0}
+        for shard in range(self.shards):
+            if self.is_done(shard):
+                status['done'] += 1
+            elif self.is_failed(shard):
+                status['failed'] += 1
+            elif self._lease_age(shard) is not None:
+                status['leased'] += 1
+            else:
+                status['pending'] += 1
+        return status
+
+    @property
+    def finished(self) -> bool:
+        """Every shard is done or failed"""
+        return all(self.is_done(shard) or self.is_failed(shard) for shard in range(self.shards))
+
+    def lease(self, worker: str):
+        """
+        Lease the next shard that is neither done, failed nor validly leased
+
+        Returns:
+            ShardLease, None if no shard is available right now
+        """
+        for shard in range(self.shards):
+            if self.is_done(shard) or self.is_failed(shard):
+                continue
+            path = self.lease_path(shard)
+            age = self._lease_age(shard)
+            if age is not None:
+                if age <= self.settings['lease_seconds']:
+                    continue
+                # expired: the first worker to rename the lease away takes over the shard
+                stale = path.with_name(f"{path.name}.{worker}.expired")
+                try:
+                    os.rename(path, stale)
+                except FileNotFoundError:
+                    continue
+                try:
+                    owner = json.loads(stale.read_text(encoding='utf-8')).get('worker')
+                except json.JSONDecodeError:
+                    owner = None
+                stale.unlink()
+                self.record_attempt(shard, owner, f"lease expired after {age:.0f}s")
+                if self.is_failed(shard):
+                    continue
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'worker': worker, 'leased_at': time.time()}))
+            if self.is_done(shard):
+                # finished by the previous owner in the meantime
+                os.unlink(path)
+                continue
+            return ShardLease(self, shard, worker)
+        return None
+
+    def load_shard(self, shard: int) -> pd.DataFrame:
+        return pd.read_pickle(self._shard_file(SHARDS_DIR, shard, '.pkl'))
+
+    def companies(self) -> tuple:
+        """(companies_to_remove, companies_a, companies_b) of the batch, loaded once per process"""
+        if self._companies is None:
+            self._companies = pd.read_pickle(self.path / COMPANIES_FILE)
+        return self._companies
+
+    def pipeline(self, **kwargs):
+        """ProfilesFiltering of the batch; kwargs add options that are not JSON-serializable (token_cache, ...)"""
+        info = self.info
+        # workers do not write the shared token cache file at the same time
+        options = {'persist_token_cache': False, **info['options'], **kwargs}
+        return ProfilesFiltering(info['topic'], info['sub_topic'], info['event_location'],
+                                 info['additional_countries'], **options)
+
+    def process(self, lease: ShardLease, pipeline) -> None:
+        """Run stages 0-8 on a leased shard and write its result"""
+        started = time.perf_counter()
+        survivors = pipeline.shortlist(self.load_shard(lease.shard), *self.companies(), verbose=False)
+        result = {
+            'survivors': survivors,
+            'rejections': pipeline.rejections,
+            'stage_metrics': pipeline.stage_metrics,
+            'worker': lease.worker,
+            'seconds': round(time.perf_counter() - started, 4),
+        }
+        _write_atomic(self._shard_file(RESULTS_DIR, lease.shard, '.pkl'), lambda p: pd.to_pickle(result, p))
+
+    def reduce(self, top_k: int = None) -> dict:
+        """
+        Reducer: merge the shard results into the result of the whole input
+
+        Args:
+            top_k: Number of best profiles by AI score to select (None: no selection)
+
+        Returns:
+            Dict with the shortlist (input order and index labels), the top k profiles (best first),
+            the rejection codes per input row (mask evaluation, else None) and the stage metrics summed over shards
+        """
+        missing = [shard for shard in range(self.shards) if not self.is_done(shard)]
+        if missing:
+            failed = [shard for shard in missing if self.is_failed(shard)]
+            raise RuntimeError(f"{len(missing)} shards not finished ({len(failed)} failed: {failed[:10]})")
+        results = [pd.read_pickle(self._shard_file(RESULTS_DIR, shard, '.pkl')) for shard in range(self.shards)]
+        index = pd.read_pickle(self.path / INDEX_FILE)
+
+        parts = [result['survivors'] for result in results]
+        kept = [part for part in parts if len(part)]
+        shortlist = (pd.concat(kept) if kept else parts[0]).sort_index()
+        shortlist.index = index[shortlist.index.to_numpy()]
+        rejections = None
+        if all(result['rejections'] is not None for result in results):
+            rejections = pd.concat([result['rejections'] for result in results]).sort_index()
+            rejections.index = index[rejections.index.to_numpy()]
+
+        metrics = {}
+        for result in results:
+            for metric in result['stage_metrics']:
+                merged = metrics.setdefault(metric['stage'], {'stage': metric['stage']})
+                for key, value in metric.items():
+                    if key != 'stage' and isinstance(value, (int, float, np.integer, np.floating)):
+                        merged[key] = merged.get(key, 0) + value
+        return {
+            'shortlist': shortlist,
+            'top_k': get_top_k(shortlist, top_k) if top_k is not None else None,
+            'rejections': rejections,
+            # seconds: summed over the shards (worker time, not wall time)
+            'stage_metrics': list(metrics.values()),
+            'shards': self.shards,
+            'workers': sorted({result['worker'] for result in results}),
+        }
+
+
+def run_worker(batch_dir, worker: str = None, max_shards: int = None, verbose: bool = False, **kwargs) -> int:
+    """
+    Worker: lease and process shards until every shard of the batch is done or failed
+
+    A heartbeat thread renews the lease while a shard runs. A shard that raises is
+    recorded as a failed attempt and released, so another worker retries it.
+
+    Args:
+        batch_dir: Batch directory or id
+        worker: Worker identity (defaults to host-pid-random)
+        max_shards: Stop after this many shards (None: until the batch is finished)
+        verbose: Print each shard as it is processed
+        **kwargs: Extra ProfilesFiltering options of this worker (token_cache, shards, ...)
+
+    Returns:
+        Number of shards this worker finished
+    """
+    queue = BatchQueue(batch_dir)
+    worker = worker or worker_name()
+    pipeline = queue.pipeline(**kwargs)
+    processed = 0
+    while max_shards is None or processed < max_shards:
+        lease = queue.lease(worker)
+        if lease is None:
+            if queue.finished:
+                break
+            # the remaining shards are leased by other workers; their leases may still expire
+            time.sleep(queue.settings['poll_seconds'])
+            continue
+
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(queue.settings['heartbeat_seconds']):
+                if not lease.heartbeat():
+                    break
+
+        heartbeat = threading.Thread(target=beat, daemon=True)
+        heartbeat.start()
+        try:
+            if verbose: print(f"{worker}: shard {lease.shard}")
+            queue.process(lease, pipeline)
+            processed += 1
+        except Exception as e:
+            queue.record_attempt(lease.shard, worker, f"{type(e).__name__}: {e}")
+            if verbose: traceback.print_exc()
+        finally:
+            stop.set()
+            heartbeat.join()
+            lease.release()
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker and status of a distributed batch")
+    parser.add_argument('command', choices=('worker', 'status'))
+    parser.add_argument('batch', help="batch directory or id")
+    parser.add_argument('--max-shards', type=int, default=None)
+    arguments = parser.parse_args()
+    if arguments.command == 'worker':
+        print(f"{run_worker(arguments.batch, max_shards=arguments.max_shards, verbose=True)} shards processed")
+    else:
+        print(json.dumps(BatchQueue(arguments.batch).status(), indent=2))
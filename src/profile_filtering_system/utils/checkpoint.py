@@ -0,0 +1,187 @@
+"""
+Run checkpoints - saves a pipeline run incrementally so an interrupted reasoning stage can be resumed
+
+A run directory holds:
+- ``run.json``: event inputs, options, keywords and stage metrics (rewritten atomically)
+- ``shortlist.pkl``: the profiles that reached the reasoning stage (stages 1-8 output)
+- ``reasons.jsonl``: one line per generated or failed reason, appended as they finish
+- ``input.pkl`` (optional): the uploaded profiles, for the exports of a resumed run
+
+Appending a line and flushing is all the hot loop pays per row. On resume the
+log is replayed: the last line of a row wins, so a failed row that later
+succeeded counts as done.
+
+Background runs are checkpointed under their job id (``run_checkpoint``), and
+only the most recent ``max_run_dirs`` run directories are kept (``prune_runs``).
+"""
+import json
+import os
+import shutil
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.constants import runs_dir
+from src.profile_filtering_system.utils.jobs import is_job_id
+
+RUN_FILE = 'run.json'
+SHORTLIST_FILE = 'shortlist.pkl'
+REASONS_FILE = 'reasons.jsonl'
+INPUT_FILE = 'input.pkl'
+
+
+def _json_label(label):
+    # numpy scalars (index labels of a pandas index) are not JSON serializable
+    return label.item() if hasattr(label, 'item') else label
+
+
+class RunCheckpoint:
+    """
+    Checkpoint files of one pipeline run
+
+    Usage:
+        checkpoint = RunCheckpoint(run_id)
+        checkpoint.save_shortlist(df, {...})
+        with checkpoint.reason_log() as log:
+            log.write(label, reason)
+    """
+
+    def __init__(self, run_dir):
+        """
+        Args:
+            run_dir: Run directory, or a run id (a directory in runs_dir)
+        """
+        run_dir = Path(run_dir)
+        self.path = run_dir if run_dir.is_absolute() or len(run_dir.parts) > 1 else runs_dir / run_dir
+
+    @property
+    def has_shortlist(self) -> bool:
+        return (self.path / SHORTLIST_FILE).exists() and (self.path / RUN_FILE).exists()
+
+    def save_run_info(self, info: dict) -> None:
+        """Write run.json (via a temporary file, so a crash never leaves a partial file)"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        temporary = self.path / (RUN_FILE + '.tmp')
+        temporary.write_text(json.dumps(info, indent=2, default=str), encoding='utf-8')
+        os.replace(temporary, self.path / RUN_FILE)
+
+    def load_run_info(self) -> dict:
+        return json.loads((self.path / RUN_FILE).read_text(encoding='utf-8'))
+
+    def save_shortlist(self, df: pd.DataFrame, info: dict) -> None:
+        """Save the stages 1-8 output with the run info needed to continue from it"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        temporary = self.path / (SHORTLIST_FILE + '.tmp')
+        df.to_pickle(temporary)
+        os.replace(temporary, self.path / SHORTLIST_FILE)
+        self.save_run_info(info)
+
+    def load_shortlist(self) -> pd.DataFrame:
+        return pd.read_pickle(self.path / SHORTLIST_FILE)
+
+    def save_input(self, df: pd.DataFrame) -> None:
+        """Keep the uploaded profiles, so a run resumed after a restart still has them for the exports"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        df.to_pickle(self.path / INPUT_FILE)
+
+    def load_input(self):
+        """The saved uploaded profiles, None if they were not saved"""
+        path = self.path / INPUT_FILE
+        return pd.read_pickle(path) if path.exists() else None
+
+    def reason_log(self) -> 'ReasonLog':
+        """Append-only log of reasons"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        return ReasonLog(self.path / REASONS_FILE)
+
+    def load_reasons(self) -> tuple:
+        """
+        Replay the reason log
+
+        Returns:
+            Tuple of (reasons by label of the rows done, errors by label of the rows whose last attempt failed)
+        """
+        reasons, errors = {}, {}
+        path = self.path / REASONS_FILE
+        if not path.exists():
+            return reasons, errors
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut off by a crash; that row is simply generated again
+                    continue
+                label = entry['label']
+                if 'error' in entry:
+                    errors[label] = entry['error']
+                    reasons.pop(label, None)
+                else:
+                    reasons[label] = entry['reason']
+                    errors.pop(label, None)
+        return reasons, errors
+
+
+def run_checkpoint(job_id: str) -> RunCheckpoint:
+    """
+    Checkpoint of a background run: always the job's directory in runs_dir
+
+    Raises:
+        ValueError: The id is not a job id (e.g. a path taken from a crafted URL)
+    """
+    if not is_job_id(job_id):
+        raise ValueError(f"Invalid job id {job_id!r}")
+    return RunCheckpoint(runs_dir / job_id)
+
+
+def prune_runs(max_runs: int, keep=(), directory=None) -> list:
+    """
+    Delete the oldest run directories of background runs, keeping the ``max_runs`` most recent ones
+
+    Args:
+        max_runs: Run directories kept
+        keep: Job ids never deleted (queued and running jobs)
+        directory: Directory of the runs (defaults to runs_dir)
+
+    Returns:
+        Job ids of the deleted runs
+    """
+    directory = Path(runs_dir if directory is None else directory)
+    if not directory.is_dir():
+        return []
+    runs = [path for path in directory.iterdir() if path.is_dir() and is_job_id(path.name)]
+    runs.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+    deleted = []
+    for path in runs[max_runs:]:
+        if path.name not in keep:
+            # another session may be pruning at the same time
+            shutil.rmtree(path, ignore_errors=True)
+            deleted.append(path.name)
+    return deleted
+
+
+class ReasonLog:
+    """Line-buffered JSON lines writer for reasons"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        # end a line cut off by a crash, so the next entry starts on its own line
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, label, reason: str) -> None:
+        self._file.write(json.dumps({'label': _json_label(label), 'reason': reason}, ensure_ascii=False) + '\n')
+
+    def write_error(self, label, error: Exception) -> None:
+        self._file.write(json.dumps({'label': _json_label(label), 'error': f"{type(error).__name__}: {error}"},
+                                    ensure_ascii=False) + '\n')
+
+    def close(self) -> None:
+        self._file.close()
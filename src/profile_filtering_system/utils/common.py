@@ -1,25 +1,43 @@
 
-import io
 import os
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 from ensure import ensure_annotations
+from src.profile_filtering_system.constants import pipeline_columns, row_id_column, excel_cache_dir
+from src.profile_filtering_system.utils.excel import read_excel_fast
+from src.profile_filtering_system.utils.string_engine import check_engine
 
 # Centralized OpenAI API key
 OPENAI_SECRET_KEY = "sk-proj-" + "kkNzvfQ0JMBJl8P-v1lLbZ-S3ijDTUfBrmoxaAhdaskrBNSE5WDZTgehCyntoNm3WG3AgrczAoT3BlbkFJTtCuKsYJQ9uBDQrRdIasviq63E_8_2OEo-EzZOhv4f4tEVFZPOxXZlNAQ6ntgH7n-vN_oBxxAA"
 
-def streamlit_file_handler(uploaded_file):
+def read_csv_arrow(source) -> pd.DataFrame:
+    """
+    Read a CSV with the multithreaded pyarrow reader into ``string[pyarrow]`` text columns.
+    Empty fields become missing values, as with ``pd.read_csv``.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    table = pa_csv.read_csv(source, convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+    string_dtype = pd.StringDtype('pyarrow')
+    return table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get)
+
+
+def streamlit_file_handler(uploaded_file, engine='pandas'):
     """
     Handles Streamlit UploadedFile objects for CSV and Excel files.
-    Returns a pandas DataFrame.
+    Returns a pandas DataFrame. With engine='pyarrow' CSV files are parsed by the pyarrow reader.
     """
     try:
+        check_engine(engine)
         file_suffix = Path(uploaded_file.name).suffix.lower()
-        if file_suffix == '.csv':
+        if file_suffix == '.csv' and engine == 'pyarrow':
+            df = read_csv_arrow(uploaded_file)
+        elif file_suffix == '.csv':
             df = pd.read_csv(uploaded_file)
         elif file_suffix in ['.xlsx', '.xls']:
-            df = pd.read_excel(uploaded_file)
+            df = read_excel_fast(uploaded_file)
         else:
             st.error("Unsupported file type. Please upload a CSV or Excel file.")
             return None
@@ -29,29 +47,90 @@ def streamlit_file_handler(uploaded_file):
         return None
 
 
+def streamlit_files_handler(uploaded_files, engine='pandas'):
+    """
+    Handles several Streamlit UploadedFile objects (CSV and Excel), parsed concurrently.
+    Files parsed before (same content) come from the process-wide upload cache,
+    Excel files parsed in an earlier server process from their Parquet copy.
+    Returns (merged DataFrame, per-file ingestion metrics), or (None, None) on error.
+    """
+    from src.profile_filtering_system.utils.ingestion import read_profile_files
+    from src.profile_filtering_system.utils.upload_cache import get_upload_cache
+    try:
+        return read_profile_files(uploaded_files, engine=engine, cache=get_upload_cache(),
+                                  excel_cache_dir=excel_cache_dir)
+    except Exception as e:
+        st.error(f"Error reading files: {e}")
+        return None, None
+
+
 
 @ensure_annotations
-def file_reader(file_path: Path) -> pd.DataFrame:
+def file_reader(file_path: Path, engine: str = 'pandas') -> pd.DataFrame:
     
     # try catch block
     try:
+        check_engine(engine)
         # check if file path exists
         if os.path.exists(file_path):
             file_suffix = Path(file_path.name).suffix.lower()
             
-            # check if it is .csv
-            if file_suffix == '.csv':
+            # check if it is .csv (optionally with the pyarrow reader)
+            if file_suffix == '.csv' and engine == 'pyarrow':
+                df = read_csv_arrow(str(file_path))
+            elif file_suffix == '.csv':
                 df= pd.read_csv(file_path)
             # check if it is excel file
             elif file_suffix in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
+                df = read_excel_fast(file_path)
             # that file extension is not readable
             else:
                 print("File Extension doesnt exists with dataframe.")
         return df
     except Exception as e:
         print(e)
+
+
+def files_reader(file_paths: list, engine: str = 'pandas', executor: str = 'thread'):
+    """
+    Read several CSV/Excel files concurrently into one DataFrame.
+    Returns (merged DataFrame, per-file ingestion metrics).
+    """
+    from src.profile_filtering_system.utils.ingestion import read_profile_files
+    return read_profile_files([Path(path) for path in file_paths], engine=engine, executor=executor)
+
                 
+def project_columns(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """
+    Build the narrow frame the filtering stages work on.
+
+    Only the columns the stages read are copied; the index is replaced by the
+    row position in ``df`` so the remaining columns can be joined back later
+    with ``materialize_columns``.
+    """
+    columns = pipeline_columns if columns is None else columns
+    narrow_df = df[[col for col in columns if col in df.columns]]
+    narrow_df.index = pd.RangeIndex(len(df), name=row_id_column)
+    return narrow_df
+
+
+def materialize_columns(narrow_df: pd.DataFrame, full_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join the columns left out by ``project_columns`` back onto the surviving rows.
+
+    Columns present in both frames take the (possibly transformed) values of the
+    narrow frame. The original index labels of ``full_df`` are restored.
+    """
+    positions = narrow_df.index.to_numpy()
+    other_cols = [col for col in full_df.columns if col not in narrow_df.columns]
+    wide_df = full_df.iloc[positions][other_cols]
+    wide_df.index = narrow_df.index
+    ordered_cols = list(full_df.columns) + [col for col in narrow_df.columns if col not in full_df.columns]
+    result = pd.concat([wide_df, narrow_df], axis=1)[ordered_cols]
+    result.index = full_df.index[positions]
+    return result
+
+
 def return_if_empty(df):
     """
     Utility: If DataFrame is empty, return it immediately (for use in pipelines).
@@ -0,0 +1,150 @@
+"""
+Dry-run estimates - extrapolates a pipeline run from a stratified sample
+
+Profiles are stratified by the country of their location (the location filter
+is the most selective stage and depends on it). The sample is allocated to the
+strata in proportion to their size and split into replicates, which are run
+through stages 0-8 separately:
+- selectivity: the share of sampled rows that pass each stage, as a stratified
+  estimate with a Wilson interval on the effective sample size
+- runtime: seconds per input row of each stage, with a normal interval over the
+  replicates, times the estimated input rows of the full run
+- stage 9: prompt tokens measured on the sampled survivors, completion tokens,
+  calls and wall time from the rate limits and the reasoning concurrency
+"""
+import math
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.constants import llm_rate_limits, llm_cost_estimate
+
+OTHER_STRATUM = 'other'
+
+
+def profile_strata(df: pd.DataFrame, max_strata: int) -> pd.Series:
+    """
+    Stratum of every profile: the country of its location (text after the last comma),
+    the ``max_strata`` most common countries kept and the rest merged into 'other'
+    """
+    if 'location' not in df.columns:
+        return pd.Series(OTHER_STRATUM, index=df.index)
+    country = df['location'].astype(str).str.rsplit(',', n=1).str[-1].str.strip().str.lower()
+    country = country.mask(df['location'].isna() | (country == ''), 'unknown')
+    common = country.value_counts().index[:max_strata]
+    return country.where(country.isin(common), OTHER_STRATUM)
+
+
+def stratified_sample(strata: pd.Series, sample_size: int, replicates: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Proportional stratified sample of row positions, every stratum with at least one row
+
+    Returns:
+        DataFrame with the sampled 'position', its 'stratum' and 'replicate' (random within each stratum)
+    """
+    rng = np.random.default_rng(seed)
+    sizes = strata.value_counts()
+    sample_size = min(max(sample_size, len(sizes)), len(strata))
+    # one row per stratum, the remainder by largest remainder of the proportional share
+    base = np.minimum(sizes.values, 1)
+    share = (sample_size - base.sum()) * (sizes.values - base) / max(1, (sizes.values - base).sum())
+    allocation = base + np.floor(share).astype(int)
+    leftover = sample_size - allocation.sum()
+    for i in np.argsort(-(share - np.floor(share)))[:max(0, leftover)]:
+        allocation[i] += 1
+    allocation = np.minimum(allocation, sizes.values)
+
+    positions = pd.Series(np.arange(len(strata)), index=strata.index)
+    parts = []
+    for stratum, take in zip(sizes.index, allocation):
+        chosen = rng.choice(positions[strata.values == stratum].values, size=take, replace=False)
+        # replicates are dealt round-robin after the shuffle, so each replicate is itself stratified
+        parts.append(pd.DataFrame({'position': chosen, 'stratum': stratum,
+                                   'replicate': (np.arange(take) + rng.integers(replicates)) % replicates}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(p: float, n: float, confidence: float) -> tuple:
+    """Wilson score interval of a proportion ``p`` observed on ``n`` rows"""
+    if n <= 0:
+        return 0.0, 1.0
+    z = _z(confidence)
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def stratified_proportion(passed: pd.Series, strata: pd.Series, population: pd.Series, confidence: float) -> tuple:
+    """
+    Stratified estimate of the share of the population that passes
+
+    Args:
+        passed: Boolean per sampled row
+        strata: Stratum of each sampled row
+        population: Rows per stratum in the full data
+        confidence: Confidence level of the interval
+
+    Returns:
+        Tuple of (estimate, low, high)
+    """
+    weights = population / population.sum()
+    groups = passed.groupby(strata.values)
+    p_h, n_h = groups.mean(), groups.size()
+    w_h = weights.reindex(p_h.index)
+    estimate = float((w_h * p_h).sum() / w_h.sum())
+    # finite population correction: a stratum sampled completely adds no variance
+    fpc = 1 - n_h / population.reindex(p_h.index)
+    variance = float((w_h ** 2 * fpc * p_h * (1 - p_h) / (n_h - 1).clip(lower=1)).sum() / w_h.sum() ** 2)
+    if fpc.max() <= 0:
+        return estimate, estimate, estimate
+    # effective sample size of the stratified design (the plain sample size if no variance was observed)
+    n_effective = estimate * (1 - estimate) / variance if variance > 0 else len(passed)
+    low, high = wilson_interval(estimate, n_effective, confidence)
+    return estimate, min(low, estimate), max(high, estimate)
+
+
+def mean_interval(values: list, confidence: float) -> tuple:
+    """Mean of replicate measurements with a normal interval (no interval from a single replicate)"""
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean()) if len(values) else 0.0
+    if len(values) < 2:
+        return mean, mean, mean
+    half = _z(confidence) * float(values.std(ddof=1)) / math.sqrt(len(values))
+    return mean, max(0.0, mean - half), mean + half
+
+
+def estimate_reason_stage(rows: tuple, prompt_tokens: float, concurrency: int, limits: dict = None,
+                          costs: dict = None) -> dict:
+    """
+    Tokens, cost and wall time of stage 9
+
+    Args:
+        rows: Tuple of (estimate, low, high) of the profiles reaching stage 9
+        prompt_tokens: Mean prompt tokens of a reason call
+        concurrency: Reason calls in flight at the same time
+        limits: Rate limits (defaults to llm_rate_limits)
+        costs: Prices and call latency (defaults to llm_cost_estimate)
+
+    Returns:
+        Dict of calls, tokens, cost and seconds, each with '_low'/'_high' bounds
+    """
+    limits = {**llm_rate_limits, **(limits or {})}
+    costs = {**llm_cost_estimate, **(costs or {})}
+    output_tokens = limits['expected_output_tokens']
+    estimate = {'model': costs['model'], 'concurrency': concurrency,
+                'prompt_tokens_per_call': round(prompt_tokens), 'output_tokens_per_call': output_tokens}
+    for suffix, calls in zip(('', '_low', '_high'), rows):
+        calls = int(round(calls))
+        tokens = calls * (prompt_tokens + output_tokens)
+        cost = calls * (prompt_tokens * costs['input_usd_per_million_tokens']
+                        + output_tokens * costs['output_usd_per_million_tokens']) / 1e6
+        # the slowest of: call latency over the concurrent calls, the request limit, the token limit
+        seconds = max(calls * costs['seconds_per_call'] / max(1, concurrency),
+                      60.0 * calls / limits['requests_per_minute'],
+                      60.0 * tokens / limits['tokens_per_minute'])
+        estimate.update({f'calls{suffix}': calls, f'tokens{suffix}': int(round(tokens)),
+                         f'cost_usd{suffix}': round(cost, 4), f'seconds{suffix}': round(seconds, 1)})
+    return estimate
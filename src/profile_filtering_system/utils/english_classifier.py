@@ -0,0 +1,258 @@
+"""
+Built-in English classifier - a fast "English or not" alternative to langdetect
+
+The n-gram tables are shipped with the package (english_ngrams.npz): for every
+lowercase Latin-script character 1-3 gram of the langdetect language profiles,
+the log-likelihood ratio of English against each other Latin-script language.
+A text is English when it scores higher as English than as any of them, which is
+the naive Bayes decision langdetect makes, restricted to English vs the rest.
+Texts mostly written in another script (Cyrillic, Greek, Arabic, CJK...) are
+never English.
+
+Short texts (a headline of job words such as "Data scientist | ML | Python") carry
+too few n-grams for a clear decision: English and French or Italian can score
+within a nat of each other, and langdetect's answer on them changes with its
+random sampling. Such near ties are kept as English (``margin``), so the filter
+never drops a profile on a coin flip; real summaries are decided by tens of nats.
+
+Texts are scored in batches: the batch is joined into one string, converted to a
+code point array, and every n-gram is looked up and summed with NumPy, so the
+cost per text is a handful of vectorized passes instead of a Python loop.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+# tables shipped with the package, rebuilt by running this module
+TABLES_PATH = Path(__file__).with_name('english_ngrams.npz')
+
+# code points of the n-gram keys (3 x 21 bits per key)
+_CODE_BITS = 21
+# code points at or above this are not Latin script (no table entries)
+_LATIN_END = 0x250
+# ASCII characters other than letters become word separators, like in langdetect (0 separates texts)
+_ASCII_CODES = np.array([code if chr(code).isalpha() or code == 0 else 32 for code in range(0x80)], dtype=np.uint64)
+# empty slot of the gram hash table, and the multiplier of its Fibonacci hashing
+_EMPTY = np.uint64(2 ** 64 - 1)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _gram_key(gram: str) -> int:
+    key = 0
+    for ch in gram:
+        key = (key << _CODE_BITS) | ord(ch)
+    return key
+
+
+def build_tables(profiles_dir=None, latin_share: float = 0.5) -> dict:
+    """
+    English-vs-language log-likelihood ratio tables from the langdetect profiles
+
+    Args:
+        profiles_dir: Directory of langdetect profiles (defaults to the installed package's)
+        latin_share: Share of Latin-script unigrams above which a language is compared with English
+
+    Returns:
+        Dictionary of arrays: sorted gram keys, int8 ratios per (gram, language), their scale, languages
+    """
+    if profiles_dir is None:
+        import langdetect
+        profiles_dir = Path(langdetect.__file__).parent / 'profiles'
+    counts, totals = {}, {}
+    for path in sorted(Path(profiles_dir).iterdir()):
+        profile = json.loads(path.read_text(encoding='utf-8'))
+        grams = {}
+        for gram, count in profile['freq'].items():
+            lower = gram.lower()
+            if len(lower) == len(gram) and all(ord(ch) < _LATIN_END for ch in lower):
+                grams[lower] = grams.get(lower, 0) + count
+        unigrams = sum(count for gram, count in profile['freq'].items() if len(gram) == 1)
+        latin = sum(count for gram, count in grams.items() if len(gram) == 1)
+        if latin > latin_share * unigrams:
+            counts[profile['name']] = grams
+            totals[profile['name']] = profile['n_words']
+    vocabulary = sorted({gram for grams in counts.values() for gram in grams}, key=_gram_key)
+    languages = ['en'] + sorted(name for name in counts if name != 'en')
+
+    log_probs = np.empty((len(vocabulary), len(languages)), dtype=np.float64)
+    for column, name in enumerate(languages):
+        grams = counts[name]
+        # the profiles are pruned: a gram a language does not list counts half its rarest listed gram of that length
+        floors = {n: min([count for gram, count in grams.items() if len(gram) == n] or [1]) / 2 for n in (1, 2, 3)}
+        log_probs[:, column] = [np.log(grams.get(gram, floors[len(gram)]) / totals[name][len(gram) - 1])
+                                for gram in vocabulary]
+    ratios = log_probs[:, :1] - log_probs[:, 1:]
+    scale = float(np.abs(ratios).max() / 127)
+    return {
+        'keys': np.array([_gram_key(gram) for gram in vocabulary], dtype=np.uint64),
+        'ratios': np.round(ratios / scale).astype(np.int8),
+        'scale': np.float32(scale),
+        'languages': np.array(languages[1:]),
+    }
+
+
+class EnglishClassifier:
+    """
+    English-vs-other classifier over character n-grams
+
+    Usage:
+        classifier = EnglishClassifier()
+        mask = classifier.is_english(df['summary'])
+    """
+
+    def __init__(self, tables: dict = None, batch_chars: int = 500000, margin: float = 1.0):
+        if tables is None:
+            with np.load(TABLES_PATH) as data:
+                tables = {name: data[name] for name in data.files}
+        # one row of int32 ratios per language: gathering and summing a text's grams stays within contiguous rows
+        self.ratios = np.ascontiguousarray(tables['ratios'].T, dtype=np.int32)
+        self.scale = float(tables['scale'])
+        self.languages = list(tables['languages'])
+        self.batch_chars = batch_chars
+        # a text is English unless another language scores more than margin nats above it (near ties are kept)
+        self.margin = margin
+        # table rows of the 1 and 2-grams indexed by their code points, -1 for the grams no profile lists
+        keys = tables['keys']
+        self._unigrams = np.full(_LATIN_END, -1, dtype=np.int32)
+        self._bigrams = np.full(_LATIN_END * _LATIN_END, -1, dtype=np.int32)
+        unigrams, bigrams = keys < (1 << _CODE_BITS), (keys >= (1 << _CODE_BITS)) & (keys < (1 << 2 * _CODE_BITS))
+        self._unigrams[keys[unigrams].astype(np.int64)] = np.flatnonzero(unigrams)
+        self._bigrams[(keys[bigrams] >> np.uint64(_CODE_BITS)).astype(np.int64) * _LATIN_END
+                      + (keys[bigrams] & np.uint64((1 << _CODE_BITS) - 1)).astype(np.int64)] = np.flatnonzero(bigrams)
+        # the 3-grams in an open addressing hash table (at most 1/8 full, so a lookup takes one or two probes)
+        trigrams = np.flatnonzero(keys >= (1 << 2 * _CODE_BITS))
+        bits = max(int(len(trigrams) * 8 - 1).bit_length(), 4)
+        self._shift = np.uint64(64 - bits)
+        self._slots = np.full(1 << bits, _EMPTY, dtype=np.uint64)
+        self._rows = np.full(1 << bits, -1, dtype=np.int32)
+        for row, key in zip(trigrams, keys[trigrams]):
+            slot = int(self._slot(np.array([key], dtype=np.uint64))[0])
+            while self._slots[slot] != _EMPTY:
+                slot = (slot + 1) % len(self._slots)
+            self._slots[slot], self._rows[slot] = key, row
+
+    def _slot(self, keys: np.ndarray) -> np.ndarray:
+        return ((keys * _HASH_MULTIPLIER) >> self._shift).astype(np.int64)
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        # table row of every key, -1 for the grams no profile lists
+        rows = np.full(len(keys), -1, dtype=np.int32)
+        pending, slots = np.arange(len(keys)), self._slot(keys)
+        while len(pending):
+            found = self._slots[slots]
+            hit = found == keys[pending]
+            rows[pending[hit]] = self._rows[slots[hit]]
+            probe = ~hit & (found != _EMPTY)
+            pending, slots = pending[probe], (slots[probe] + 1) & (len(self._slots) - 1)
+        return rows
+
+    def _grams(self, codes: np.ndarray) -> list:
+        # (start position, table row) of the 1, 2 and 3-grams; spaces pad words, grams never span words or texts
+        latin = (codes > 0) & (codes < _LATIN_END)
+        letter = latin & (codes != 32)
+        index = np.where(latin, codes, 0).astype(np.int64)
+        grams = [(np.flatnonzero(letter), self._unigrams[index[letter]])]
+        valid = np.flatnonzero(latin[:-1] & latin[1:] & (letter[:-1] | letter[1:]))
+        grams.append((valid, self._bigrams[index[valid] * _LATIN_END + index[valid + 1]]))
+        valid = np.flatnonzero(latin[:-2] & letter[1:-1] & latin[2:])
+        keys = (codes[valid] << 2 * _CODE_BITS) | (codes[valid + 1] << _CODE_BITS) | codes[valid + 2]
+        grams.append((valid, self._lookup(keys)))
+        return grams
+
+    def _batch(self, texts: list) -> np.ndarray:
+        joined = '\0'.join(f" {text} " for text in texts).lower()
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        ascii_codes = codes < 0x80
+        codes[ascii_codes] = _ASCII_CODES[codes[ascii_codes]]
+        # general punctuation (quotes, dashes) separates words too
+        codes[(codes >= 0x2000) & (codes < 0x2070)] = 32
+        text_ids = np.cumsum(codes == 0)
+        scores = np.zeros((self.ratios.shape[0], len(texts)), dtype=np.int32)
+        grams = np.zeros(len(texts), dtype=np.int64)
+        for starts, rows in self._grams(codes):
+            found = rows >= 0
+            ids, rows = text_ids[starts[found]], rows[found]
+            counts = np.bincount(ids, minlength=len(texts))
+            if not len(rows):
+                continue
+            # grams are in text order: one sum of ratios per (language, text)
+            bounds = np.minimum(np.concatenate([[0], np.cumsum(counts)[:-1]]), len(rows) - 1)
+            sums = np.add.reduceat(self.ratios.take(rows, axis=1), bounds, axis=1, dtype=np.int32)
+            scores += np.where(counts > 0, sums, 0)
+            grams += counts
+        # letters of other scripts (Greek to Hangul); emoji and symbols are left out
+        foreign = ((codes >= 0x370) & (codes < 0x2000)) | ((codes >= 0x3040) & (codes < 0xD7B0))
+        foreign = np.bincount(text_ids[foreign], minlength=len(texts))
+        letters = np.bincount(text_ids[(codes > 32) & (codes < _LATIN_END)], minlength=len(texts))
+        return (grams > 0) & (scores.min(axis=0) * self.scale > -self.margin) & (foreign < letters)
+
+    def is_english(self, texts) -> np.ndarray:
+        """
+        Args:
+            texts: Iterable of texts (None and NaN count as empty)
+
+        Returns:
+            Boolean numpy array, True for the texts classified as English
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        if not texts:
+            return np.zeros(0, dtype=bool)
+        # batches of about batch_chars characters bound the memory of the n-gram arrays
+        ends = np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 3)
+        cuts = np.unique(np.searchsorted(ends, np.arange(self.batch_chars, ends[-1], self.batch_chars), side='right'))
+        bounds = [0, *[int(cut) for cut in cuts if 0 < cut < len(texts)], len(texts)]
+        return np.concatenate([self._batch(texts[start:end]) for start, end in zip(bounds, bounds[1:])])
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_english_classifier() -> EnglishClassifier:
+    """Process-wide classifier, the tables are loaded once"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = EnglishClassifier()
+        return _classifier
+
+
+def benchmark_english_classifier(texts, classifier: EnglishClassifier = None) -> dict:
+    """
+    Compare the built-in classifier with langdetect on the same texts
+
+    Args:
+        texts: Iterable of texts (e.g. the summaries of an export)
+        classifier: Classifier to benchmark (defaults to the process-wide one)
+
+    Returns:
+        Dictionary with the agreement with langdetect, texts per second of both and the speedup
+    """
+    from src.profile_filtering_system.components.english_only import is_english
+    texts = [text if isinstance(text, str) else '' for text in texts]
+    classifier = classifier or get_english_classifier()
+    classifier.is_english(texts[:1])
+    started = time.perf_counter()
+    builtin = classifier.is_english(texts)
+    builtin_seconds = time.perf_counter() - started
+    is_english('warm up the langdetect profiles')
+    started = time.perf_counter()
+    reference = np.fromiter(map(is_english, texts), dtype=bool, count=len(texts))
+    langdetect_seconds = time.perf_counter() - started
+    return {
+        'texts': len(texts),
+        'english_langdetect': int(reference.sum()),
+        'english_builtin': int(builtin.sum()),
+        'agreement': float((builtin == reference).mean()) if texts else 1.0,
+        'disagreements': [text for text, a, b in zip(texts, builtin, reference) if a != b],
+        'langdetect_texts_per_second': len(texts) / max(langdetect_seconds, 1e-9),
+        'builtin_texts_per_second': len(texts) / max(builtin_seconds, 1e-9),
+        'speedup': langdetect_seconds / max(builtin_seconds, 1e-9),
+    }
+
+
+if __name__ == "__main__":
+    np.savez_compressed(TABLES_PATH, **build_tables())
+    print(f"Saved {TABLES_PATH}")
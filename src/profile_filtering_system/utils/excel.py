@@ -0,0 +1,402 @@
+"""
+Fast Excel ingestion
+
+``read_excel_fast`` picks the quickest reader available:
+- ``calamine``: the Rust-based reader (pandas ``engine='calamine'``), if python-calamine is installed
+- ``stream``: a built-in .xlsx reader that scans the sheet XML in chunks, converts the cells
+  the way pandas' openpyxl reader does and only converts the requested columns
+- ``openpyxl``: ``pd.read_excel`` (also used for .xls files, and by 'auto' when the stream reader fails)
+
+With a ``cache_dir`` the parsed sheet is also written to a Parquet file named by
+the workbook's content hash (and the requested columns), so later reads of the
+same workbook skip parsing, also after a restart.
+"""
+import hashlib
+import html
+import importlib.util
+import io
+import itertools
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+from pandas.io.parsers import TextParser
+
+EXCEL_ENGINES = ('auto', 'calamine', 'stream', 'openpyxl')
+
+_CHUNK_SIZE = 4 * 1024 ** 2
+# sheet markup; tags may carry a namespace prefix (e.g. <x:row>)
+_FAST_CELL = re.compile(rb'<c r="([A-Z]+)(\d+)"(?: s="(\d+)")?(?: t="(\w+)")?(?:/>|>(?:<v>([^<]*)</v>)?</c>|>(.*?)</c>)', re.S)
+_ROW = re.compile(rb'<(?:\w+:)?row\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?row>)', re.S)
+_CELL = re.compile(rb'<(?:\w+:)?c\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?c>)', re.S)
+_ROW_NUMBER = re.compile(rb'\br=["\'](\d+)')
+_CELL_REF = re.compile(rb'\br=["\']([A-Z]+)\d+')
+_CELL_TYPE = re.compile(rb'\bt=["\'](\w+)')
+_CELL_STYLE = re.compile(rb'\bs=["\'](\d+)')
+_VALUE = re.compile(rb'<(?:\w+:)?v>(.*?)</(?:\w+:)?v>', re.S)
+_INLINE_TEXT = re.compile(rb'<(?:\w+:)?t(?:\s[^>]*)?>(.*?)</(?:\w+:)?t>', re.S)
+_UNNAMED = re.compile(r'Unnamed: \d+')
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+
+def calamine_available() -> bool:
+    return importlib.util.find_spec('python_calamine') is not None
+
+
+def _local(tag: str) -> str:
+    # element name without its namespace (transitional and strict workbooks use different namespaces)
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(letters: bytes) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + char - 64
+    return index - 1
+
+
+def _shared_strings(book: zipfile.ZipFile) -> list:
+    if 'xl/sharedStrings.xml' not in book.namelist():
+        return []
+    strings, parts, phonetic = [], [], 0
+    with book.open('xl/sharedStrings.xml') as f:
+        for event, element in ET.iterparse(f, events=('start', 'end')):
+            tag = _local(element.tag)
+            if tag == 'rPh':
+                # phonetic hints are not part of the cell text
+                phonetic += 1 if event == 'start' else -1
+            elif event == 'end' and tag == 't' and not phonetic:
+                parts.append(element.text or '')
+            elif event == 'end' and tag == 'si':
+                strings.append(''.join(parts))
+                parts = []
+                element.clear()
+    return strings
+
+
+def _date_styles(book: zipfile.ZipFile) -> tuple:
+    """Style indices of date and duration number formats"""
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+
+    if 'xl/styles.xml' not in book.namelist():
+        return set(), set()
+    root = ET.fromstring(book.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    for element in root.iter():
+        if _local(element.tag) == 'numFmt':
+            formats[int(element.get('numFmtId'))] = element.get('formatCode', '')
+    dates, durations = set(), set()
+    for element in root.iter():
+        if _local(element.tag) == 'cellXfs':
+            for index, xf in enumerate(x for x in element if _local(x.tag) == 'xf'):
+                code = formats.get(int(xf.get('numFmtId', 0)), '')
+                if is_date_format(code):
+                    dates.add(index)
+                    if is_timedelta_format(code):
+                        durations.add(index)
+    return dates, durations
+
+
+def _sheet_path(book: zipfile.ZipFile, sheet_name) -> tuple:
+    """Path of the worksheet XML and whether the workbook uses the 1904 date system"""
+    workbook = ET.fromstring(book.read('xl/workbook.xml'))
+    sheets = [element for element in workbook.iter() if _local(element.tag) == 'sheet']
+    date1904 = any(_local(element.tag) == 'workbookPr' and element.get('date1904') in ('1', 'true')
+                   for element in workbook.iter())
+    if isinstance(sheet_name, int):
+        sheet = sheets[sheet_name]
+    else:
+        matches = [element for element in sheets if element.get('name') == sheet_name]
+        if not matches:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        sheet = matches[0]
+    rels = ET.fromstring(book.read('xl/_rels/workbook.xml.rels'))
+    targets = {element.get('Id'): element.get('Target') for element in rels.iter() if _local(element.tag) == 'Relationship'}
+    target = targets[sheet.get(_REL_NS)]
+    path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    return path, date1904
+
+
+class _SheetReader:
+    """
+    Cell values of a worksheet, converted as pandas' openpyxl reader does
+
+    The sheet XML is scanned in chunks of whole rows with regular expressions
+    instead of an XML parser: building an element per cell is what makes
+    openpyxl slow. Cells written the usual way (``<c r=".." s=".." t="..">``)
+    are matched by one expression per chunk; chunks with other markup (no cell
+    references, other attribute order, namespace prefixes) take a slower
+    per-row path. Only cells of ``columns`` (positions, all if None) are
+    converted; it can be narrowed once the header row has been read.
+    """
+
+    def __init__(self, book, sheet_path, shared, date_styles, duration_styles, epoch, chunk_size=_CHUNK_SIZE):
+        self.book, self.sheet_path, self.chunk_size = book, sheet_path, chunk_size
+        self.shared, self.date_styles, self.duration_styles, self.epoch = shared, date_styles, duration_styles, epoch
+        self.columns = None
+        # one past the last column holding a value in any row
+        self.width = 0
+        self._positions = {}
+
+    def _chunks(self):
+        # whole rows only: each chunk ends after a closing row tag
+        with self.book.open(self.sheet_path) as f:
+            tail = b''
+            while True:
+                block = f.read(self.chunk_size)
+                if not block:
+                    yield tail
+                    return
+                tail += block
+                cut = max(tail.rfind(b'</row>'), tail.rfind(b':row>'))
+                if cut >= 0:
+                    cut = tail.index(b'>', cut) + 1
+                    yield tail[:cut]
+                    tail = tail[cut:]
+
+    def _position(self, letters: bytes) -> int:
+        position = self._positions.get(letters)
+        if position is None:
+            position = self._positions[letters] = _column_index(letters)
+        return position
+
+    def rows(self):
+        """
+        Yields:
+            Tuple of (row number, {column position: value}) for every row holding a value
+            (the dict only has the cells of ``columns``)
+        """
+        next_row = 1
+        for chunk in self._chunks():
+            cells = _FAST_CELL.findall(chunk)
+            # every cell tag matched (prefixed tags like <x:c> and bare <c> never are)
+            if len(cells) == chunk.count(b'<c ') and b'<c>' not in chunk and b':c ' not in chunk and b':c>' not in chunk:
+                rows = self._fast_rows(cells)
+            else:
+                rows = self._general_rows(chunk, next_row)
+            for number, row in rows:
+                next_row = number + 1
+                yield number, row
+
+    def _fast_rows(self, cells):
+        shared, columns = self.shared, self.columns
+        current, row, filled = None, {}, False
+        for letters, number, style, cell_type, value, body in cells:
+            if number != current:
+                if filled:
+                    yield int(current), row
+                current, row, filled = number, {}, False
+            if body:
+                value = self._body_value(body, cell_type)
+            if not value:
+                continue
+            filled = True
+            position = self._position(letters)
+            if position >= self.width:
+                self.width = position + 1
+            if columns is not None and position not in columns:
+                continue
+            if cell_type == b's':
+                row[position] = shared[int(value)]
+            elif not cell_type or cell_type == b'n':
+                row[position] = self._number(value.decode(), int(style) if style else None)
+            else:
+                row[position] = self._convert(value.decode('utf-8'), cell_type.decode(), int(style) if style else None)
+        if filled:
+            yield int(current), row
+
+    def _general_rows(self, chunk, next_row):
+        for row_match in _ROW.finditer(chunk):
+            number = _ROW_NUMBER.search(row_match.group(1))
+            number = int(number.group(1)) if number else next_row
+            next_row = number + 1
+            row, column, filled = {}, -1, False
+            for attributes, body in _CELL.findall(row_match.group(2) or b''):
+                reference = _CELL_REF.search(attributes)
+                column = self._position(reference.group(1)) if reference else column + 1
+                cell_type = _CELL_TYPE.search(attributes)
+                cell_type = cell_type.group(1) if cell_type else b''
+                value = self._body_value(body, cell_type) if body else None
+                if not value:
+                    continue
+                filled = True
+                self.width = max(self.width, column + 1)
+                if self.columns is None or column in self.columns:
+                    style = _CELL_STYLE.search(attributes)
+                    row[column] = self._convert(value.decode('utf-8'), cell_type.decode() or 'n',
+                                                int(style.group(1)) if style else None)
+            if filled:
+                yield number, row
+
+    @staticmethod
+    def _body_value(body: bytes, cell_type: bytes):
+        # value of a cell with more than a plain <v> (formula, inline string); None if it has none
+        if cell_type == b'inlineStr':
+            parts = _INLINE_TEXT.findall(body)
+            return b''.join(parts) if parts else None
+        value = _VALUE.search(body)
+        return value.group(1) if value else None
+
+    def _number(self, value: str, style):
+        number = float(value) if any(char in value for char in '.eE') else int(value)
+        if style in self.date_styles:
+            return from_excel(number, self.epoch, timedelta=style in self.duration_styles)
+        # whole numbers become ints, as in pandas' openpyxl reader
+        if isinstance(number, float) and number.is_integer():
+            return int(number)
+        return number
+
+    def _convert(self, value: str, cell_type: str, style):
+        if cell_type == 's':
+            return self.shared[int(value)]
+        if cell_type in ('str', 'inlineStr'):
+            return html.unescape(value)
+        if cell_type == 'b':
+            return value == '1'
+        if cell_type == 'e':
+            return np.nan
+        if cell_type == 'd':
+            return datetime.fromisoformat(value.rstrip('Z'))
+        return self._number(value, style)
+
+
+def _column_names(header: dict, width: int) -> dict:
+    """Column position by name, as pandas names them (Unnamed: i for empty cells, first of duplicates kept)"""
+    names = {}
+    for position in range(width):
+        value = header.get(position, '')
+        names.setdefault(value if value != '' else f"Unnamed: {position}", position)
+    return names
+
+
+def read_xlsx_stream(source, usecols: list = None, sheet_name=0) -> pd.DataFrame:
+    """
+    Read one worksheet of an .xlsx workbook by streaming its XML
+
+    Args:
+        source: File path, binary file handle or raw bytes
+        usecols: Column names to keep (all columns if None)
+        sheet_name: Sheet position or name
+
+    Returns:
+        DataFrame equal to ``pd.read_excel(source, usecols=usecols)``
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as book:
+        shared = _shared_strings(book)
+        date_styles, duration_styles = _date_styles(book)
+        sheet_path, date1904 = _sheet_path(book, sheet_name)
+        epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+        reader = _SheetReader(book, sheet_path, shared, date_styles, duration_styles, epoch)
+        rows = reader.rows()
+
+        # the first sheet row is the header, even when it is empty (as in pandas)
+        first = next(rows, None)
+        if first is None:
+            return pd.DataFrame()
+        if first[0] == 1:
+            header = first[1]
+        else:
+            header, rows = {}, itertools.chain([first], rows)
+        keep = None
+        if usecols is not None:
+            names = _column_names(header, max(header, default=-1) + 1)
+            # columns right of the header are unnamed; whether they exist is known after the last row
+            names.update({name: int(name[9:]) for name in usecols if name not in names and _UNNAMED.fullmatch(name)})
+            missing = [name for name in usecols if name not in names]
+            if missing:
+                raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing} (sheet: {sheet_name})")
+            keep = sorted(names[name] for name in set(usecols))
+            reader.columns = set(keep)
+        body = dict(rows)
+        if keep is not None and keep and keep[-1] >= reader.width:
+            missing = [name for name in usecols if names[name] >= reader.width]
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing} (sheet: {sheet_name})")
+
+    if keep is None:
+        keep = range(reader.width)
+    # rows without values between the header and the last row are empty rows, not skipped
+    data = [[header.get(position, '') for position in keep]]
+    for number in range(2, max(body, default=1) + 1):
+        row = body.get(number)
+        data.append([row.get(position, '') for position in keep] if row else [''] * len(keep))
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+def _cache_path(cache_dir, data: bytes, sheet_name, usecols) -> Path:
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(repr((sheet_name, sorted(usecols) if usecols is not None else None)).encode('utf-8'))
+    return Path(cache_dir) / f"{digest.hexdigest()}.parquet"
+
+
+def _read_columnar(path: Path) -> pd.DataFrame:
+    df = pd.read_parquet(path)
+    # Parquet nulls of text columns come back as None, the Excel readers give NaN
+    objects = df.select_dtypes(include='object').columns
+    if len(objects):
+        df[objects] = df[objects].where(df[objects].notna(), np.nan)
+    return df
+
+
+def read_excel_fast(source, usecols: list = None, sheet_name=0, engine: str = 'auto', cache_dir=None) -> pd.DataFrame:
+    """
+    Read an Excel sheet with the fastest available reader
+
+    Args:
+        source: File path, binary file handle or raw bytes
+        usecols: Column names to keep (all columns if None)
+        sheet_name: Sheet position or name
+        engine: 'auto' (calamine if installed, else stream), 'calamine', 'stream' or 'openpyxl'
+        cache_dir: Directory of Parquet copies of parsed sheets (no copies if None)
+
+    Returns:
+        DataFrame with the requested columns in sheet order
+    """
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Unknown Excel engine '{engine}', expected one of {EXCEL_ENGINES}")
+    name = str(getattr(source, 'name', source)) if not isinstance(source, bytes) else ''
+    if isinstance(source, (str, Path)):
+        data = Path(source).read_bytes()
+    elif isinstance(source, bytes):
+        data = source
+    else:
+        data = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = _cache_path(cache_dir, data, sheet_name, usecols)
+        if cache_path.exists():
+            return _read_columnar(cache_path)
+
+    is_xls = name.lower().endswith('.xls') or data[:4] == b'\xd0\xcf\x11\xe0'
+    fallback = engine == 'auto'
+    if engine == 'auto':
+        engine = 'calamine' if calamine_available() else 'openpyxl' if is_xls else 'stream'
+    df = None
+    if engine == 'stream':
+        try:
+            df = read_xlsx_stream(data, usecols, sheet_name)
+        except Exception as e:
+            if not fallback:
+                raise
+            # markup the built-in reader does not handle: pandas' reader decides (and raises its own errors)
+            print(f"Reading {name or 'workbook'} with pd.read_excel: {type(e).__name__}: {e}")
+    if df is None:
+        df = pd.read_excel(io.BytesIO(data), usecols=usecols, sheet_name=sheet_name,
+                           engine='calamine' if engine == 'calamine' else None)
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            df.to_parquet(cache_path, index=False)
+        except (ValueError, TypeError, ImportError) as e:
+            # mixed-type columns cannot be stored as Parquet; the sheet is simply parsed again next time
+            print(f"Not caching {name or 'workbook'} as Parquet: {e}")
+            cache_path.unlink(missing_ok=True)
+    return df
@@ -0,0 +1,173 @@
+"""
+Export layer for filtering results - used by the Streamlit downloads and by headless runs
+
+Supported formats:
+- csv:      plain CSV
+- csv.gz:   gzip compressed CSV
+- parquet:  columnar Parquet file (pyarrow)
+- xlsx:     workbook with one sheet per result frame, written row by row with
+            xlsxwriter's constant memory mode
+"""
+import io
+import threading
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.components.title_normalization import TITLE_FEATURE_COLUMNS
+
+EXPORT_FORMATS = {
+    'csv': {'suffix': '.csv', 'mime': 'text/csv', 'label': 'CSV'},
+    'csv.gz': {'suffix': '.csv.gz', 'mime': 'application/gzip', 'label': 'CSV (gzip)'},
+    'parquet': {'suffix': '.parquet', 'mime': 'application/vnd.apache.parquet', 'label': 'Parquet'},
+    'xlsx': {'suffix': '.xlsx', 'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'label': 'Excel (XLSX)'},
+}
+
+# sheet names of the standard result export
+ALL_PROFILES_SHEET = 'All Profiles'
+TOP_PROFILES_SHEET = 'AI Top 25%'
+APPROVED_SHEET = 'Approved Candidates'
+
+
+def export_format_from_path(path) -> str:
+    """
+    Infer the export format from a file name, e.g. 'results.csv.gz' -> 'csv.gz'
+    """
+    name = Path(path).name.lower()
+    for fmt, spec in sorted(EXPORT_FORMATS.items(), key=lambda item: -len(item[1]['suffix'])):
+        if name.endswith(spec['suffix']):
+            return fmt
+    raise ValueError(f"Cannot infer export format from '{path}', expected one of {list(EXPORT_FORMATS)}")
+
+
+def export_file_name(base_name: str, fmt: str) -> str:
+    """
+    File name for a download in the given format
+    """
+    return f"{base_name}{EXPORT_FORMATS[fmt]['suffix']}"
+
+
+def _write_xlsx(sheets: dict, target, chunksize: int) -> None:
+    import xlsxwriter
+
+    # constant_memory flushes every row to a temp file once the next row starts,
+    # so rows must be written strictly in order
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'remove_timezone': True, 'strings_to_urls': False})
+    try:
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name[:31])
+            worksheet.write_row(0, 0, [str(col) for col in df.columns])
+            row_num = 1
+            for start in range(0, len(df), chunksize):
+                chunk = df.iloc[start:start + chunksize].astype(object)
+                chunk = chunk.where(chunk.notna(), None)
+                for values in chunk.itertuples(index=False, name=None):
+                    worksheet.write_row(row_num, 0, values)
+                    row_num += 1
+    finally:
+        workbook.close()
+
+
+def write_export(sheets: dict, target, fmt: str = None, chunksize: int = 10000) -> None:
+    """
+    Write result frames to a path or a binary file handle
+
+    Args:
+        sheets: Mapping of sheet name -> DataFrame. Only 'xlsx' accepts more than one sheet.
+        target: File path or binary file handle
+        fmt: One of EXPORT_FORMATS (inferred from the path if not given)
+        chunksize: Rows converted and written per batch
+    """
+    fmt = fmt or export_format_from_path(target)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {list(EXPORT_FORMATS)}")
+    if fmt != 'xlsx' and len(sheets) != 1:
+        raise ValueError(f"The '{fmt}' format holds a single result frame, got {len(sheets)}")
+
+    if fmt == 'xlsx':
+        _write_xlsx(sheets, target, chunksize)
+        return
+
+    df = next(iter(sheets.values()))
+    if fmt == 'parquet':
+        df.to_parquet(target, index=False)
+    else:
+        compression = {'method': 'gzip', 'mtime': 0} if fmt == 'csv.gz' else None
+        df.to_csv(target, index=False, encoding='utf-8', compression=compression, chunksize=chunksize)
+
+
+def export_bytes(sheets: dict, fmt: str) -> bytes:
+    """
+    Render result frames to an in-memory file in the given format
+    """
+    buffer = io.BytesIO()
+    write_export(sheets, buffer, fmt)
+    return buffer.getvalue()
+
+
+def export_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Result frame without the working columns of the pipeline (seniority_level, title_length)
+    """
+    return df.drop(columns=[col for col in TITLE_FEATURE_COLUMNS if col in df.columns])
+
+
+def result_sheets(filtered_df: pd.DataFrame, top_df: pd.DataFrame = None, original_df: pd.DataFrame = None) -> dict:
+    """
+    Standard set of result sheets: original upload, AI top 25% and all approved candidates
+    """
+    sheets = {}
+    if original_df is not None:
+        sheets[ALL_PROFILES_SHEET] = original_df
+    if top_df is not None:
+        sheets[TOP_PROFILES_SHEET] = export_columns(top_df)
+    sheets[APPROVED_SHEET] = export_columns(filtered_df)
+    return sheets
+
+
+def write_results(path, filtered_df: pd.DataFrame, top_df: pd.DataFrame = None, original_df: pd.DataFrame = None) -> None:
+    """
+    Headless export of a filtering run. An .xlsx path gets all result sheets,
+    any other format gets the approved candidates only.
+    """
+    fmt = export_format_from_path(path)
+    if fmt == 'xlsx':
+        sheets = result_sheets(filtered_df, top_df, original_df)
+    else:
+        sheets = {APPROVED_SHEET: export_columns(filtered_df)}
+    write_export(sheets, path, fmt)
+
+
+class ExportCache:
+    """
+    Memoized export payloads for one version of the results.
+
+    Payloads are only rendered when first requested and are kept until the
+    results change (a new version), so reruns of the results section never
+    re-serialize the same frame.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def set_version(self, version) -> None:
+        """Drop all payloads if the results changed"""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._payloads = {}
+
+    def get(self, key, fmt: str, sheets_factory) -> bytes:
+        """
+        Return the payload for ``key`` in ``fmt``, rendering it with ``sheets_factory()`` on first use
+        """
+        with self._lock:
+            if (key, fmt) not in self._payloads:
+                self._payloads[(key, fmt)] = export_bytes(sheets_factory(), fmt)
+            return self._payloads[(key, fmt)]
+
+    def loader(self, key, fmt: str, sheets_factory):
+        """
+        Zero-argument callable for ``st.download_button(data=...)`` - rendering is deferred to the click
+        """
+        return lambda: self.get(key, fmt, sheets_factory)
@@ -0,0 +1,164 @@
+"""
+Multi-file ingestion - parses several CSV/Excel profile exports concurrently and merges them into one frame
+
+Schemas are reconciled before merging: header whitespace is stripped, columns
+are aligned by name (the union of all files, in first-seen order) and columns
+missing from a file are filled with missing values.
+"""
+import io
+import time
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.profile_filtering_system.utils.excel import read_excel_fast
+from src.profile_filtering_system.utils.string_engine import check_engine
+from src.profile_filtering_system.utils.upload_cache import content_key
+
+SUPPORTED_SUFFIXES = ('.csv', '.xlsx', '.xls')
+EXECUTORS = ('thread', 'process')
+
+
+def _source_name(source, name: str = None) -> str:
+    if name is not None:
+        return name
+    return getattr(source, 'name', None) or str(source)
+
+
+def read_profile_file(source, name: str = None, engine: str = 'pandas', excel_cache_dir=None) -> pd.DataFrame:
+    """
+    Parse one CSV or Excel file
+
+    Args:
+        source: File path, binary file handle (e.g. a Streamlit UploadedFile) or raw bytes
+        name: File name used to pick the parser (defaults to the source's name)
+        engine: 'pandas' or 'pyarrow' (CSV only)
+        excel_cache_dir: Directory of Parquet copies of parsed Excel files (see read_excel_fast)
+
+    Returns:
+        Parsed DataFrame with stripped column names
+    """
+    from src.profile_filtering_system.utils.common import read_csv_arrow
+
+    check_engine(engine)
+    name = _source_name(source, name)
+    suffix = Path(name).suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError(f"Unsupported file type '{suffix}' of '{name}', expected one of {SUPPORTED_SUFFIXES}")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if suffix == '.csv' and engine == 'pyarrow':
+        df = read_csv_arrow(source if not isinstance(source, Path) else str(source))
+    elif suffix == '.csv':
+        df = pd.read_csv(source)
+    else:
+        df = read_excel_fast(source, cache_dir=excel_cache_dir)
+    df.columns = [str(col).strip() for col in df.columns]
+    return df
+
+
+def _source_bytes(source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        position = source.tell()
+        data = source.read()
+        source.seek(position)
+        return data
+    return Path(source).read_bytes()
+
+
+def _timed_read(source, name: str, engine: str, excel_cache_dir=None) -> tuple:
+    started = time.perf_counter()
+    df = read_profile_file(source, name, engine, excel_cache_dir)
+    return df, time.perf_counter() - started
+
+
+def reconcile_frames(frames: list) -> pd.DataFrame:
+    """
+    Merge frames with differing schemas into one frame
+
+    Columns are aligned by name in first-seen order; a column missing from a
+    file is filled with missing values for that file's rows.
+    """
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        # nothing to align: the parsed frame is returned as is (no copy)
+        return frames[0]
+    columns = list(dict.fromkeys(col for df in frames for col in df.columns))
+    # an empty slice of the column from the first file that has it: reindexing it gives missing values of a matching dtype
+    templates = {}
+    for df in frames:
+        for col in df.columns:
+            templates.setdefault(col, df[col].iloc[:0])
+
+    aligned = []
+    for df in frames:
+        if list(df.columns) != columns:
+            df = df.assign(**{
+                col: templates[col].reindex(range(len(df))).set_axis(df.index)
+                for col in columns if col not in df.columns
+            })[columns]
+        aligned.append(df)
+    return pd.concat(aligned, ignore_index=True)
+
+
+def read_profile_files(sources, names: list = None, engine: str = 'pandas',
+                       executor: str = 'thread', max_workers: int = None, cache=None, excel_cache_dir=None) -> tuple:
+    """
+    Parse several profile files concurrently and merge them into one frame
+
+    Threads suit CSV parsing (the pandas and pyarrow parsers release the GIL);
+    'process' helps with several large Excel files, whose parsers are Python code.
+
+    Args:
+        sources: File paths, binary file handles or raw bytes
+        names: File names, defaults to each source's name
+        engine: 'pandas' or 'pyarrow' (CSV only)
+        executor: 'thread' or 'process'
+        max_workers: Pool size, defaults to one worker per file
+        cache: ParsedFileCache; files whose content was parsed before are taken from it
+        excel_cache_dir: Directory of Parquet copies of parsed Excel files, kept across restarts
+
+    Returns:
+        Tuple of (merged DataFrame in file order, per-file metrics list)
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+    check_engine(engine)
+    sources = list(sources)
+    names = [_source_name(source, name) for source, name in zip(sources, names or [None] * len(sources))]
+    keys = [None] * len(sources)
+    if cache is not None:
+        # the parsers read from the bytes that were hashed, so a file handle is read only once
+        sources = [_source_bytes(source) for source in sources]
+        keys = [content_key(data, name, engine) for data, name in zip(sources, names)]
+    elif executor == 'process':
+        # file handles cannot be sent to worker processes - send their content
+        sources = [source.getvalue() if hasattr(source, 'getvalue') else source for source in sources]
+
+    cached = [cache.get(key) if cache is not None else None for key in keys]
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    frames, metrics = [], []
+    with pool_class(max_workers=max_workers or max(1, len(sources))) as pool:
+        futures = [pool.submit(_timed_read, source, name, engine, excel_cache_dir) if hit is None else None
+                   for source, name, hit in zip(sources, names, cached)]
+        # results are collected in file order as they finish, so the merge keeps the upload order
+        for name, key, hit, future in zip(names, keys, cached, futures):
+            if hit is not None:
+                df, seconds = hit, 0.0
+            else:
+                df, seconds = future.result()
+                if cache is not None:
+                    cache.put(key, df)
+            frames.append(df)
+            metrics.append({'file': name, 'rows': len(df), 'columns': len(df.columns), 'seconds': round(seconds, 4),
+                            'cached': hit is not None})
+
+    all_columns = set(col for df in frames for col in df.columns)
+    for df, metric in zip(frames, metrics):
+        metric['missing_columns'] = ', '.join(sorted(all_columns - set(df.columns)))
+    return reconcile_frames(frames), metrics
@@ -0,0 +1,177 @@
+"""
+Background jobs - pipeline runs executed by a worker pool outside the Streamlit script run
+
+A job belongs to the server process, not to a browser session: reruns, page
+reloads and closed tabs do not stop it. The UI keeps the job id (in the session
+state and the page URL), polls ``snapshot()`` for the per-stage progress and
+takes the result once the job is done. At most ``max_concurrent_jobs`` jobs run
+at the same time; later submissions wait in the queue.
+
+``cancel()`` sets the job's cancel event; a pipeline run given that event stops
+at its next chunk or LLM batch boundary and the job ends as cancelled.
+
+Job ids (12 hex digits) also name the run's checkpoint directory, so ids coming
+from outside (the page URL) are checked with ``is_job_id`` before use.
+"""
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.profile_filtering_system.constants import background_jobs
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+# format of the ids given to new jobs
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{12}')
+
+
+def is_job_id(value) -> bool:
+    """True for a string in the format of the job ids (never a path)"""
+    return isinstance(value, str) and JOB_ID_PATTERN.fullmatch(value) is not None
+
+
+class Job:
+    """
+    State of one background run, updated by the worker thread and read by the UI
+    """
+
+    def __init__(self, name: str = '', job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = QUEUED
+        self.stages = []
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # passed to the run (ProfilesFiltering(cancel_event=...)), set by cancel()
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def cancel(self) -> None:
+        """Ask the run to stop (a queued job does not start)"""
+        self.cancel_event.set()
+
+    def record_stage(self, metric: dict) -> None:
+        """Stage callback: a pipeline stage finished"""
+        with self._lock:
+            self.stages.append(dict(metric))
+
+    def set_progress(self, done: int, total: int) -> None:
+        """Progress callback of the running stage (e.g. reasons generated so far)"""
+        with self._lock:
+            self.progress = (done, total)
+
+    def snapshot(self) -> dict:
+        """Snapshot of the job for display"""
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                'id': self.id,
+                'name': self.name,
+                'status': self.status,
+                'stages': [dict(stage) for stage in self.stages],
+                'current_stage': self.stages[-1]['stage'] if self.stages else None,
+                'progress': self.progress,
+                'error': self.error,
+                'seconds': round(end - self.started_at, 1) if self.started_at else 0.0,
+            }
+
+
+class JobManager:
+    """
+    Worker pool running pipeline jobs
+
+    Usage:
+        job_id = get_job_manager().submit(run, name='AI event')  # run(job) returns the result
+        get_job_manager().get(job_id).snapshot()
+    """
+
+    def __init__(self, max_workers: int = None, max_finished: int = None):
+        self.max_workers = max_workers or background_jobs['max_concurrent_jobs']
+        self.max_finished = max_finished or background_jobs['max_finished_jobs']
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pipeline-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, name: str = '', job_id: str = None) -> str:
+        """
+        Queue ``func(job)``; its return value becomes ``job.result``
+
+        Args:
+            func: The run, called with its Job
+            name: Display name
+            job_id: Id of a finished job to run again under the same id (e.g. to resume it), a new id if None
+
+        Returns:
+            Job id
+        """
+        if job_id is not None and not is_job_id(job_id):
+            raise ValueError(f"Invalid job id {job_id!r}")
+        job = Job(name, job_id)
+        with self._lock:
+            previous = self._jobs.get(job.id)
+            if previous is not None and not previous.finished:
+                raise ValueError(f"Job {job.id} is still {previous.status}")
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, func)
+        return job.id
+
+    def _run(self, job: Job, func) -> None:
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            if job.cancel_event.is_set():
+                status = CANCELLED
+            else:
+                job.result = func(job)
+                status = DONE
+        except Exception as error:
+            job.error = f"{type(error).__name__}: {error}"
+            job.traceback = traceback.format_exc()
+            # the run raised because it was cancelled (RunCancelled), or failed on its own
+            status = CANCELLED if job.cancel_event.is_set() else FAILED
+        # the status is set last: a finished job always has its result (or error) and finish time
+        job.finished_at = time.time()
+        job.status = status
+
+    def _prune(self) -> None:
+        # the oldest finished jobs (and their results) are dropped first; queued and running jobs are kept
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.finished_at)[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str):
+        """The job with this id, None if unknown (or already pruned)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        """All known jobs, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """The process-wide job manager shared by all Streamlit sessions"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,48 @@
+"""
+Live results table - shows finished rows while the rest of the results are still being generated
+
+Rows are written into blocks of at most ``block_rows`` rows, each block in its own
+placeholder. Appending a row redraws only the open block, so every update sends
+a few rows over the websocket instead of the whole table; a full block is left
+as it is and the next row opens a new one.
+"""
+import pandas as pd
+
+
+class LiveTable:
+    """
+    Incrementally growing table in a Streamlit container
+
+    Usage:
+        table = LiveTable(st.container(), ['fullName', 'title', 'llm_reason'])
+        for label, reason in stream_reasons(...):
+            table.append({...})
+    """
+
+    def __init__(self, container, columns: list, block_rows: int = 20, **dataframe_kwargs):
+        """
+        Args:
+            container: Streamlit container (or any object with ``empty()``) the blocks are added to
+            columns: Columns shown, in order
+            block_rows: Rows per block
+            dataframe_kwargs: Passed to ``st.dataframe`` for every block
+        """
+        self.container = container
+        self.columns = list(columns)
+        self.block_rows = block_rows
+        self.dataframe_kwargs = {'hide_index': True, **dataframe_kwargs}
+        self.rows = 0
+        self._block = []
+        self._placeholder = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def append(self, row: dict) -> None:
+        """Add one finished row (missing columns are shown empty)"""
+        if self._placeholder is None or len(self._block) == self.block_rows:
+            self._placeholder = self.container.empty()
+            self._block = []
+        self._block.append({col: row.get(col) for col in self.columns})
+        self.rows += 1
+        self._placeholder.dataframe(pd.DataFrame(self._block, columns=self.columns), **self.dataframe_kwargs)
@@ -2,10 +2,11 @@ import pandas as pd
 from src.profile_filtering_system.utils.prompts import reason_generation_prompt
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from src.profile_filtering_system.utils.llm_scheduler import get_scheduler
 
 load_dotenv()
 
-model = ChatOpenAI()
+model = ChatOpenAI(max_retries=0)
 
 def generate_llm_reason(row, topic, sub_topic, event_location):
     profile = {
@@ -23,7 +24,7 @@ def generate_llm_reason(row, topic, sub_topic, event_location):
         sub_topic=sub_topic,
         event_location=event_location
     )
-    response = model.invoke(prompt)
+    response = get_scheduler().invoke(model, prompt)
     if hasattr(response, 'content'):
         return response.content.strip()
     return str(response).strip()
@@ -0,0 +1,283 @@
+"""
+LLM request scheduler - every OpenAI call of the process goes through one shared scheduler
+
+- Token buckets enforce the requests/min and tokens/min limits. Tokens are
+  reserved from an estimate before the call and corrected with the reported usage.
+- Rate limit (429) and transient errors (timeouts, connection errors, 5xx) are
+  retried with exponential backoff and full jitter; a ``retry-after`` header is
+  honored and pauses every caller, not only the one that was rejected.
+- Concurrency adapts with AIMD: each success adds 1/limit to the limit, a 429
+  or a call slower than the target latency halves it.
+
+The scheduler is a process-wide singleton (``get_scheduler``), so the limits are
+shared by all threads and all Streamlit sessions of the server process.
+"""
+import random
+import threading
+import time
+from src.profile_filtering_system.constants import llm_rate_limits
+
+_RETRYABLE_ERRORS = ('APITimeoutError', 'APIConnectionError', 'InternalServerError', 'ServiceUnavailableError',
+                     'Timeout', 'ConnectTimeout', 'ReadTimeout', 'ConnectError')
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute / 60`` per second
+    """
+
+    def __init__(self, per_minute: float, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._level = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take ``amount`` tokens, waiting until they are available
+
+        Returns:
+            Seconds waited
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return waited
+                wait = (amount - self._level) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+    def adjust(self, delta: float) -> None:
+        """Take ``delta`` more tokens (or give back a negative delta) once the real cost is known"""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level - delta)
+
+    @property
+    def level(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._level
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def is_retryable_error(error: Exception) -> bool:
+    if is_rate_limit_error(error):
+        return True
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def retry_after_seconds(error: Exception):
+    """The server's requested wait from ``retry-after-ms`` / ``retry-after`` headers, None if absent"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after') is not None:
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def estimate_tokens(prompt) -> int:
+    """Rough prompt size (about 4 characters per token)"""
+    return max(1, len(str(prompt)) // 4)
+
+
+def _usage_tokens(response):
+    usage = getattr(response, 'usage_metadata', None) or {}
+    total = usage.get('total_tokens') if isinstance(usage, dict) else None
+    return int(total) if total else None
+
+
+class LLMScheduler:
+    """
+    Rate-limit-aware scheduler for LLM calls (see module docstring)
+    """
+
+    def __init__(self, limits: dict = None, clock=time.monotonic, sleep=time.sleep):
+        limits = {**llm_rate_limits, **(limits or {})}
+        self.limits = limits
+        self._clock = clock
+        self._sleep = sleep
+        self.requests = TokenBucket(limits['requests_per_minute'], clock, sleep)
+        self.tokens = TokenBucket(limits['tokens_per_minute'], clock, sleep)
+
+        self.concurrency_limit = float(limits['initial_concurrency'])
+        self._active = 0
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._slots = threading.Condition()
+        self.stats = {'calls': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0, 'slow_calls': 0, 'waited_seconds': 0.0}
+
+    @property
+    def max_concurrency(self) -> int:
+        return int(self.limits['max_concurrency'])
+
+    # --- concurrency (AIMD) ---
+    def _acquire_slot(self) -> None:
+        with self._slots:
+            while self._active >= max(1, int(self.concurrency_limit)):
+                self._slots.wait()
+            self._active += 1
+
+    def _release_slot(self) -> None:
+        with self._slots:
+            self._active -= 1
+            self._slots.notify_all()
+
+    def _increase(self) -> None:
+        with self._slots:
+            self.concurrency_limit = min(self.limits['max_concurrency'], self.concurrency_limit + 1.0 / self.concurrency_limit)
+            self._slots.notify_all()
+
+    def _decrease(self) -> None:
+        with self._slots:
+            now = self._clock()
+            # one decrease per congestion event: many callers failing together halve the limit once
+            if now - self._last_decrease < self.limits['base_delay_seconds']:
+                return
+            self._last_decrease = now
+            self.concurrency_limit = max(self.limits['min_concurrency'], self.concurrency_limit / 2.0)
+
+    # --- pacing ---
+    def _wait_for_pause(self) -> None:
+        while True:
+            with self._slots:
+                remaining = self._paused_until - self._clock()
+            if remaining <= 0:
+                return
+            self._sleep(remaining)
+            self._count('waited_seconds', remaining)
+
+    def _pause(self, seconds: float) -> None:
+        with self._slots:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: uniform between 0 and the capped exponential delay
+        cap = min(self.limits['max_delay_seconds'], self.limits['base_delay_seconds'] * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def _count(self, key: str, value=1) -> None:
+        with self._slots:
+            self.stats[key] += value
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """Book a retryable error and return the delay before the next attempt"""
+        self._count('retries')
+        delay = self._backoff(attempt)
+        if is_rate_limit_error(error):
+            self._count('rate_limited')
+            self._decrease()
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                # the server's wait plus a little jitter so callers do not return in lockstep
+                delay = retry_after + random.uniform(0, self.limits['base_delay_seconds'])
+            self._pause(delay)
+        return delay
+
+    def _on_success(self, result, latency: float, estimated_tokens: int) -> None:
+        actual = _usage_tokens(result)
+        if actual is not None:
+            self.tokens.adjust(actual - estimated_tokens)
+        if latency > self.limits['target_latency_seconds']:
+            self._count('slow_calls')
+            self._decrease()
+        else:
+            self._increase()
+
+    def call(self, func, *args, estimated_tokens: int = None, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` within the rate limits, retrying rate limit and transient errors
+
+        Args:
+            func: The LLM call
+            estimated_tokens: Tokens reserved before the call (prompt + expected completion)
+
+        Returns:
+            The result of ``func``; the last error is raised once retries are exhausted
+        """
+        estimated_tokens = estimated_tokens or self.limits['expected_output_tokens']
+        for attempt in range(self.limits['max_retries'] + 1):
+            self._wait_for_pause()
+            self._acquire_slot()
+            try:
+                self._count('waited_seconds', self.requests.acquire(1) + self.tokens.acquire(estimated_tokens))
+                self._count('calls')
+                started = self._clock()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as error:
+                    if attempt == self.limits['max_retries'] or not is_retryable_error(error):
+                        self._count('failures')
+                        raise
+                    delay = self._on_error(error, attempt)
+                else:
+                    self._on_success(result, self._clock() - started, estimated_tokens)
+                    return result
+            finally:
+                self._release_slot()
+            # retries wait outside the concurrency slot
+            self._sleep(delay)
+
+    def invoke(self, llm, prompt, **kwargs):
+        """
+        ``llm.invoke(prompt)`` through the scheduler, reserving the estimated prompt + completion tokens
+        """
+        estimated = estimate_tokens(prompt) + self.limits['expected_output_tokens']
+        return self.call(llm.invoke, prompt, estimated_tokens=estimated, **kwargs)
+
+    def stream(self, llm, prompt, on_text, **kwargs):
+        """
+        ``llm.stream(prompt)`` through the scheduler, calling ``on_text`` with the text received so far
+
+        A retried attempt streams from the start again, so ``on_text`` always gets the text
+        of the current attempt.
+
+        Returns:
+            The merged message of all chunks
+        """
+        def consume():
+            message, text = None, ''
+            for chunk in llm.stream(prompt, **kwargs):
+                message = chunk if message is None else message + chunk
+                text += chunk.content if hasattr(chunk, 'content') else str(chunk)
+                on_text(text)
+            return message
+
+        estimated = estimate_tokens(prompt) + self.limits['expected_output_tokens']
+        return self.call(consume, estimated_tokens=estimated)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """The process-wide scheduler used by every LLM call site"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
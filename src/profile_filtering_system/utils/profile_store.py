@@ -0,0 +1,195 @@
+"""
+Local profile store - accumulates uploaded exports across events in SQLite with an FTS5 full-text index
+
+Profiles are keyed by their identity key (profile URL, then vmid, then LinkedIn
+URL - see ``deduplication.identity_keys``); re-ingesting an export only writes
+new or changed profiles. The full row is kept as JSON next to normalized
+(lowercased, whitespace collapsed) title / title description / summary /
+company / location columns. Title, title description and summary are indexed
+with FTS5, so the stage 8 keyword criteria can preselect candidates with an
+indexed query and only that small candidate set is loaded into pandas.
+"""
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.components.deduplication import identity_keys
+from src.profile_filtering_system.constants import profile_store_path
+
+# normalized column -> source column of the export
+NORMALIZED_COLUMNS = {
+    'title_norm': 'title',
+    'description_norm': 'titleDescription',
+    'summary_norm': 'summary',
+    'company_norm': 'companyName',
+    'location_norm': 'location',
+}
+# normalized columns in the full-text index (the text read by the keyword criteria)
+INDEXED_COLUMNS = ['title_norm', 'description_norm', 'summary_norm']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    profile_key TEXT NOT NULL UNIQUE,
+    content_hash INTEGER NOT NULL,
+    {', '.join(f'{col} TEXT' for col in NORMALIZED_COLUMNS)},
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+    {', '.join(INDEXED_COLUMNS)},
+    content='profiles', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS profiles_ai AFTER INSERT ON profiles BEGIN
+    INSERT INTO profiles_fts(rowid, {', '.join(INDEXED_COLUMNS)})
+    VALUES (new.id, {', '.join('new.' + col for col in INDEXED_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_ad AFTER DELETE ON profiles BEGIN
+    INSERT INTO profiles_fts(profiles_fts, rowid, {', '.join(INDEXED_COLUMNS)})
+    VALUES ('delete', old.id, {', '.join('old.' + col for col in INDEXED_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_au AFTER UPDATE ON profiles BEGIN
+    INSERT INTO profiles_fts(profiles_fts, rowid, {', '.join(INDEXED_COLUMNS)})
+    VALUES ('delete', old.id, {', '.join('old.' + col for col in INDEXED_COLUMNS)});
+    INSERT INTO profiles_fts(rowid, {', '.join(INDEXED_COLUMNS)})
+    VALUES (new.id, {', '.join('new.' + col for col in INDEXED_COLUMNS)});
+END;
+"""
+
+_STORED_COLUMNS = ['profile_key', 'content_hash', *NORMALIZED_COLUMNS, 'data']
+
+
+def normalize_text(series: pd.Series) -> pd.Series:
+    """Lowercase and collapse whitespace, missing values become ''"""
+    return series.fillna('').astype(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _fts_query(keywords: list) -> str:
+    # every keyword is a quoted FTS5 string, so punctuation in keywords is never parsed as query syntax
+    terms = dict.fromkeys('"' + str(kw).lower().replace('"', '""') + '"' for kw in keywords if str(kw).strip())
+    return ' OR '.join(terms)
+
+
+class ProfileStore:
+    """
+    SQLite profile store with a full-text index on the text the keyword criteria read
+
+    Usage:
+        with ProfileStore() as store:
+            store.ingest(df)
+            candidates = store.shortlist(class_a_keywords)
+    """
+
+    def __init__(self, path=None):
+        self.path = str(profile_store_path if path is None else path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS staging ({', '.join(_STORED_COLUMNS)})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM profiles').fetchone()[0]
+
+    def _records(self, df: pd.DataFrame, keys: np.ndarray) -> list:
+        data = df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').strip().split('\n')
+        # signed 64-bit, the range of an SQLite INTEGER
+        content_hashes = pd.util.hash_array(np.asarray(data, dtype=object)).view(np.int64)
+        normalized = [
+            normalize_text(df[source]) if source in df.columns else pd.Series('', index=df.index)
+            for source in NORMALIZED_COLUMNS.values()
+        ]
+        return list(zip(keys.tolist(), content_hashes.tolist(), *(col.tolist() for col in normalized), data))
+
+    def ingest(self, df: pd.DataFrame, key_columns: list = None, chunksize: int = 50000) -> dict:
+        """
+        Add an export to the store; profiles already stored are only rewritten if their content changed
+
+        Args:
+            df: Uploaded profiles
+            key_columns: Identity columns in priority order (defaults to dedup_key_columns)
+            chunksize: Rows written per transaction
+
+        Returns:
+            Counts of inserted, updated, unchanged, duplicate (repeated key within ``df``,
+            the last one is kept) and skipped (no identity key) rows
+        """
+        keys, has_key = identity_keys(df, key_columns)
+        # the last occurrence of a key wins - later rows come from newer exports
+        latest = has_key & ~pd.Series(keys).duplicated(keep='last').to_numpy()
+        counts = {
+            'inserted': 0, 'updated': 0, 'unchanged': 0,
+            'duplicates': int(has_key.sum() - latest.sum()), 'skipped': int((~has_key).sum()),
+        }
+        positions = np.flatnonzero(latest)
+        columns = ', '.join(_STORED_COLUMNS)
+        updates = ', '.join(f'{col} = excluded.{col}' for col in _STORED_COLUMNS[1:])
+
+        for start in range(0, len(positions), chunksize):
+            chunk = positions[start:start + chunksize]
+            records = self._records(df.iloc[chunk], keys[chunk])
+            with self.conn:
+                self.conn.execute('DELETE FROM staging')
+                self.conn.executemany(f"INSERT INTO staging VALUES ({', '.join('?' * len(_STORED_COLUMNS))})", records)
+                inserted, updated = self.conn.execute("""
+                    SELECT SUM(p.id IS NULL), SUM(p.id IS NOT NULL AND p.content_hash != s.content_hash)
+                    FROM staging s LEFT JOIN profiles p ON p.profile_key = s.profile_key
+                """).fetchone()
+                # 'WHERE true' resolves the parsing ambiguity of INSERT ... SELECT ... ON CONFLICT
+                self.conn.execute(f"""
+                    INSERT INTO profiles ({columns}) SELECT {columns} FROM staging WHERE true
+                    ON CONFLICT(profile_key) DO UPDATE SET {updates}
+                    WHERE profiles.content_hash != excluded.content_hash
+                """)
+            counts['inserted'] += inserted or 0
+            counts['updated'] += updated or 0
+            counts['unchanged'] += len(chunk) - (inserted or 0) - (updated or 0)
+        return counts
+
+    def keyword_candidate_ids(self, class_a_keywords: list) -> list:
+        """
+        Ids of the stored profiles that can pass a stage 8 keyword criteria
+
+        Every criteria needs at least one Class A keyword in the title, title
+        description or summary, so this indexed query returns a superset of the
+        profiles keyword matching accepts; the exact criteria still run on the result.
+        """
+        query = _fts_query(class_a_keywords)
+        if not query:
+            return []
+        rows = self.conn.execute('SELECT rowid FROM profiles_fts WHERE profiles_fts MATCH ? ORDER BY rowid', (query,))
+        return [row[0] for row in rows]
+
+    def fetch(self, ids: list = None, chunksize: int = 50000) -> pd.DataFrame:
+        """
+        Load stored profiles (all of them if ``ids`` is None) as a DataFrame in ingestion order
+        """
+        if ids is None:
+            rows = [row[0] for row in self.conn.execute('SELECT data FROM profiles ORDER BY id')]
+        else:
+            rows = []
+            for start in range(0, len(ids), chunksize):
+                rows.extend(row[0] for row in self.conn.execute(
+                    'SELECT data FROM profiles WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id',
+                    (json.dumps(list(ids[start:start + chunksize])),)
+                ))
+        df = pd.DataFrame.from_records([json.loads(row) for row in rows])
+        # JSON nulls come back as None, the uploaded files had NaN
+        return df.where(df.notna(), np.nan) if not df.empty else df
+
+    def shortlist(self, class_a_keywords: list) -> pd.DataFrame:
+        """
+        Candidate profiles for an event: the stored profiles that can pass the keyword criteria
+        """
+        return self.fetch(self.keyword_candidate_ids(class_a_keywords))
@@ -0,0 +1,173 @@
+"""
+Prompt builder for the reasoning stage - compact profile block within a token budget
+
+The reason prompt used to embed ``str(profile_dict)`` with the full summary and
+empty keys. The compact block keeps the same fields as ``key: value`` lines,
+drops empty ones, and reduces the summary to the sentences that contain a
+matched Class A/B keyword (leading sentences if none match) until the profile
+token budget is spent. ``prompt_token_stats`` accumulates the prompt tokens
+saved against the original format.
+"""
+import re
+import threading
+import pandas as pd
+from src.profile_filtering_system.constants import reason_prompt_token_budget
+from src.profile_filtering_system.utils.llm_scheduler import estimate_tokens
+from src.profile_filtering_system.utils.prompts import reason_generation_llm_prompt
+
+# profile fields of the reason prompt, in prompt order
+REASON_PROFILE_FIELDS = ['title', 'companyName', 'Companies Category', 'location', 'companyLocation', 'description', 'summary']
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\s*\n+\s*')
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and pd.isna(value):
+        return True
+    return str(value).strip() in ('', 'nan', 'None')
+
+
+def raw_profile(row) -> dict:
+    """The profile dict of the original reason prompt (all keys, raw values)"""
+    return {
+        'title': row.get('title', ''),
+        'companyName': row.get('companyName', ''),
+        'summary': row.get('summary', ''),
+        'description': row.get('description', ''),
+        'location': row.get('location', ''),
+        'companyLocation': row.get('companyLocation', ''),
+        'Companies Category': row.get('Companies Category', '')
+    }
+
+
+def _trim_words(text: str, budget: int) -> str:
+    words = text.split()
+    kept = []
+    for word in words:
+        if estimate_tokens(' '.join(kept + [word])) > budget:
+            break
+        kept.append(word)
+    return ' '.join(kept) + (' ...' if len(kept) < len(words) else '')
+
+
+def compact_summary(summary: str, keywords: list, budget: int) -> str:
+    """
+    Sentences of ``summary`` that contain one of ``keywords`` (all sentences if none does),
+    in their original order, until ``budget`` tokens are used
+    """
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(str(summary)) if s and s.strip()]
+    keyword_set = {str(kw).lower() for kw in keywords or []}
+    matching = [s for s in sentences if keyword_set & set(_WORD_PATTERN.findall(s.lower()))]
+    selected = matching or sentences
+
+    kept, used = [], 0
+    for sentence in selected:
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            if not kept:
+                # a single long sentence is cut at the budget rather than dropped
+                kept.append(_trim_words(sentence, budget))
+            break
+        kept.append(sentence)
+        used += cost
+    return ' '.join(kept)
+
+
+def compact_profile(row, keywords: list = None, token_budget: int = None) -> str:
+    """
+    Compact ``key: value`` profile block for the reason prompt
+
+    Args:
+        row: Profile row
+        keywords: Matched Class A/B keywords used to pick summary sentences
+        token_budget: Maximum estimated tokens of the block (defaults to reason_prompt_token_budget)
+
+    Returns:
+        Profile text, one field per line, empty fields dropped
+    """
+    token_budget = reason_prompt_token_budget if token_budget is None else token_budget
+    profile = raw_profile(row)
+    if not _is_empty(profile['companyLocation']) and str(profile['companyLocation']).strip() == str(profile['location']).strip():
+        profile['companyLocation'] = ''
+
+    lines = [f"{field}: {str(profile[field]).strip()}" for field in REASON_PROFILE_FIELDS
+             if field != 'summary' and not _is_empty(profile[field])]
+    remaining = token_budget - estimate_tokens('\n'.join(lines))
+    if not _is_empty(profile['summary']) and remaining > 0:
+        summary = compact_summary(profile['summary'], keywords, remaining - estimate_tokens('summary: '))
+        if summary:
+            lines.append(f"summary: {summary}")
+    return '\n'.join(lines)
+
+
+class PromptTokenStats:
+    """Thread-safe running totals of prompt tokens, compact vs. the original prompt format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.prompts = 0
+            self.prompt_tokens = 0
+            self.baseline_tokens = 0
+
+    def record(self, prompt_tokens: int, baseline_tokens: int) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.prompt_tokens += prompt_tokens
+            self.baseline_tokens += baseline_tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            saved = self.baseline_tokens - self.prompt_tokens
+            return {
+                'prompts': self.prompts,
+                'prompt_tokens': self.prompt_tokens,
+                'baseline_prompt_tokens': self.baseline_tokens,
+                'prompt_tokens_saved': saved,
+                'prompt_savings_pct': round(100.0 * saved / self.baseline_tokens, 1) if self.baseline_tokens else 0.0,
+            }
+
+
+prompt_token_stats = PromptTokenStats()
+
+
+def build_reason_prompt(row, topic: str, sub_topic: str, event_location: str, criteria_passed: str,
+                        keywords: list = None, token_budget: int = None, compact: bool = True,
+                        record: bool = True) -> str:
+    """
+    Reason prompt for one profile; the prompt-token saving is added to ``prompt_token_stats``
+
+    Args:
+        row: Profile row
+        topic: Event topic
+        sub_topic: Event subtopic
+        event_location: Event location
+        criteria_passed: String describing which criteria this profile passed
+        keywords: Class A/B keywords (summary sentences containing them are kept)
+        token_budget: Profile token budget (defaults to reason_prompt_token_budget)
+        compact: False gives the original prompt with the raw profile dict
+        record: False leaves ``prompt_token_stats`` unchanged (prompts built for estimates)
+
+    Returns:
+        Prompt text
+    """
+    baseline = reason_generation_llm_prompt.format(
+        profile=raw_profile(row), topic=topic, sub_topic=sub_topic,
+        event_location=event_location, criteria_passed=criteria_passed
+    )
+    if not compact:
+        prompt = baseline
+    else:
+        prompt = reason_generation_llm_prompt.format(
+            profile='\n' + compact_profile(row, keywords, token_budget), topic=topic, sub_topic=sub_topic,
+            event_location=event_location, criteria_passed=criteria_passed
+        )
+    if record:
+        prompt_token_stats.record(estimate_tokens(prompt), estimate_tokens(baseline))
+    return prompt
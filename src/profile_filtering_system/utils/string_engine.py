@@ -0,0 +1,134 @@
+"""
+String predicate kernels used by the elimination, exclusion and location components.
+
+Two engines are available:
+- ``pandas``: object-dtype ``.str`` methods (the original behaviour)
+- ``pyarrow``: Arrow compute kernels, which run multithreaded and release the GIL
+
+Both engines return the same boolean masks for the same input.
+"""
+import re
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow is optional, only needed for engine='pyarrow'
+    pa = None
+    pc = None
+
+ENGINES = ('pandas', 'pyarrow')
+
+
+def check_engine(engine: str) -> str:
+    """
+    Validate an engine name and make sure its dependencies are installed
+
+    Args:
+        engine: 'pandas' or 'pyarrow'
+
+    Returns:
+        The engine name
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown string engine '{engine}', expected one of {ENGINES}")
+    if engine == 'pyarrow' and pa is None:
+        raise ImportError("The 'pyarrow' engine requires the pyarrow package to be installed")
+    return engine
+
+
+def _string_array(series: pd.Series):
+    return pa.array([value if isinstance(value, str) else None for value in series], type=pa.string())
+
+
+def to_arrow(series: pd.Series):
+    """
+    Convert a text column to an Arrow string array with nulls replaced by ''
+
+    Arrow-backed columns are used without a copy. Non-string values in object
+    columns become '' like ``fillna('')`` followed by ``.str`` would treat them.
+    """
+    try:
+        arr = pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = _string_array(series)
+    if pa.types.is_null(arr.type):
+        arr = arr.cast(pa.string())
+    elif not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+        arr = _string_array(series)
+    return arr.fill_null('')
+
+
+def _to_mask(arr) -> np.ndarray:
+    return np.asarray(arr.to_numpy(zero_copy_only=False), dtype=bool)
+
+
+def lower(series: pd.Series, engine: str = 'pandas') -> pd.Series:
+    """
+    Lowercase a text column, treating missing values as ''
+    """
+    if engine == 'pyarrow':
+        return pd.Series(pd.arrays.ArrowStringArray(pc.utf8_lower(to_arrow(series))), index=series.index, name=series.name)
+    return series.fillna('').str.lower()
+
+
+def contains_pattern(series: pd.Series, pattern: str, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of rows whose lowercased text matches a regex pattern
+    """
+    if engine == 'pyarrow':
+        return _to_mask(pc.match_substring_regex(pc.utf8_lower(to_arrow(series)), pattern))
+    return series.fillna('').str.lower().str.contains(pattern, na=False).to_numpy(dtype=bool)
+
+
+def contains_any(series: pd.Series, substrings: list, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of rows whose text contains at least one of the (literal) substrings
+    """
+    if engine == 'pyarrow':
+        if not substrings:
+            return np.zeros(len(series), dtype=bool)
+        # a single alternation of escaped literals is one pass over the data instead of one per substring
+        pattern = "|".join(re.sub(r'([^\w\s])', r'\\\1', substring) for substring in substrings)
+        return _to_mask(pc.match_substring_regex(to_arrow(series), pattern))
+    return series.fillna('').apply(lambda text: any(substring in text for substring in substrings)).to_numpy(dtype=bool)
+
+
+def isin(series: pd.Series, values, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of rows whose value is one of ``values`` (missing values compare as '')
+    """
+    if engine == 'pyarrow':
+        value_set = pa.array([value for value in values if isinstance(value, str)], type=pa.string())
+        return _to_mask(pc.is_in(to_arrow(series).cast(pa.string()), value_set=value_set))
+    return series.fillna('').isin(values).to_numpy(dtype=bool)
+
+
+def endswith_any(series: pd.Series, suffixes: tuple, engine: str = 'pandas') -> np.ndarray:
+    """
+    Mask of rows whose whitespace-stripped text ends with one of the suffixes
+    """
+    if engine == 'pyarrow':
+        arr = pc.utf8_trim_whitespace(to_arrow(series))
+        mask = np.zeros(len(series), dtype=bool)
+        for suffix in suffixes:
+            mask |= _to_mask(pc.ends_with(arr, suffix))
+        return mask
+    return series.fillna('').str.strip().str.endswith(tuple(suffixes)).to_numpy(dtype=bool)
+
+
+def to_object_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert Arrow-backed string columns back to object dtype (missing values as NaN)
+
+    The row-wise stages after the location filter compare values with plain Python
+    semantics, which ``pd.NA`` does not support.
+    """
+    arrow_cols = [col for col in df.columns if isinstance(df[col].dtype, (pd.StringDtype, pd.ArrowDtype))]
+    if not arrow_cols:
+        return df
+    df = df.copy()
+    for col in arrow_cols:
+        df[col] = df[col].astype(object).where(df[col].notna(), np.nan)
+    return df
@@ -0,0 +1,243 @@
+"""
+Token cache - the word tokens of profile texts, computed once and reused by the keyword criteria of every event
+
+Each distinct text (keyed by its 64-bit hash) maps to the sorted ids of its
+distinct ``\\w+`` tokens; tokens are interned in one vocabulary. The entries are
+held in a compressed sparse row layout (sorted hashes, row offsets, token ids),
+so looking up a whole column is a ``searchsorted`` and counting keyword matches
+is a weighted ``bincount`` - no regex runs for a text seen before.
+The cache is saved to a single ``.npz`` file between runs.
+
+Worker processes (sharded runs) tokenize on a copy of the cache; the entries a
+copy added (``additions``) are merged back into the run's cache (``merge``).
+"""
+import os
+import re
+import tempfile
+import threading
+import zipfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.constants import token_cache_path
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def text_hashes(texts) -> np.ndarray:
+    """64-bit hash per text"""
+    return pd.util.hash_array(np.asarray(texts, dtype=object))
+
+
+class TokenCache:
+    """
+    Interned token id sets of profile texts, keyed by text hash
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.uint32)
+        self.dirty = False
+        # hashes added since record_additions (None: not recording)
+        self._added = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __getstate__(self) -> dict:
+        # pickled for worker processes (sharded runs): a consistent snapshot without the lock
+        with self._lock:
+            state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _intern(self, text: str) -> list:
+        vocab = self.vocab
+        # same tokens as re.findall(r'\w+', text.lower()) in keyword_matching
+        return sorted({vocab.setdefault(token, len(vocab)) for token in _TOKEN_PATTERN.findall(text.lower())})
+
+    def _add(self, hashes: np.ndarray, texts: np.ndarray) -> None:
+        token_lists = [self._intern(text) for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        new_ids = np.fromiter((tid for ids in token_lists for tid in ids), dtype=np.uint32, count=int(lengths.sum()))
+        self._insert(hashes, lengths, new_ids)
+
+    def _insert(self, hashes: np.ndarray, lengths: np.ndarray, new_ids: np.ndarray) -> None:
+        # merge the new entries into the hash-sorted layout
+        all_hashes = np.concatenate([self._hashes, hashes])
+        all_lengths = np.concatenate([np.diff(self._offsets), lengths])
+        all_starts = np.concatenate([self._offsets[:-1], len(self._ids) + np.cumsum(lengths) - lengths])
+        all_ids = np.concatenate([self._ids, new_ids])
+        order = np.argsort(all_hashes, kind='stable')
+        self._hashes = all_hashes[order]
+        self._offsets, self._ids = self._gather(all_starts[order], all_lengths[order], all_ids)
+        if self._added is not None:
+            self._added.append(hashes)
+        self.dirty = True
+
+    @staticmethod
+    def _gather(starts: np.ndarray, lengths: np.ndarray, ids: np.ndarray) -> tuple:
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return offsets, ids[positions]
+
+    def token_ids(self, texts) -> tuple:
+        """
+        Token id sets of ``texts``, tokenizing only texts not seen before
+
+        Returns:
+            Tuple of (offsets, ids): the ids of text i are ids[offsets[i]:offsets[i + 1]]
+        """
+        texts = np.asarray(texts, dtype=object)
+        hashes = text_hashes(texts)
+        with self._lock:
+            return self._token_ids(texts, hashes)
+
+    def _token_ids(self, texts: np.ndarray, hashes: np.ndarray) -> tuple:
+        positions = np.searchsorted(self._hashes, hashes)
+        found = positions < len(self._hashes)
+        found[found] = self._hashes[positions[found]] == hashes[found]
+        if not found.all():
+            _, first = np.unique(hashes[~found], return_index=True)
+            missing = np.flatnonzero(~found)[first]
+            self._add(hashes[missing], texts[missing])
+            positions = np.searchsorted(self._hashes, hashes)
+
+        lengths = self._offsets[positions + 1] - self._offsets[positions]
+        return self._gather(self._offsets[positions], lengths, self._ids)
+
+    def keyword_counts(self, texts, *keyword_lists) -> list:
+        """
+        Per text, the number of keywords whose lowercase form is one of the text's tokens
+        (a keyword listed twice counts twice, as in ``count_keyword_matches_in_text``)
+
+        Returns:
+            One count array per keyword list
+        """
+        offsets, ids = self.token_ids(texts)
+        rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        counts = []
+        for keywords in keyword_lists:
+            weights = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+            for keyword in keywords:
+                token_id = self.vocab.get(str(keyword).lower())
+                if token_id is not None:
+                    weights[token_id] += 1
+            counts.append(np.bincount(rows, weights=weights[ids], minlength=len(offsets) - 1).astype(np.int64))
+        return counts
+
+    def record_additions(self) -> None:
+        """Start recording the texts tokenized from now on (see ``additions``)"""
+        with self._lock:
+            self._added = []
+
+    def additions(self) -> tuple:
+        """
+        Entries added since ``record_additions`` (recording starts again), for ``merge`` into another cache
+
+        Returns:
+            Tuple of (hashes, offsets, ids, tokens): the tokens of entry i are tokens[ids[offsets[i]:offsets[i + 1]]]
+        """
+        with self._lock:
+            hashes = np.concatenate(self._added) if self._added else np.zeros(0, dtype=np.uint64)
+            self._added = []
+            positions = np.searchsorted(self._hashes, hashes)
+            offsets, ids = self._gather(self._offsets[positions],
+                                        self._offsets[positions + 1] - self._offsets[positions], self._ids)
+            # only the tokens the entries use, renumbered from 0
+            used, ids = np.unique(ids, return_inverse=True)
+            vocab = list(self.vocab)
+            return hashes, offsets, ids.astype(np.uint32), [vocab[token_id] for token_id in used]
+
+    def merge(self, entries: tuple) -> int:
+        """
+        Add the entries of another cache (``additions``) that this one does not have
+
+        Returns:
+            Number of entries added
+        """
+        hashes, offsets, ids, tokens = entries
+        with self._lock:
+            positions = np.searchsorted(self._hashes, hashes)
+            found = positions < len(self._hashes)
+            found[found] = self._hashes[positions[found]] == hashes[found]
+            new = np.flatnonzero(~found)
+            if not len(new):
+                return 0
+            vocab = self.vocab
+            token_ids = np.fromiter((vocab.setdefault(token, len(vocab)) for token in tokens), dtype=np.uint32,
+                                    count=len(tokens))
+            lengths = np.diff(offsets)[new]
+            _, new_ids = self._gather(offsets[:-1][new], lengths, token_ids[ids])
+            # ids sorted within each entry, as _intern returns them
+            new_ids = new_ids[np.lexsort((new_ids, np.repeat(np.arange(len(new)), lengths)))]
+            self._insert(hashes[new], lengths, new_ids)
+            return len(new)
+
+    def save(self, path=None) -> None:
+        """
+        Write the cache to an .npz file, via a temporary file in the same directory: background jobs and
+        other server processes save the same file, a reader never sees a partly written one
+        """
+        path = Path(token_cache_path if path is None else path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            # tokens never contain whitespace, so the vocabulary is stored as one newline separated UTF-8 buffer
+            vocab = np.frombuffer('\n'.join(self.vocab).encode('utf-8'), dtype=np.uint8)
+            descriptor, temporary = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+            try:
+                with os.fdopen(descriptor, 'wb') as f:
+                    np.savez(f, hashes=self._hashes, offsets=self._offsets, ids=self._ids, vocab=vocab)
+                os.replace(temporary, path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            self.dirty = False
+
+    def save_if_dirty(self, path=None) -> None:
+        """Write the cache only if texts were added since it was loaded or saved"""
+        if self.dirty:
+            self.save(path)
+
+    @classmethod
+    def load(cls, path=None) -> 'TokenCache':
+        """
+        Read a cache saved with ``save``; an empty cache if the file does not exist, and an empty cache
+        marked dirty (written over the damaged file by the next save) if it cannot be read
+        """
+        path = Path(token_cache_path if path is None else path)
+        cache = cls()
+        if not path.exists():
+            return cache
+        try:
+            with np.load(path) as data:
+                hashes, offsets, ids = data['hashes'], data['offsets'], data['ids']
+                tokens = data['vocab'].tobytes().decode('utf-8').split('\n') if len(data['vocab']) else []
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as error:
+            print(f"Token cache {path} could not be read ({type(error).__name__}: {error}), starting empty")
+            cache.dirty = True
+            return cache
+        cache._hashes, cache._offsets, cache._ids = hashes, offsets, ids
+        cache.vocab = {token: i for i, token in enumerate(tokens)}
+        return cache
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_token_cache() -> TokenCache:
+    """Process-wide cache, loaded from token_cache_path on first use"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TokenCache.load()
+        return _default_cache
@@ -0,0 +1,95 @@
+"""
+Upload cache - parsed profile files keyed by the hash of their content
+
+Parsing a large Excel export takes minutes; the same bytes always give the same
+frame, so a file is parsed once per server process and later runs (new event
+parameters, other sessions, re-uploads of the same file) reuse the frame.
+The cache is bounded by the in-memory size of the frames and evicts the least
+recently used file first. Cached frames are shared - callers must not modify them.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+from src.profile_filtering_system.constants import upload_cache_max_bytes
+
+
+def content_key(data: bytes, name: str, engine: str) -> str:
+    """Cache key of a file: content hash plus what decides how it is parsed (file type and engine)"""
+    suffix = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{suffix}.{engine}"
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """In-memory size of a frame, including the Python string objects"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ParsedFileCache:
+    """
+    Thread-safe LRU cache of parsed frames with a memory cap
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = upload_cache_max_bytes if max_bytes is None else max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str):
+        """The cached frame, None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Cache a frame, evicting least recently used frames to stay under the cap
+
+        Returns:
+            False if the frame alone is larger than the cap (it is not cached)
+        """
+        size = frame_bytes(df)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            while self._entries and self.bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.stats['evictions'] += 1
+            self._entries[key] = (df, size)
+            self.bytes += size
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+_upload_cache = None
+_upload_cache_lock = threading.Lock()
+
+
+def get_upload_cache() -> ParsedFileCache:
+    """The process-wide cache shared by all Streamlit sessions"""
+    global _upload_cache
+    with _upload_cache_lock:
+        if _upload_cache is None:
+            _upload_cache = ParsedFileCache()
+        return _upload_cache
@@ -0,0 +1,62 @@
+"""
+Test script for the vectorized AI ranking and top-k selection
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.ai_ranking import (
+    calculate_ai_scores, top_k_positions, get_top_25_percent, get_top_k, StreamingTopK
+)
+
+
+def test_ai_ranking():
+    """Check scores against the scoring rules and top-k against a full stable sort"""
+
+    test_data = {
+        'title': ['Chief Innovation Officer', 'VP', 'Head of AI Strategy and Design Thinking', np.nan],
+        'summary': ['Leading innovation initiatives with focus on AI and design thinking across Europe.', '', 'AI', 'x' * 400],
+        'Companies Category': ['Category A', 'Category B', 'Category C', np.nan],
+        'criteria_a_passed': [True, False, True, False],
+        'criteria_b_passed': [True, False, False, False],
+        'criteria_c_passed': [False, False, True, True],
+    }
+    df = pd.DataFrame(test_data)
+
+    scores = calculate_ai_scores(df)
+    print(f"Scores: {scores.tolist()}")
+    # 15 + 12 + 2 criteria * 3 + 12 (Category A) + 4 (title 24 chars) + 3 (summary 82 chars)
+    assert scores[0] == 52
+    # only Category B points - title and summary too short
+    assert scores[1] == 8
+    # 15 + 8 + 2 * 3 + 4 (Category C) + 7 (title 39 chars)
+    assert scores[2] == 40
+    # 8 + 3 + 12 (summary capped)
+    assert scores[3] == 23
+
+    top = get_top_25_percent(df)
+    print(f"Top 25%: {top.index.tolist()}")
+    assert top.index.tolist() == [0]
+
+    # top-k with many ties must match a stable full sort (score descending, then row order)
+    rng = np.random.default_rng(0)
+    many_scores = rng.integers(0, 20, 5000)
+    expected = np.lexsort((np.arange(len(many_scores)), -many_scores))
+    for k in [1, 10, 1250, 5000]:
+        assert (top_k_positions(many_scores, k) == expected[:k]).all()
+
+    # streaming top-k over chunks gives the same rows as ranking the whole frame
+    big_df = pd.DataFrame({
+        'title': rng.choice(['Chief Officer', 'Head of Innovation Research', 'VP'], 3000),
+        'summary': rng.choice(['', 'y' * 120, 'z' * 300], 3000),
+        'Companies Category': rng.choice(['Category A', 'Category B', 'Category C'], 3000),
+        'criteria_a_passed': rng.random(3000) < 0.5,
+    })
+    streaming = StreamingTopK(100)
+    for start in range(0, len(big_df), 700):
+        streaming.push(big_df.iloc[start:start + 700])
+    assert streaming.result().index.equals(get_top_k(big_df, 100).index)
+
+    print("✅ AI ranking tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_ai_ranking()
@@ -0,0 +1,106 @@
+"""
+Test script for the distributed batch mode: shard files, leased workers, crashed workers and the reducer
+"""
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+from src.profile_filtering_system.components.ai_ranking import get_top_k
+from src.profile_filtering_system.utils.batch_queue import BatchQueue, run_worker
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States']
+    summaries = ['Leading innovation and design thinking programmes with AI.',
+                 'Building a culture of innovation and trust across leadership teams.',
+                 'Responsible for quarterly sales targets in the region.',
+                 'Directrice de l\'innovation et de la transformation numérique.']
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i % (rows - 40)}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': [titles[i % 5] for i in range(rows)],
+        'companyName': [f"Company {i % 7}" for i in range(rows)],
+        'summary': [summaries[i % 4] + ' ' * (i % 11) for i in range(rows)],
+        'location': [locations[i % 3] for i in range(rows)],
+    }, index=[f"row-{i}" for i in range(rows)])
+
+
+def _lease_and_hang(path):
+    # a worker that takes a shard and never finishes it (killed by the test)
+    BatchQueue(path).lease('hanging-worker')
+    time.sleep(60)
+
+
+def test_batch_queue():
+    """Check that several workers with crashed peers give the single-process shortlist and top k"""
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(900)
+        companies = (pd.DataFrame({'Account Name': ['Company 3']}), pd.DataFrame({'company': ['Company 1']}),
+                     pd.DataFrame({'company': ['Company 2']}))
+        options = {'near_duplicates': False, 'evaluation': 'mask', 'language_detector': 'builtin'}
+        single = ProfilesFiltering('AI', 'Culture', 'United Kingdom', token_cache=TokenCache(),
+                                   persist_token_cache=False, **options)
+        expected = single.shortlist(df, *companies, verbose=False)
+
+        with tempfile.TemporaryDirectory() as path:
+            queue = BatchQueue.create(path, df, *companies, 'AI', 'Culture', 'United Kingdom', options=options,
+                                      shard_rows=100, lease_seconds=1.0, heartbeat_seconds=0.2, poll_seconds=0.2)
+            assert queue.shards == 9 and queue.status()['pending'] == 9
+
+            # a worker that crashed without ever renewing its lease, and one killed while holding a shard
+            crashed = queue.lease('crashed-worker')
+            context = multiprocessing.get_context('fork')
+            hanging = context.Process(target=_lease_and_hang, args=(path,))
+            hanging.start()
+            while queue.status()['leased'] < 2:
+                time.sleep(0.05)
+            os.kill(hanging.pid, signal.SIGKILL)
+            hanging.join()
+
+            workers = [context.Process(target=run_worker, args=(path,)) for _ in range(3)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join(timeout=120)
+                assert worker.exitcode == 0, worker.exitcode
+            assert queue.status() == {'shards': 9, 'done': 9, 'leased': 0, 'failed': 0, 'pending': 0}
+            expired = {attempt['worker'] for shard in range(queue.shards) for attempt in queue.attempts(shard)}
+            assert expired == {'crashed-worker', 'hanging-worker'} and not crashed.held, expired
+
+            result = queue.reduce(top_k=10)
+            pd.testing.assert_frame_equal(result['shortlist'], expected)
+            pd.testing.assert_series_equal(result['rejections'], single.rejections)
+            pd.testing.assert_frame_equal(result['top_k'], get_top_k(expected, 10))
+            counts = {m['stage']: (m['rows_in'], m['rows_out']) for m in result['stage_metrics']}
+            assert counts == {m['stage']: (m['rows_in'], m['rows_out']) for m in single.stage_metrics}
+            print(f"{len(expected)} of {len(df)} rows shortlisted by {len(result['workers'])} workers "
+                  f"over {result['shards']} shards, same as a single run")
+
+            # a shard that keeps failing is given up after max_attempts
+            failing = BatchQueue.create(os.path.join(path, 'failing'), df.head(50), *companies, 'AI', 'Culture',
+                                        options={**options, 'dedup_keep': 'oldest'}, max_attempts=2)
+            assert run_worker(failing.path) == 0
+            assert failing.status()['failed'] == 1 and len(failing.attempts(0)) == 2
+            try:
+                failing.reduce()
+                raise AssertionError("reduce of a failed batch")
+            except RuntimeError:
+                pass
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    print("✅ Batch queue test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_batch_queue()
@@ -0,0 +1,97 @@
+"""
+Test script for run checkpoints and resuming the reasoning stage
+"""
+import os
+import tempfile
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.constants import runs_dir
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+from src.profile_filtering_system.utils.checkpoint import RunCheckpoint, prune_runs, run_checkpoint
+
+
+def test_checkpoint_resume():
+    """Check that a resumed run skips logged reasons and retries only the failed rows"""
+
+    shortlist = pd.DataFrame({
+        'title': ['Chief Innovation Officer', 'Head of AI', 'VP Design', 'CTO'],
+        'summary': ['Innovation', 'AI', 'Design thinking', 'Technology'],
+        'criteria_passed': 'Has valid title',
+    }, index=[4, 9, 15, 23])
+    info = {
+        'topic': 'AI', 'sub_topic': 'Design', 'event_location': 'United Kingdom', 'additional_countries': [],
+        'reason_keywords': ['ai', 'design'], 'options': {'lazy_reasons': False, 'compact_prompts': True},
+        'stage_metrics': [{'stage': 'keyword_matching', 'rows_in': 10, 'rows_out': 4, 'seconds': 0.1}],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run_dir = Path(tmp) / 'run'
+        checkpoint = RunCheckpoint(run_dir)
+        checkpoint.save_shortlist(shortlist, info)
+
+        calls = []
+        def flaky_reason(row, topic, sub_topic, event_location, criteria_passed, keywords=None, compact=True):
+            calls.append(row.name)
+            if row.name == 15:
+                raise TimeoutError('connection reset')
+            return f"{row['title']} fits {topic} ({', '.join(keywords)})"
+
+        # first attempt: row 15 fails, the others are logged as they finish
+        pipeline = ProfilesFiltering.from_checkpoint(run_dir, reason_generator=flaky_reason)
+        first = pipeline.resume(verbose=False)
+        assert calls == [4, 9, 15, 23]
+        assert first['llm_reason'].isna().tolist() == [False, False, True, False]
+        assert pipeline.stage_metrics[-1]['failed'] == 1 and pipeline.stage_metrics[0]['stage'] == 'keyword_matching'
+        reasons, errors = checkpoint.load_reasons()
+        assert sorted(reasons) == [4, 9, 23] and errors == {15: 'TimeoutError: connection reset'}
+
+        # a crash can cut the last line off: it is ignored and the next entry starts on a new line
+        with open(run_dir / 'reasons.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"label": 23, "rea')
+
+        calls.clear()
+        ok_reason = lambda row, topic, sub_topic, event_location, criteria_passed, **kwargs: calls.append(row.name) or f"{row['title']} fits {topic}"
+        pipeline = ProfilesFiltering.from_checkpoint(run_dir, reason_generator=ok_reason)
+        resumed = pipeline.resume(verbose=False)
+        print(resumed[['title', 'llm_reason']])
+        assert calls == [15]
+        assert resumed['llm_reason'].tolist() == [
+            'Chief Innovation Officer fits AI (ai, design)', 'Head of AI fits AI (ai, design)',
+            'VP Design fits AI', 'CTO fits AI (ai, design)',
+        ]
+        assert pipeline.stage_metrics[-1]['resumed'] == 3 and pipeline.stage_metrics[-1]['failed'] == 0
+        assert 'criteria_passed' not in resumed.columns
+        assert checkpoint.load_reasons()[1] == {}
+
+    print("✅ Checkpoint resume test completed successfully!")
+
+
+def test_run_directories():
+    """Check that job ids from a URL always resolve under runs_dir and that old run directories are pruned"""
+
+    assert run_checkpoint('0123456789ab').path == runs_dir / '0123456789ab'
+    for crafted in ('/tmp/run', '../../etc', 'runs/0123456789ab', '0123456789AB', '0123456789abc', '', None):
+        try:
+            run_checkpoint(crafted)
+            raise AssertionError(f"accepted {crafted!r}")
+        except ValueError:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = [f"{i:012x}" for i in range(5)]
+        for age, job_id in enumerate(reversed(ids)):
+            checkpoint = RunCheckpoint(Path(tmp) / job_id)
+            checkpoint.save_input(pd.DataFrame({'title': ['CTO']}))
+            os.utime(checkpoint.path, (1000 - age, 1000 - age))
+        # other directories are never touched
+        (Path(tmp) / 'notes').mkdir()
+        deleted = prune_runs(2, keep={ids[0]}, directory=tmp)
+        assert sorted(deleted) == ids[1:3], deleted
+        assert sorted(os.listdir(tmp)) == [ids[0], ids[3], ids[4], 'notes']
+        assert prune_runs(3, directory=tmp) == []
+    print(f"Pruned {len(deleted)} run directories")
+
+
+if __name__ == "__main__":
+    test_checkpoint_resume()
+    test_run_directories()
@@ -0,0 +1,56 @@
+"""
+Test script for the narrow column projection of the pipeline and the join of the other columns onto the survivors
+"""
+import pandas as pd
+from src.profile_filtering_system.constants import row_id_column
+from src.profile_filtering_system.utils.common import project_columns, materialize_columns
+
+
+def test_column_projection():
+    """Check that surviving rows get every original column back with their index labels, column order and dtypes"""
+
+    full_df = pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i}" for i in range(6)],
+        'title': ['Chief Innovation Officer', 'Sales Manager', 'Head of AI', 'Intern', 'VP Design', 'CTO'],
+        'connections': pd.array([500, 120, None, 43, 980, 7], dtype='Int64'),
+        'summary': pd.array(['Innovation', None, 'AI strategy', '', 'Design', 'Tech'], dtype='string[pyarrow]'),
+        'followers': [1.5, 2.0, 3.25, 4.0, 5.5, 6.0],
+        'premium': [True, False, True, False, True, True],
+        'seniority': pd.Categorical(['c', 'm', 'h', 'i', 'v', 'c']),
+        'scrapedAt': pd.to_datetime(['2024-01-0%d' % day for day in range(1, 7)]),
+        'location': ['London', 'Berlin', 'Paris', 'Rome', 'Oslo', 'Madrid'],
+    }, index=pd.Index(['f', 'b', 'x', 'a', 'q', 'm'], name='lead'))
+    original = full_df.copy()
+
+    narrow_df = project_columns(full_df)
+    # only the columns the stages read, indexed by row position; the upload itself is untouched
+    assert list(narrow_df.columns) == ['title', 'summary', 'location']
+    assert narrow_df.index.equals(pd.RangeIndex(6, name=row_id_column))
+    pd.testing.assert_frame_equal(full_df, original)
+
+    # the stages drop rows, rewrite a column they read and add their own columns
+    survivors = narrow_df.iloc[[0, 2, 5]].copy()
+    survivors['title'] = survivors['title'].str.upper()
+    survivors['ai_score'] = [42, 30, 17]
+
+    result = materialize_columns(survivors, full_df)
+    expected = full_df.iloc[[0, 2, 5]].copy()
+    expected['title'] = expected['title'].str.upper()
+    expected['ai_score'] = [42, 30, 17]
+    pd.testing.assert_frame_equal(result, expected)
+    assert list(result.index) == ['f', 'x', 'm'] and result.index.name == 'lead'
+    assert list(result.dtypes) == list(expected.dtypes)
+
+    # explicit projection columns, missing ones ignored; no survivors gives an empty frame of the same layout
+    narrow_df = project_columns(full_df, columns=['title', 'companyName'])
+    assert list(narrow_df.columns) == ['title']
+    empty = materialize_columns(narrow_df.iloc[:0], full_df)
+    assert empty.empty and list(empty.columns) == list(full_df.columns)
+    assert (empty.dtypes == full_df.dtypes).all()
+    print(f"Rows {list(result.index)} joined back with {len(result.columns)} columns")
+
+    print("✅ Column projection test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_column_projection()
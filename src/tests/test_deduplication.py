@@ -0,0 +1,63 @@
+"""
+Test script for exact duplicate removal by identity key (profile URL / vmid / LinkedIn URL)
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.deduplication import (
+    deduplicate_profiles, duplicate_mask, identity_hashes, identity_keys
+)
+
+
+def test_deduplication():
+    """Check the priority order of the identity keys, keep='richest' and that rows without a key are kept"""
+
+    df = pd.DataFrame({
+        'profileUrl': ['https://linkedin.com/in/anna/', 'https://linkedin.com/in/anna', None, '  ', None, None, 'v-7', None],
+        'vmid': ['v-1', 'v-2', 'v-1', 'v-1', 'v-7', None, None, ''],
+        'linkedInProfileUrl': [None, None, None, None, None, None, None, None],
+        'fullName': ['Anna Schmidt', 'Anna Schmidt', None, 'Anna S.', 'Marco Rossi', 'No Key', 'Lena Vogel', 'No Key'],
+        'title': [None, 'Chief Innovation Officer', 'CIO', 'CIO', 'Head of AI', 'CTO', None, 'CTO'],
+    }, index=[f"row-{i}" for i in range(8)])
+
+    # the first non-empty column wins: rows 0 and 1 share a URL (trailing slash ignored) despite different vmids,
+    # rows 2 and 3 fall back to the vmid (blank URL), and a vmid never matches the same value as a URL (row 6)
+    keys, has_key = identity_keys(df)
+    assert keys[0] == keys[1] and keys[0].startswith('profileUrl')
+    assert keys[2] == keys[3] and keys[2].startswith('vmid')
+    assert keys[4] != keys[6]
+    assert has_key.tolist() == [True, True, True, True, True, False, True, False]
+
+    # the hashes used by the batch queue follow the keys; rows without a key hash to 0
+    hashes, hashed = identity_hashes(df)
+    assert (hashed == has_key).all() and hashes.dtype == np.uint64
+    assert hashes[0] == hashes[1] and hashes[2] == hashes[3] and hashes[4] != hashes[6]
+    assert hashes[5] == hashes[7] == 0
+    assert (identity_hashes(df.iloc[::-1])[0][::-1] == hashes).all()
+
+    # keep='first': the first occurrence of each key, rows 5 and 7 (no key, same person) are both kept
+    assert duplicate_mask(df).tolist() == [True, False, True, False, True, True, True, True]
+    result = deduplicate_profiles(df)
+    assert result.index.tolist() == ['row-0', 'row-2', 'row-4', 'row-5', 'row-6', 'row-7']
+
+    # keep='richest': the occurrence with the most non-empty fields, the first one on ties
+    assert duplicate_mask(df, keep='richest').tolist() == [False, True, False, True, True, True, True, True]
+    tied = df.iloc[:2].assign(title='CIO')
+    assert duplicate_mask(tied, keep='richest').tolist() == [True, False]
+
+    # another priority order changes which rows are the same person
+    assert duplicate_mask(df, key_columns=['vmid', 'profileUrl']).tolist() == [True, True, False, False, True, True, True, True]
+
+    # no identity column at all: every row is kept
+    assert duplicate_mask(df[['fullName', 'title']]).all()
+    try:
+        duplicate_mask(df, keep='last')
+        raise AssertionError("unknown keep option accepted")
+    except ValueError:
+        pass
+    print(f"Kept {len(result)} of {len(df)} profiles")
+
+    print("✅ Deduplication test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_deduplication()
@@ -0,0 +1,75 @@
+"""
+Test script for the sample-based dry run estimate
+"""
+import numpy as np
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+from src.profile_filtering_system.utils.prompt_builder import prompt_token_stats
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States', 'Paris, France']
+    summaries = [
+        'Leading innovation and design thinking programmes with a focus on AI and customer centricity.',
+        'Building a culture of innovation and trust across global leadership teams.',
+        'Responsible for quarterly sales targets and account growth in the region.',
+    ]
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': rng.choice(titles, rows),
+        'companyName': [f"Company {i % 97}" for i in range(rows)],
+        'summary': rng.choice(summaries, rows),
+        'location': rng.choice(locations, rows, p=[0.4, 0.3, 0.2, 0.1]),
+    })
+
+
+def test_dry_run():
+    """Check that the estimate brackets the actual run and that a full sample reproduces it exactly"""
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership', 'customer']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(1500)
+        companies_to_remove = pd.DataFrame({'Account Name': ['Company 3']})
+        companies_a = pd.DataFrame({'company': ['Company 1']})
+        companies_b = pd.DataFrame({'company': ['Company 2']})
+        pipeline = ProfilesFiltering('Innovation, Design & AI', 'Culture; Leadership', event_location='United Kingdom',
+                                     near_duplicates=False, token_cache=TokenCache(), persist_token_cache=False)
+        before = prompt_token_stats.snapshot()
+
+        estimate = pipeline.dry_run(df, companies_to_remove, companies_a, companies_b, sample_size=300, seed=1)
+        stages = pd.DataFrame(estimate['stages']).set_index('stage')
+        print(stages[['rows_in', 'rows_out', 'rows_out_low', 'rows_out_high', 'seconds']])
+        print(estimate['reasons'])
+        assert estimate['sample_rows'] == 300 and estimate['total_rows'] == 1500
+        assert pipeline.stage_metrics == [] and prompt_token_stats.snapshot() == before
+
+        shortlist = pipeline.shortlist(df, companies_to_remove, companies_a, companies_b, verbose=False)
+        actual = pd.DataFrame(pipeline.stage_metrics).set_index('stage')['rows_out']
+        assert list(stages.index) == list(actual.index)
+        assert ((stages['rows_out_low'] <= actual) & (actual <= stages['rows_out_high'])).all()
+        assert (stages['rows_out_low'] <= stages['rows_out']).all() and (stages['rows_out'] <= stages['rows_out_high']).all()
+
+        reasons = estimate['reasons']
+        assert reasons['calls'] == stages['rows_out'].iloc[-1] and reasons['calls_low'] <= len(shortlist) <= reasons['calls_high']
+        assert reasons['prompt_tokens_per_call'] > 0 and 0 < reasons['cost_usd_low'] <= reasons['cost_usd'] <= reasons['cost_usd_high']
+        assert reasons['seconds'] > 0 and estimate['seconds'][1] <= estimate['seconds'][0] <= estimate['seconds'][2]
+
+        # a sample of every row is the run itself: no uncertainty left
+        exact = pipeline.dry_run(df, companies_to_remove, companies_a, companies_b, sample_size=len(df))
+        exact = pd.DataFrame(exact['stages']).set_index('stage')
+        assert (exact['rows_out'] == actual).all() and (exact['rows_out_low'] == exact['rows_out_high']).all()
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    print("✅ Dry run test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_dry_run()
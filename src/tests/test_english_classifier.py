@@ -0,0 +1,85 @@
+"""
+Test script for the built-in English classifier and its benchmark against langdetect
+"""
+import glob
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.english_only import english_only, english_only_mask
+from src.profile_filtering_system.utils.english_classifier import (
+    EnglishClassifier, build_tables, benchmark_english_classifier, get_english_classifier, TABLES_PATH
+)
+
+
+def _sample_texts() -> list:
+    texts = []
+    for path in sorted(glob.glob('data/filtered_speaker_profiles*.csv')):
+        df = pd.read_csv(path)
+        for column in ('summary', 'titleDescription', 'description'):
+            if column in df.columns:
+                texts += list(df[column])
+    return texts
+
+
+def test_english_classifier():
+    """Check the built-in classifier against langdetect on the sample exports and on other languages"""
+
+    classifier = get_english_classifier()
+    texts = [
+        "Passionate about digital transformation and leadership 🚀",
+        "Head of Innovation | Design Thinking | Agile Coach",
+        "Directrice de l'innovation et de la transformation numérique chez Orange.",
+        "Leiter der Abteilung für Innovation und digitale Transformation.",
+        "Responsable de estrategia digital y liderazgo en la empresa.",
+        "Verantwoordelijk voor innovatie en digitale transformatie bij de bank.",
+        "Odpowiedzialny za innowacje i transformację cyfrową.",
+        "Руководитель отдела цифровой трансформации",
+        "数字化转型负责人",
+        "12345 !!!", "", None, np.nan,
+    ]
+    expected = [True, True] + [False] * 11
+    assert list(classifier.is_english(texts)) == expected, classifier.is_english(texts)
+
+    # a headline that is a near tie with French is kept, short headlines of other languages are not
+    headlines = ["Data scientist | ML | Python", "Directeur général", "Leiter Vertrieb", "Jefe de ventas"]
+    assert list(classifier.is_english(headlines)) == [True, False, False, False]
+    assert not EnglishClassifier(margin=0.0).is_english(headlines[:1])[0]
+
+    # the shipped tables are the ones built from the installed langdetect profiles
+    with np.load(TABLES_PATH) as shipped:
+        built = build_tables()
+        for name in ('keys', 'ratios', 'languages'):
+            assert np.array_equal(shipped[name], built[name]), name
+    print(f"{len(built['keys'])} grams, English against {len(built['languages'])} languages")
+
+    # selectable in the component, same decisions in every batch size
+    df = pd.DataFrame({'summary': texts})
+    assert list(english_only_mask(df, 'builtin')) == expected
+    assert len(english_only(df, detector='builtin')) == 2
+    try:
+        english_only_mask(df, 'fasttext')
+        raise AssertionError("unknown detector accepted")
+    except ValueError:
+        pass
+    sample = _sample_texts()
+    small_batches = EnglishClassifier(batch_chars=1000)
+    assert np.array_equal(small_batches.is_english(sample), classifier.is_english(sample))
+
+    # benchmark against langdetect on the sample exports
+    report = benchmark_english_classifier(sample)
+    print(f"Agreement with langdetect: {report['agreement']:.2%} of {report['texts']} texts, "
+          f"{report['builtin_texts_per_second']:.0f} vs {report['langdetect_texts_per_second']:.0f} texts/s "
+          f"({report['speedup']:.1f}x)")
+    assert report['agreement'] >= 0.97, report['disagreements'][:10]
+    assert report['speedup'] > 5
+    summaries = []
+    for path in sorted(glob.glob('data/filtered_speaker_profiles*.csv')):
+        summaries += list(pd.read_csv(path)['summary'])
+    report = benchmark_english_classifier(summaries)
+    print(f"Agreement on the summaries: {report['agreement']:.2%} of {report['texts']}")
+    assert report['agreement'] >= 0.97, report['disagreements'][:10]
+
+    print("✅ English classifier test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_english_classifier()
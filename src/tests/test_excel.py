@@ -0,0 +1,178 @@
+"""
+Test script for the fast Excel reader
+"""
+import io
+import tempfile
+import datetime
+import zipfile
+import pandas as pd
+from pathlib import Path
+from openpyxl import Workbook
+import src.profile_filtering_system.utils.excel as excel
+from src.profile_filtering_system.utils.excel import read_excel_fast, read_xlsx_stream
+
+_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+
+def _workbook(cells: dict) -> bytes:
+    book = Workbook()
+    for (row, column), value in cells.items():
+        book.active.cell(row=row, column=column, value=value)
+    data = io.BytesIO()
+    book.save(data)
+    return data.getvalue()
+
+
+def _raw_workbook(sheet_data: str, shared_strings: str = '', prefix: str = '') -> bytes:
+    # a workbook written by hand, for markup other writers than openpyxl produce
+    p = f"{prefix}:" if prefix else ''
+    xmlns = f'xmlns{":" + prefix if prefix else ""}="{_MAIN}"'
+    shared_rel = (f'<Relationship Id="rId2" Type="{_DOC_RELS}/sharedStrings" Target="sharedStrings.xml"/>'
+                  if shared_strings else '')
+    shared_type = ('<Override PartName="/xl/sharedStrings.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+                   if shared_strings else '')
+    files = {
+        '[Content_Types].xml': (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>{shared_type}'
+            '</Types>'),
+        '_rels/.rels': (f'<Relationships xmlns="{_RELS}"><Relationship Id="rId1" '
+                        f'Type="{_DOC_RELS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'),
+        'xl/workbook.xml': (f'<workbook xmlns="{_MAIN}" xmlns:r="{_DOC_RELS}"><sheets>'
+                            '<sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': (f'<Relationships xmlns="{_RELS}"><Relationship Id="rId1" '
+                                       f'Type="{_DOC_RELS}/worksheet" Target="worksheets/sheet1.xml"/>{shared_rel}'
+                                       '</Relationships>'),
+        'xl/worksheets/sheet1.xml': (f'<{p}worksheet {xmlns}><{p}sheetData>{sheet_data}'
+                                     f'</{p}sheetData></{p}worksheet>'),
+    }
+    if shared_strings:
+        files['xl/sharedStrings.xml'] = f'<sst xmlns="{_MAIN}">{shared_strings}</sst>'
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as book:
+        for path, text in files.items():
+            book.writestr(path, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>' + text)
+    return data.getvalue()
+
+
+def test_excel_markup():
+    """Check the streaming reader on markup written by other tools, and the fallback of the 'auto' engine"""
+
+    # rich-text shared strings (runs are joined, phonetic hints dropped)
+    shared = ('<si><t>name</t></si>'
+              '<si><r><rPr><b/></rPr><t>Bold</t></r><r><t xml:space="preserve"> text</t></r></si>'
+              '<si><t>city</t><rPh sb="0" eb="1"><t>ph</t></rPh></si>')
+    workbooks = {
+        # inline strings, also as rich text
+        'inline strings': _raw_workbook(
+            '<row r="1"><c r="A1" t="inlineStr"><is><t>name</t></is></c><c r="B1" t="inlineStr"><is><t>city</t></is></c></row>'
+            '<row r="2"><c r="A2" t="inlineStr"><is><t>Ada</t></is></c>'
+            '<c r="B2" t="inlineStr"><is><r><t>Lon</t></r><r><t>don &amp; co</t></r></is></c></row>'),
+        'rich shared strings': _raw_workbook(
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>2</v></c></row>'
+            '<row r="2"><c r="A2" t="s"><v>1</v></c><c r="B2"><v>7</v></c></row>', shared),
+        # rows and cells without references, and a gap after them
+        'missing references': _raw_workbook(
+            '<row><c t="s"><v>0</v></c><c t="s"><v>2</v></c></row>'
+            '<row><c t="s"><v>1</v></c><c><v>5</v></c></row>'
+            '<row r="5"><c r="B5"><v>2.5</v></c></row>', shared),
+        # attributes in another order than r, s, t
+        'attribute order': _raw_workbook(
+            '<row r="1" spans="1:2"><c t="s" r="A1"><v>0</v></c><c s="0" t="s" r="B1"><v>2</v></c></row>'
+            '<row spans="1:2" r="2"><c t="s" r="A2"><v>1</v></c><c t="n" s="0" r="B2"><v>12</v></c></row>', shared),
+        'namespace prefix': _raw_workbook(
+            '<x:row r="1"><x:c r="A1" t="s"><x:v>0</x:v></x:c><x:c r="B1" t="s"><x:v>2</x:v></x:c></x:row>'
+            '<x:row r="2"><x:c r="A2" t="s"><x:v>1</x:v></x:c><x:c r="B2"><x:v>3</x:v></x:c></x:row>',
+            shared, prefix='x'),
+    }
+    for label, workbook in workbooks.items():
+        expected = pd.read_excel(io.BytesIO(workbook))
+        pd.testing.assert_frame_equal(read_xlsx_stream(workbook), expected, obj=label)
+        pd.testing.assert_frame_equal(read_xlsx_stream(workbook, usecols=['city']),
+                                      pd.read_excel(io.BytesIO(workbook), usecols=['city']), obj=label)
+        print(f"{label}: {expected.to_dict('records')}")
+
+    # markup the streaming reader fails on: 'auto' falls back to pd.read_excel, 'stream' raises
+    stream = excel.read_xlsx_stream
+    def broken(*args, **kwargs):
+        raise KeyError('unexpected markup')
+    excel.read_xlsx_stream = broken
+    try:
+        workbook = workbooks['rich shared strings']
+        pd.testing.assert_frame_equal(read_excel_fast(workbook), pd.read_excel(io.BytesIO(workbook)))
+        try:
+            read_excel_fast(workbook, engine='stream')
+            raise AssertionError("the stream engine must not fall back")
+        except KeyError:
+            pass
+    finally:
+        excel.read_xlsx_stream = stream
+
+    print("✅ Excel markup test completed successfully!")
+
+
+def test_excel_reader():
+    """Check that the streaming reader gives the same frames as pd.read_excel and that the Parquet copy is reused"""
+
+    profiles = pd.DataFrame({
+        'title': ['CEO', 'Head of AI', None, 'CTO'],
+        'companyName': ['Acme & Sons', 'Globex', 'Initech', '<Umbrella>'],
+        'connections': [500, None, 120, 3],
+        'score': [0.5, 1.0, 2.25, None],
+        'verified': [True, False, True, True],
+        'updated': pd.to_datetime(['2024-01-01 10:30', '2024-02-01 00:00', None, '2024-03-15 08:00']),
+    })
+    data = io.BytesIO()
+    profiles.to_excel(data, index=False)
+    data = data.getvalue()
+
+    # leading and middle empty rows, a gap column, duplicated header names, a formula, a date and a time
+    odd = _workbook({
+        (2, 1): 'name', (2, 2): 'name', (2, 4): 'when',
+        (3, 1): 'Ada', (3, 2): 'Lovelace', (3, 4): datetime.date(2020, 1, 1),
+        (5, 1): '=1+1', (5, 4): datetime.time(10, 5), (6, 3): 'only in C',
+    })
+
+    for workbook in (data, odd):
+        expected = pd.read_excel(io.BytesIO(workbook))
+        pd.testing.assert_frame_equal(read_xlsx_stream(workbook), expected)
+    for usecols in (['title'], ['updated', 'companyName'], ['connections', 'verified']):
+        pd.testing.assert_frame_equal(read_xlsx_stream(data, usecols=usecols), pd.read_excel(io.BytesIO(data), usecols=usecols))
+    pd.testing.assert_frame_equal(read_xlsx_stream(odd, usecols=['Unnamed: 0']), pd.read_excel(io.BytesIO(odd), usecols=['Unnamed: 0']))
+    try:
+        read_xlsx_stream(data, usecols=['headline'])
+        assert False, "an unknown column must raise"
+    except ValueError as e:
+        print(f"Unknown column: {e}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = read_excel_fast(io.BytesIO(data), usecols=['companyName', 'title'], engine='stream', cache_dir=tmp)
+        copies = list(Path(tmp).glob('*.parquet'))
+        assert len(copies) == 1
+        # the second read comes from the Parquet copy (a broken workbook proves the sheet is not parsed again)
+        second = read_excel_fast(data, usecols=['companyName', 'title'], cache_dir=tmp)
+        pd.testing.assert_frame_equal(second, first)
+        assert list(second.columns) == ['title', 'companyName']
+        pd.testing.assert_frame_equal(read_excel_fast(data, cache_dir=tmp), pd.read_excel(io.BytesIO(data)))
+        assert len(list(Path(tmp).glob('*.parquet'))) == 2
+
+        # mixed-type columns cannot be stored as Parquet: the frame is returned, no copy is left behind
+        mixed = _workbook({(1, 1): 'value', (2, 1): 1, (3, 1): 'one'})
+        pd.testing.assert_frame_equal(read_excel_fast(mixed, cache_dir=tmp), pd.read_excel(io.BytesIO(mixed)))
+        assert len(list(Path(tmp).glob('*.parquet'))) == 2
+
+    print(read_xlsx_stream(odd))
+    print("✅ Excel reader test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_excel_reader()
+    test_excel_markup()
@@ -0,0 +1,103 @@
+"""
+Test script for the export layer: file formats, headless result exports and the memoized download payloads
+"""
+import gzip
+import io
+import os
+import tempfile
+import pandas as pd
+from src.profile_filtering_system.utils.exports import (
+    ALL_PROFILES_SHEET, APPROVED_SHEET, TOP_PROFILES_SHEET, ExportCache, export_bytes, export_format_from_path,
+    write_export, write_results,
+)
+
+
+def test_exports():
+    """Check that every format round-trips, that write_results infers the format and that payloads are memoized"""
+
+    df = pd.DataFrame({
+        'fullName': ['Ada Lovelace', 'Grace Hopper', 'Alan Turing'],
+        'title': ['Chief Innovation Officer', 'Head of AI', 'VP Design'],
+        'summary': ['Leading innovation, with "quotes" and commas', 'Line one\nline two', 'Ünïcode summary'],
+        'ai_score': [42, 17, 30],
+        'match_rate': [0.75, float('nan'), 0.5],
+        'criteria_a_passed': [True, False, True],
+    })
+    top = df.head(1)
+
+    # format inference from the file name, the longest suffix first
+    assert export_format_from_path('results.csv.gz') == 'csv.gz'
+    assert export_format_from_path('RESULTS.XLSX') == 'xlsx'
+    try:
+        export_format_from_path('results.json')
+        raise AssertionError("unknown suffix accepted")
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as path:
+        # single frame formats: same values, columns and dtypes after reading back
+        readers = {'csv': pd.read_csv, 'csv.gz': pd.read_csv, 'parquet': pd.read_parquet}
+        for fmt, read in readers.items():
+            target = os.path.join(path, f"results.{fmt}")
+            write_export({APPROVED_SHEET: df}, target)
+            pd.testing.assert_frame_equal(read(target), df)
+        with open(os.path.join(path, 'results.csv.gz'), 'rb') as handle:
+            assert handle.read(2) == b'\x1f\x8b'
+        try:
+            write_export({APPROVED_SHEET: df, TOP_PROFILES_SHEET: top}, os.path.join(path, 'two.csv'))
+            raise AssertionError("two frames written to one CSV")
+        except ValueError:
+            pass
+
+        # multi-sheet workbook written by a small chunk size, and a workbook rendered in memory
+        target = os.path.join(path, 'results.xlsx')
+        write_export({APPROVED_SHEET: df, TOP_PROFILES_SHEET: top}, target, chunksize=2)
+        sheets = pd.read_excel(target, sheet_name=None)
+        assert list(sheets) == [APPROVED_SHEET, TOP_PROFILES_SHEET]
+        pd.testing.assert_frame_equal(sheets[APPROVED_SHEET], df)
+        pd.testing.assert_frame_equal(sheets[TOP_PROFILES_SHEET], top)
+        in_memory = pd.read_excel(io.BytesIO(export_bytes({APPROVED_SHEET: df}, 'xlsx')), sheet_name=None)
+        pd.testing.assert_frame_equal(in_memory[APPROVED_SHEET], df)
+
+        # headless results: an .xlsx path gets every sheet, any other path the approved candidates only,
+        # both without the pipeline's title features
+        featured = df.assign(seniority_level=['c_level', 'head', 'vp'], title_length=[24, 10, 9])
+        write_results(os.path.join(path, 'run.xlsx'), featured, top_df=featured.head(1), original_df=df)
+        sheets = pd.read_excel(os.path.join(path, 'run.xlsx'), sheet_name=None)
+        assert list(sheets) == [ALL_PROFILES_SHEET, TOP_PROFILES_SHEET, APPROVED_SHEET]
+        pd.testing.assert_frame_equal(sheets[APPROVED_SHEET], df)
+        pd.testing.assert_frame_equal(sheets[TOP_PROFILES_SHEET], top)
+        write_results(os.path.join(path, 'run.csv.gz'), featured, top_df=featured.head(1), original_df=df)
+        with gzip.open(os.path.join(path, 'run.csv.gz'), 'rt', encoding='utf-8') as handle:
+            pd.testing.assert_frame_equal(pd.read_csv(handle), df)
+        write_results(os.path.join(path, 'run.parquet'), featured)
+        pd.testing.assert_frame_equal(pd.read_parquet(os.path.join(path, 'run.parquet')), df)
+    print(f"Round-tripped {len(readers) + 1} formats and the headless result exports")
+
+    # memoized payloads: rendered once per key and format, dropped only when the version changes
+    renders = []
+
+    def sheets_factory():
+        renders.append(1)
+        return {APPROVED_SHEET: df}
+
+    cache = ExportCache(version=1)
+    loader = cache.loader('approved', 'csv', sheets_factory)
+    assert not renders
+    payload = loader()
+    assert cache.get('approved', 'csv', sheets_factory) is payload and len(renders) == 1
+    assert payload == export_bytes({APPROVED_SHEET: df}, 'csv')
+    cache.get('approved', 'parquet', sheets_factory)
+    assert len(renders) == 2
+    cache.set_version(1)
+    loader()
+    assert len(renders) == 2
+    cache.set_version(2)
+    assert loader() == payload and len(renders) == 3 and cache.version == 2
+    print(f"Export cache rendered {len(renders)} payloads for 4 requests over 2 versions")
+
+    print("✅ Exports test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_exports()
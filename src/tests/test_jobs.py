@@ -0,0 +1,78 @@
+"""
+Test script for background pipeline jobs
+"""
+import threading
+import time
+from src.profile_filtering_system.utils.jobs import JobManager
+
+
+def wait_for(job, timeout=10.0):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished, job.snapshot()
+
+
+def test_jobs():
+    """Check progress reporting, results, errors, the concurrency limit and pruning"""
+
+    manager = JobManager(max_workers=2, max_finished=3)
+    release = threading.Event()
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def run(job):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        job.record_stage({'stage': 'title_elimination', 'rows_in': 10, 'rows_out': 6, 'seconds': 0.0})
+        job.set_progress(1, 6)
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return {'rows': 6}
+
+    job_ids = [manager.submit(run, name=f"event {i}") for i in range(3)]
+    deadline = time.time() + 5
+    while running[0] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    statuses = [manager.get(job_id).snapshot() for job_id in job_ids]
+    print([status['status'] for status in statuses])
+    # two workers: the third job waits in the queue
+    assert [status['status'] for status in statuses] == ['running', 'running', 'queued']
+    assert statuses[0]['current_stage'] == 'title_elimination' and statuses[0]['progress'] == (1, 6)
+
+    release.set()
+    for job_id in job_ids:
+        wait_for(manager.get(job_id))
+    assert peak[0] == 2
+    assert manager.get(job_ids[0]).status == 'done' and manager.get(job_ids[0]).result == {'rows': 6}
+
+    def fail(job):
+        raise ValueError('Missing required columns')
+
+    failed = manager.get(manager.submit(fail))
+    wait_for(failed)
+    assert failed.status == 'failed' and failed.result is None
+    assert failed.snapshot()['error'] == 'ValueError: Missing required columns'
+
+    # only the 3 most recent finished jobs are kept
+    oldest = min((manager.get(job_id) for job_id in job_ids), key=lambda job: job.finished_at)
+    manager.submit(lambda job: None)
+    assert manager.get(oldest.id) is None
+    assert len(manager.jobs()) == 4
+
+    # a job id names a run directory: anything else (a path from a crafted URL) is refused
+    try:
+        manager.submit(lambda job: None, job_id='/tmp/run')
+        raise AssertionError("path accepted as a job id")
+    except ValueError:
+        pass
+    manager.shutdown()
+
+    print("✅ Background job tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_jobs()
@@ -0,0 +1,43 @@
+"""
+Test script for on-demand (lazy) LLM reason generation
+"""
+import pandas as pd
+from src.profile_filtering_system.components.llm_reason import LazyReasons
+
+
+def test_lazy_reasons():
+    """Check that reasons are generated once, only for requested rows, best AI score first"""
+
+    df = pd.DataFrame({
+        'title': ['VP', 'Chief Innovation Officer', 'Head of AI Strategy and Design Thinking'],
+        'summary': ['', 'Leading innovation initiatives with focus on AI and design thinking across Europe.', 'AI'],
+        'Companies Category': ['Category B', 'Category A', 'Category C'],
+        'criteria_a_passed': [False, True, True],
+    }, index=[10, 20, 30])
+
+    calls = []
+    def fake_reason(row, topic, sub_topic, event_location, criteria_passed):
+        calls.append(row.name)
+        return f"{row['title']} fits {topic} ({criteria_passed})"
+
+    reasons = LazyReasons(df, 'AI', 'Design', 'UK', pd.Series('Keyword: Criteria A', index=df.index), generator=fake_reason)
+    assert len(reasons) == 0 and not reasons.complete
+
+    # only the requested rows, in priority order (row 20 has the best AI score)
+    filled = reasons.fill(df.loc[[10, 20]])
+    print(filled[['title', 'llm_reason']])
+    assert calls == [20, 10]
+    assert filled.loc[20, 'llm_reason'] == 'Chief Innovation Officer fits AI (Keyword: Criteria A)'
+    assert reasons.column([30]).isna().all()
+    assert reasons.missing(df.index) == 1 and reasons.missing([10, 20, 20]) == 0
+
+    # memoized: nothing is generated twice
+    reasons.generate_all()
+    assert calls == [20, 10, 30]
+    assert reasons.complete
+
+    print("✅ Lazy reason tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_lazy_reasons()
@@ -0,0 +1,80 @@
+"""
+Test script for the rate-limit-aware LLM scheduler
+"""
+from types import SimpleNamespace
+from src.profile_filtering_system.utils.llm_scheduler import LLMScheduler, TokenBucket
+
+
+class FakeClock:
+    """Deterministic clock - sleeping advances the time instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after):
+        super().__init__('429 Too Many Requests')
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers={'retry-after': str(retry_after)})
+
+
+def test_llm_scheduler():
+    """Check token bucket pacing, retry-after handling, AIMD concurrency and non-retryable errors"""
+
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock, clock.sleep)
+    for _ in range(60):
+        assert bucket.acquire(1) == 0
+    # the 61st request waits for one refill (1 request per second)
+    assert abs(bucket.acquire(1) - 1.0) < 1e-9
+
+    limits = {'requests_per_minute': 600, 'tokens_per_minute': 100000, 'initial_concurrency': 4,
+              'max_concurrency': 8, 'base_delay_seconds': 0.5, 'target_latency_seconds': 10.0}
+    scheduler = LLMScheduler(limits, clock, clock.sleep)
+
+    attempts = []
+    def flaky():
+        attempts.append(clock())
+        if len(attempts) <= 2:
+            raise FakeRateLimitError(retry_after=3)
+        return SimpleNamespace(content='ok', usage_metadata={'total_tokens': 50})
+
+    started = clock()
+    result = scheduler.call(flaky, estimated_tokens=100)
+    print(f"Attempts at: {attempts}, stats: {scheduler.stats}, limit: {scheduler.concurrency_limit}")
+    assert result.content == 'ok'
+    assert scheduler.stats['rate_limited'] == 2 and scheduler.stats['retries'] == 2
+    # each retry waited at least the server's retry-after
+    assert attempts[1] - attempts[0] >= 3 and attempts[2] - attempts[1] >= 3
+    assert clock() - started >= 6
+    # two separate congestion events halve the limit twice, the success adds 1/limit
+    assert abs(scheduler.concurrency_limit - (1 + 1 / 1)) < 1e-9
+
+    for _ in range(20):
+        scheduler.call(lambda: 'ok')
+    assert scheduler.concurrency_limit > 2
+
+    # programming errors are not retried
+    calls = []
+    def broken():
+        calls.append(1)
+        raise ValueError('bad prompt')
+    try:
+        scheduler.call(broken)
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+    assert len(calls) == 1
+
+    print("✅ LLM scheduler tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_llm_scheduler()
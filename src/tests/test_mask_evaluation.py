@@ -0,0 +1,93 @@
+"""
+Test script for the mask evaluation of the filtering stages and its rejection reason codes
+"""
+import numpy as np
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering, criteria_passed_column, criteria_passed_text
+from src.profile_filtering_system.pipeline.stages import rejection_labels
+from src.profile_filtering_system.constants import rejection_reason_bits
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States']
+    summaries = ['Leading innovation and design thinking programmes with AI.',
+                 'Building a culture of innovation and trust across leadership teams.',
+                 'Responsible for quarterly sales targets in the region.']
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i % (rows - 20)}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': [titles[i % 5] for i in range(rows)],
+        'companyName': [f"Company {i % 7}" for i in range(rows)],
+        'summary': [summaries[i % 3] for i in range(rows)],
+        'location': [locations[i % 3] for i in range(rows)],
+    })
+
+
+def test_mask_evaluation():
+    """Check that mask evaluation matches frame evaluation and records why each row was rejected"""
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(600)
+        companies = (pd.DataFrame({'Account Name': ['Company 3']}), pd.DataFrame({'company': ['Company 1']}),
+                     pd.DataFrame({'company': ['Company 2']}))
+        reason = lambda row, topic, sub_topic, event_location, criteria_passed, **kwargs: f"{row['title']} fits {topic}"
+        options = dict(event_location='United Kingdom', near_duplicates=False, reason_generator=reason,
+                       token_cache=TokenCache(), persist_token_cache=False)
+
+        frame = ProfilesFiltering('AI', 'Culture', **options)
+        expected = frame.filter(df, *companies, verbose=False)
+        for extra in ({}, {'chunksize': 64}):
+            masks = ProfilesFiltering('AI', 'Culture', evaluation='mask', **extra, **options)
+            result = masks.filter(df, *companies, verbose=False)
+            pd.testing.assert_frame_equal(result, expected)
+            counts = lambda metrics: [(m['stage'], m['rows_in'], m['rows_out']) for m in metrics]
+            assert counts(masks.stage_metrics) == counts(frame.stage_metrics)
+        print(f"Shortlist of {len(result)} rows, same as the frame evaluation")
+
+        # one code per uploaded row, zero exactly for the shortlisted rows
+        rejections = masks.rejections
+        assert len(rejections) == len(df) and rejections.dtype == np.uint16
+        assert set(rejections.index[rejections == 0]) == set(result.index)
+        # the last 20 rows repeat earlier profile URLs
+        assert (rejections.iloc[-20:] & rejection_reason_bits['deduplication']).all()
+        # cheap stages see every row: a duplicated sales manager in New York gets all its reasons
+        assert rejection_labels([rejections.iloc[587]]).iloc[0] == \
+            'deduplication, title_elimination, summary_jobdesc_elimination, location_filter'
+        sales = df['title'] == 'Sales Manager'
+        assert (rejections[sales] & rejection_reason_bits['title_elimination']).all()
+        assert (rejections[df['companyName'] == 'Company 3'] & rejection_reason_bits['company_exclusion']).all()
+        outside_europe = df['location'].str.contains('United States')
+        assert (rejections[outside_europe] & rejection_reason_bits['location_filter']).all()
+        print(rejection_labels(rejections).value_counts().to_string())
+
+        # an unknown evaluation is rejected
+        try:
+            ProfilesFiltering('AI', 'Culture', evaluation='rows')
+            raise AssertionError("unknown evaluation accepted")
+        except ValueError:
+            pass
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    # criteria text of every row at once, the same as row by row
+    rows = pd.DataFrame({
+        'title': ['CTO', '', None, np.nan, 'Lead'],
+        'summary': ['text', 'text', '', None, np.nan],
+        'Companies Category': ['Category A', '', None, np.nan, 'Category B'],
+        'keyword_criteria_passed': ['A', 'None', 'A, B', 'None', 'B'],
+    })
+    for columns in (list(rows.columns), ['title', 'summary']):
+        pd.testing.assert_series_equal(criteria_passed_column(rows[columns]),
+                                       rows[columns].apply(criteria_passed_text, axis=1))
+
+    print("✅ Mask evaluation test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_mask_evaluation()
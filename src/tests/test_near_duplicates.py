@@ -0,0 +1,55 @@
+"""
+Test script for near-duplicate profile detection (MinHash LSH)
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.near_duplicates import (
+    near_duplicate_mask, remove_near_duplicates, _bucket_pairs
+)
+
+
+def test_near_duplicates():
+    """Check that reworded copies of a profile collapse and distinct profiles are kept"""
+
+    summary = ("Chief innovation officer leading digital transformation programmes across Europe, "
+               "speaker on artificial intelligence, design thinking and the future of retail banking")
+    test_data = {
+        'fullName': ['Anna Schmidt', 'Anna Schmidt', 'Marco Rossi', 'ANNA SCHMIDT', 'Lena Vogel', ''],
+        'companyName': ['Deutsche Bank', 'Deutsche Bank', 'Deutsche Bank', 'Deutsche Bank', 'Siemens', ''],
+        'summary': [summary, summary + ' and keynote speaker', 'Sales manager for private clients in Milan', summary,
+                    'Head of research for industrial automation and robotics', ''],
+    }
+    df = pd.DataFrame(test_data)
+
+    mask = near_duplicate_mask(df)
+    print(f"Keep mask: {mask.tolist()}")
+    # rows 1 and 3 are copies of row 0; rows without any text are always kept
+    assert mask.tolist() == [True, False, True, False, True, True]
+
+    result = remove_near_duplicates(df)
+    assert result.index.tolist() == [0, 2, 4, 5]
+
+    # a strict threshold keeps the reworded copy but still drops the exact (case-insensitive) one
+    assert near_duplicate_mask(df, threshold=1.0).tolist() == [True, True, True, False, True, True]
+
+    # without names, colleagues with empty summaries share their whole text: they are different people
+    colleagues = pd.DataFrame({'fullName': ['', None, '  '], 'companyName': ['SAP'] * 3, 'summary': ['', None, '']})
+    assert near_duplicate_mask(colleagues).tolist() == [True, True, True]
+    assert near_duplicate_mask(colleagues.drop(columns=['fullName'])).tolist() == [True, True, True]
+    # enough text identifies a profile without a name
+    unnamed = df.drop(columns=['fullName'])
+    assert near_duplicate_mask(unnamed).tolist() == [True, False, True, False, True, True]
+
+    # every pair of a bucket is a candidate, not only the pairs with its first member
+    order = np.array([0, 1, 2, 3])
+    left, right = _bucket_pairs(order, np.array([7, 7, 7, 9], dtype=np.uint64), max_bucket=64)
+    assert sorted(zip(left.tolist(), right.tolist())) == [(0, 1), (0, 2), (1, 2)]
+    # larger buckets: neighbours and the first member
+    left, right = _bucket_pairs(order, np.full(4, 7, dtype=np.uint64), max_bucket=2)
+    assert sorted(set(zip(left.tolist(), right.tolist()))) == [(0, 1), (0, 2), (0, 3), (1, 2), (2, 3)]
+
+    print("✅ Near-duplicate tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_near_duplicates()
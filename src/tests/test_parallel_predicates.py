@@ -0,0 +1,87 @@
+"""
+Test script for the concurrent evaluation of the independent filter predicates (stages 1-5)
+"""
+import time
+import numpy as np
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+from src.profile_filtering_system.pipeline.stages import Stage, StageGraph
+from src.profile_filtering_system.constants import rejection_reason_bits
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States']
+    summaries = ['Leading innovation and design thinking programmes with AI.',
+                 'Building a culture of innovation and trust across leadership teams.',
+                 'Responsible for quarterly sales targets in the region.',
+                 'Directrice de l\'innovation et de la transformation numérique.']
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': [titles[i % 5] for i in range(rows)],
+        'companyName': [f"Company {i % 7}" for i in range(rows)],
+        'summary': [summaries[i % 4] for i in range(rows)],
+        'location': [locations[i % 3] for i in range(rows)],
+    })
+
+
+def _slow_mask(df):
+    time.sleep(0.3)
+    return np.ones(len(df), dtype=bool)
+
+
+def test_parallel_predicates():
+    """Check that concurrent predicates give the sequential shortlist and overlap in time"""
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(300)
+        companies = (pd.DataFrame({'Account Name': ['Company 3']}), pd.DataFrame({'company': ['Company 1']}),
+                     pd.DataFrame({'company': ['Company 2']}))
+        reason = lambda row, topic, sub_topic, event_location, criteria_passed, **kwargs: f"{row['title']} fits {topic}"
+        options = dict(event_location='United Kingdom', near_duplicates=False, reason_generator=reason,
+                       token_cache=TokenCache(), persist_token_cache=False, evaluation='mask')
+
+        sequential = ProfilesFiltering('AI', 'Culture', **options)
+        expected = sequential.filter(df, *companies, verbose=False)
+        counts = lambda metrics: [(m['stage'], m['rows_in'], m['rows_out']) for m in metrics]
+        for extra in ({'predicate_workers': 4}, {'predicate_workers': 2, 'predicate_processes': True}):
+            pipeline = ProfilesFiltering('AI', 'Culture', **extra, **options)
+            result = pipeline.filter(df, *companies, verbose=False)
+            pd.testing.assert_frame_equal(result, expected)
+            assert counts(pipeline.stage_metrics) == counts(sequential.stage_metrics)
+            # language detection ran on every row: its reasons are recorded for the rows rejected earlier too
+            english = (pipeline.rejections & rejection_reason_bits['english_only']) > 0
+            assert english.sum() == len(df) // 4, english.sum()
+            print(f"{extra}: {len(result)} rows, same as the sequential evaluation")
+
+        # a batch of slow independent predicates takes about as long as the slowest one
+        graph = StageGraph([Stage(name, None, predicate=_slow_mask, parallel=True)
+                            for name in ('title_elimination', 'summary_jobdesc_elimination', 'company_exclusion')])
+        for workers, bounds in ((1, (0.85, 10)), (3, (0, 0.6))):
+            pipeline = ProfilesFiltering('AI', 'Culture', stages=graph, predicate_workers=workers, **options)
+            started = time.perf_counter()
+            pipeline.shortlist(df, *companies, verbose=False)
+            seconds = time.perf_counter() - started
+            assert bounds[0] < seconds < bounds[1], (workers, seconds)
+            print(f"{workers} worker(s): {seconds:.2f}s")
+
+        # concurrent predicates are a mask evaluation mode
+        try:
+            ProfilesFiltering('AI', 'Culture', predicate_workers=4)
+            raise AssertionError("predicate workers accepted by the frame evaluation")
+        except ValueError:
+            pass
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    print("✅ Parallel predicates test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_parallel_predicates()
@@ -0,0 +1,52 @@
+"""
+Test script for the local SQLite profile store
+"""
+import pandas as pd
+from src.profile_filtering_system.utils.profile_store import ProfileStore
+from src.profile_filtering_system.components.keyword_matching import keyword_match_classified
+
+
+def test_profile_store():
+    """Check incremental ingestion and that the indexed shortlist keeps every keyword match"""
+
+    export = pd.DataFrame({
+        'profileUrl': ['https://li/1', 'https://li/2', 'https://li/3', None],
+        'title': ['Chief Innovation Officer', 'Head of Digital Strategy', 'AI-Driven Culture Lead', 'CEO'],
+        'titleDescription': ['Digital transformation', '', '', ''],
+        'summary': ['', 'Leads digital strategy', 'Building   trust and safety', 'Innovation'],
+        'companyName': ['Acme', 'Globex', 'Initech', 'Umbrella'],
+        'location': ['London', 'Berlin', 'Paris', 'Rome'],
+    })
+
+    store = ProfileStore(':memory:')
+    counts = store.ingest(export)
+    print(f"First ingest: {counts}")
+    assert counts == {'inserted': 3, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'skipped': 1}
+
+    # re-ingesting only writes changed profiles
+    changed = export.copy()
+    changed.loc[1, 'summary'] = 'Leads digital strategy and innovation'
+    counts = store.ingest(changed)
+    print(f"Second ingest: {counts}")
+    assert counts == {'inserted': 0, 'updated': 1, 'unchanged': 2, 'duplicates': 0, 'skipped': 1}
+    assert len(store) == 3
+
+    class_a = ['innovation', 'ai', 'culture']
+    class_b = ['digital', 'strategy', 'trust']
+    shortlist = store.shortlist(class_a)
+    print(shortlist[['profileUrl', 'title']])
+    # the updated summary is indexed, the profile without class A keywords is not a candidate
+    assert shortlist['profileUrl'].tolist() == ['https://li/1', 'https://li/2', 'https://li/3']
+    assert store.shortlist([]).empty
+
+    # every profile that passes the keyword criteria is in the shortlist
+    stored = store.fetch()
+    passes = stored.apply(lambda row: keyword_match_classified(row, class_a, class_b)['passes'], axis=1)
+    assert set(stored.loc[passes, 'profileUrl']) <= set(shortlist['profileUrl'])
+
+    store.close()
+    print("✅ Profile store tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_profile_store()
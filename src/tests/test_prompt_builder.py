@@ -0,0 +1,64 @@
+"""
+Test script for the compact reason prompt builder
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.utils.llm_scheduler import estimate_tokens
+from src.profile_filtering_system.utils.prompt_builder import (
+    build_reason_prompt, compact_profile, PromptTokenStats, prompt_token_stats
+)
+
+
+def test_prompt_builder():
+    """Check that compact prompts keep the evidence for the reason and use fewer tokens"""
+
+    filler = ' '.join(f"I enjoyed working on project number {i} with many great colleagues." for i in range(40))
+    row = pd.Series({
+        'title': 'Head of Data Science',
+        'companyName': 'Acme',
+        'summary': f"{filler} I lead the machine learning platform team.\n{filler} Our AI roadmap covers digital products.",
+        'location': 'London, United Kingdom',
+        'companyLocation': 'London, United Kingdom',
+        'Companies Category': 'Category A',
+        'titleDescription': np.nan,
+    })
+    keywords = ['AI', 'machine', 'digital']
+
+    profile = compact_profile(row, keywords, token_budget=120)
+    print(profile)
+    # matched sentences are kept in order, filler sentences and empty / repeated fields are dropped
+    assert 'I lead the machine learning platform team.' in profile
+    assert 'Our AI roadmap covers digital products.' in profile
+    assert 'project number' not in profile
+    assert 'description' not in profile and 'companyLocation' not in profile
+    for value in ['Head of Data Science', 'Acme', 'Category A', 'London, United Kingdom']:
+        assert value in profile
+    assert estimate_tokens(profile) <= 120
+
+    # without matching keywords the leading sentences are used, still within the budget
+    fallback = compact_profile(row, ['blockchain'], token_budget=60)
+    assert 'project number 0' in fallback and estimate_tokens(fallback) <= 60
+
+    # a missing summary is dropped instead of sent as 'nan'
+    assert 'summary' not in compact_profile(row.drop('summary'), keywords)
+    assert 'nan' not in compact_profile(pd.Series({**row, 'summary': np.nan}), keywords)
+
+    before = prompt_token_stats.snapshot()
+    compact = build_reason_prompt(row, 'AI', 'Design', 'UK', 'Keyword: Criteria A', keywords=keywords)
+    full = build_reason_prompt(row, 'AI', 'Design', 'UK', 'Keyword: Criteria A', compact=False)
+    after = prompt_token_stats.snapshot()
+    assert 'Criteria Passed: Keyword: Criteria A' in compact and "'description': ''" in full
+    assert after['prompts'] - before['prompts'] == 2
+    assert after['prompt_tokens'] - before['prompt_tokens'] == estimate_tokens(compact) + estimate_tokens(full)
+    assert after['baseline_prompt_tokens'] - before['baseline_prompt_tokens'] == 2 * estimate_tokens(full)
+    print(f"Prompt tokens: {estimate_tokens(compact)} compact vs {estimate_tokens(full)} full")
+
+    stats = PromptTokenStats()
+    stats.record(60, 100)
+    assert stats.snapshot()['prompt_tokens_saved'] == 40 and stats.snapshot()['prompt_savings_pct'] == 40.0
+
+    print("\n✅ Prompt builder test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_prompt_builder()
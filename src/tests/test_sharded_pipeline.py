@@ -0,0 +1,131 @@
+"""
+Test script for the sharded execution of the row-local filtering stages on a process pool
+"""
+import threading
+import time
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering, benchmark_shards
+from src.profile_filtering_system.pipeline.stages import Stage, StageGraph, RunCancelled
+from src.profile_filtering_system.utils.jobs import JobManager
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States']
+    summaries = ['Leading innovation and design thinking programmes with AI.',
+                 'Building a culture of innovation and trust across leadership teams.',
+                 'Responsible for quarterly sales targets in the region.',
+                 'Directrice de l\'innovation et de la transformation numérique.']
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i % (rows - 20)}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': [titles[i % 5] for i in range(rows)],
+        'companyName': [f"Company {i % 7}" for i in range(rows)],
+        'summary': [summaries[i % 4] for i in range(rows)],
+        'location': [locations[i % 3] for i in range(rows)],
+    })
+
+
+def _slow_stage(df):
+    time.sleep(2)
+    return df
+
+
+# held by another thread of the parent while a sharded job starts, like the locks of the app's other threads
+_held = threading.Lock()
+
+
+def _locked_stage(df):
+    # a worker forked while _held is taken would inherit it locked and never get it
+    if not _held.acquire(timeout=5):
+        raise RuntimeError("lock inherited from the parent process")
+    _held.release()
+    return df
+
+
+def test_sharded_pipeline():
+    """Check that sharded runs give the unsharded shortlist, rejection codes and stage counts, and can be cancelled"""
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(500)
+        companies = (pd.DataFrame({'Account Name': ['Company 3']}), pd.DataFrame({'company': ['Company 1']}),
+                     pd.DataFrame({'company': ['Company 2']}))
+        reason = lambda row, topic, sub_topic, event_location, criteria_passed, **kwargs: f"{row['title']} fits {topic}"
+        options = dict(event_location='United Kingdom', near_duplicates=False, reason_generator=reason,
+                       token_cache=TokenCache(), persist_token_cache=False)
+        counts = lambda metrics: [(m['stage'], m['rows_in'], m['rows_out']) for m in metrics]
+
+        for extra in ({}, {'evaluation': 'mask'}, {'chunksize': 16}, {'evaluation': 'mask', 'language_detector': 'builtin'}):
+            single = ProfilesFiltering('AI', 'Culture', **extra, **options)
+            expected = single.filter(df, *companies, verbose=False)
+            for shards in (2, 7):
+                pipeline = ProfilesFiltering('AI', 'Culture', shards=shards, **extra, **options)
+                result = pipeline.filter(df, *companies, verbose=False)
+                pd.testing.assert_frame_equal(result, expected)
+                assert counts(pipeline.stage_metrics) == counts(single.stage_metrics)
+                if single.rejections is not None:
+                    pd.testing.assert_series_equal(pipeline.rejections, single.rejections)
+                sharded = [m for m in pipeline.stage_metrics if 'shards' in m]
+                assert sharded and all(m['shards'] == shards for m in sharded)
+            print(f"{extra}: {len(expected)} rows, same in 2 and 7 shards")
+
+        # the texts the workers tokenized are merged into the run's token cache, with the same token sets
+        single_cache, sharded_cache = TokenCache(), TokenCache()
+        single = ProfilesFiltering('AI', 'Culture', **{**options, 'token_cache': single_cache})
+        single.shortlist(df, *companies, verbose=False)
+        pipeline = ProfilesFiltering('AI', 'Culture', shards=3, **{**options, 'token_cache': sharded_cache})
+        pipeline.shortlist(df, *companies, verbose=False)
+        assert len(sharded_cache) == len(single_cache) > 0 and sharded_cache.dirty
+        texts = list(df['summary']) + list(df['title'])
+        assert single_cache.keyword_counts(texts, ['innovation', 'ai', 'culture'])[0].tolist() == \
+            sharded_cache.keyword_counts(texts, ['innovation', 'ai', 'culture'])[0].tolist()
+        print(f"Token cache of the sharded run: {len(sharded_cache)} texts")
+
+        # a cancelled run stops without waiting for the shards in progress
+        graph = StageGraph([Stage('slow_stage', _slow_stage, chunked=True)])
+        cancel_event = threading.Event()
+        progress = []
+        pipeline = ProfilesFiltering('AI', 'Culture', stages=graph, shards=4, cancel_event=cancel_event,
+                                     progress_callback=lambda *args: progress.append(args), **options)
+        threading.Timer(0.3, cancel_event.set).start()
+        started = time.perf_counter()
+        try:
+            pipeline.shortlist(df, *companies, verbose=False)
+            raise AssertionError("cancelled run completed")
+        except RunCancelled:
+            pass
+        assert time.perf_counter() - started < 1.5 and not progress
+        print(f"Cancelled after {time.perf_counter() - started:.2f}s")
+
+        # a sharded job started from a JobManager thread while another thread holds a lock: the workers are
+        # fresh processes (no fork of the multithreaded parent), so they do not inherit the held lock
+        assert filtering.process_context().get_start_method() != 'fork'
+        graph = StageGraph([Stage('locked_stage', _locked_stage, chunked=True)])
+        manager = JobManager(max_workers=1)
+        with _held:
+            job_id = manager.submit(lambda job: ProfilesFiltering(
+                'AI', 'Culture', stages=graph, shards=2, cancel_event=job.cancel_event, **options
+            ).shortlist(df, *companies, verbose=False), name='sharded')
+            manager.shutdown(wait=True)
+        job = manager.get(job_id)
+        assert job.status == 'done' and len(job.result) == len(df), job.error
+        print(f"Sharded job run from a job thread with {filtering.process_context().get_start_method()} workers")
+
+        # scaling of the sharded mode on this machine (the speedup is bounded by its cores)
+        scaling = benchmark_shards(_profiles(4000), *companies, 'AI', 'Culture', shard_counts=(1, 2),
+                                   event_location='United Kingdom', near_duplicates=False)
+        assert [row['shards'] for row in scaling] == [1, 2] and scaling[0]['speedup'] == 1.0
+        print(f"Scaling: {scaling}")
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    print("✅ Sharded pipeline test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_sharded_pipeline()
@@ -0,0 +1,130 @@
+"""
+Test script for the stage graph executor: ordering, per-stage options, chunked stages and cancellation
+"""
+import threading
+import time
+import pandas as pd
+import src.profile_filtering_system.pipeline.filtering as filtering
+from src.profile_filtering_system.pipeline.filtering import ProfilesFiltering
+from src.profile_filtering_system.pipeline.stages import Stage, StageGraph, RunCancelled
+from src.profile_filtering_system.utils.jobs import JobManager
+from src.profile_filtering_system.utils.token_cache import TokenCache
+
+
+def _profiles(rows: int) -> pd.DataFrame:
+    titles = ['Chief Innovation Officer', 'Head of AI Strategy', 'Sales Manager', 'Intern', 'VP Design']
+    locations = ['London, United Kingdom', 'Berlin, Germany', 'New York, United States']
+    summaries = ['Leading innovation and design thinking programmes with AI.',
+                 'Building a culture of innovation and trust across leadership teams.',
+                 'Responsible for quarterly sales targets in the region.']
+    return pd.DataFrame({
+        'profileUrl': [f"https://www.linkedin.com/in/profile-{i}" for i in range(rows)],
+        'fullName': [f"Person {i}" for i in range(rows)],
+        'title': [titles[i % 5] for i in range(rows)],
+        'companyName': [f"Company {i % 7}" for i in range(rows)],
+        'summary': [summaries[i % 3] for i in range(rows)],
+        'location': [locations[i % 3] for i in range(rows)],
+    })
+
+
+def test_stage_graph():
+    """Check dependency ordering, chunked execution, stage options, callbacks and cancellation"""
+
+    # dependencies come first, declaration order among independent stages
+    graph = StageGraph([Stage('b', None, after=('c',)), Stage('a', None), Stage('c', None)])
+    assert [stage.name for stage in graph] == ['a', 'c', 'b']
+    for stages in ([Stage('a', None, after=('b',)), Stage('b', None, after=('a',))], [Stage('a', None, after=('x',))]):
+        try:
+            StageGraph(stages)
+            raise AssertionError("invalid graph accepted")
+        except ValueError as error:
+            print(f"Rejected: {error}")
+    try:
+        graph.plan(lambda stage: stage.name != 'c')
+        raise AssertionError("stage with a disabled dependency planned")
+    except ValueError:
+        pass
+
+    keywords = {'class_a': ['innovation', 'ai', 'design'], 'class_b': ['culture', 'leadership']}
+    extract = filtering.extract_classified_keywords
+    filtering.extract_classified_keywords = lambda topic, sub_topic: keywords
+    try:
+        df = _profiles(600)
+        companies = (pd.DataFrame({'Account Name': ['Company 3']}), pd.DataFrame({'company': ['Company 1']}),
+                     pd.DataFrame({'company': ['Company 2']}))
+        reason = lambda row, topic, sub_topic, event_location, criteria_passed, **kwargs: f"{row['title']} fits {topic}"
+        options = dict(event_location='United Kingdom', near_duplicates=False, reason_generator=reason,
+                       token_cache=TokenCache(), persist_token_cache=False)
+
+        whole = ProfilesFiltering('AI', 'Culture', **options).filter(df, *companies, verbose=False)
+        progress = []
+        chunked = ProfilesFiltering('AI', 'Culture', chunksize=64, reason_concurrency=4,
+                                    progress_callback=lambda stage, done, total: progress.append((stage, done, total)),
+                                    **options)
+        result = chunked.filter(df, *companies, verbose=False)
+        # chunks and concurrent reasons give the same shortlist and reasons
+        pd.testing.assert_frame_equal(result, whole)
+        assert ('title_elimination', 64, 600) in progress and ('title_elimination', 600, 600) in progress
+        assert progress[-1] == ('llm_reason', len(result), len(result))
+        print(f"Shortlist of {len(result)} rows, {len(progress)} progress updates")
+
+        # per-stage options: a disabled stage is skipped, another stage runs with its own chunk size
+        pipeline = ProfilesFiltering('AI', 'Culture', stage_options={'english_only': {'enabled': False},
+                                                                     'title_elimination': {'chunksize': 500}}, **options)
+        assert 'english_only' not in [stage.name for stage in pipeline.planned_stages()]
+        pipeline.filter(df, *companies, verbose=False)
+        assert 'english_only' not in [metric['stage'] for metric in pipeline.stage_metrics]
+
+        # cancelled between stages: no later stage runs
+        cancel = threading.Event()
+        stages = []
+        def cancel_after_title(metric):
+            stages.append(metric['stage'])
+            if metric['stage'] == 'title_elimination':
+                cancel.set()
+        pipeline = ProfilesFiltering('AI', 'Culture', cancel_event=cancel, stage_callback=cancel_after_title, **options)
+        try:
+            pipeline.filter(df, *companies, verbose=False)
+            raise AssertionError("cancelled run finished")
+        except RunCancelled:
+            assert stages == ['deduplication', 'title_elimination']
+
+        # cancelled during the reasoning stage: only the calls in flight are finished
+        cancel, calls = threading.Event(), []
+        def slow_reason(row, topic, sub_topic, event_location, criteria_passed, **kwargs):
+            calls.append(row.name)
+            cancel.set()
+            time.sleep(0.05)
+            return 'reason'
+        pipeline = ProfilesFiltering('AI', 'Culture', cancel_event=cancel, reason_concurrency=3,
+                                     **{**options, 'reason_generator': slow_reason})
+        try:
+            pipeline.filter(df, *companies, verbose=False)
+            raise AssertionError("cancelled run finished")
+        except RunCancelled:
+            assert 1 <= len(calls) <= 3 < len(result)
+
+        # a cancelled background job ends as cancelled, not failed
+        manager = JobManager(max_workers=1)
+        started = threading.Event()
+        def run(job):
+            started.set()
+            pipeline = ProfilesFiltering('AI', 'Culture', cancel_event=job.cancel_event, chunksize=1,
+                                         progress_callback=lambda *args: time.sleep(0.01), **options)
+            return pipeline.filter(df, *companies, verbose=False)
+        job = manager.get(manager.submit(run))
+        started.wait(5)
+        job.cancel()
+        deadline = time.time() + 10
+        while not job.finished and time.time() < deadline:
+            time.sleep(0.01)
+        assert job.status == 'cancelled' and job.result is None, job.snapshot()
+        manager.shutdown()
+    finally:
+        filtering.extract_classified_keywords = extract
+
+    print("✅ Stage graph test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_stage_graph()
@@ -0,0 +1,97 @@
+"""
+Test script for streaming LLM reasons into the live results table
+"""
+from types import SimpleNamespace
+import pandas as pd
+from src.profile_filtering_system.components.llm_reason import stream_reasons
+from src.profile_filtering_system.utils.live_table import LiveTable
+from src.profile_filtering_system.utils.llm_scheduler import LLMScheduler
+
+
+class Chunk(SimpleNamespace):
+    """Message chunk that merges with ``+`` like a LangChain AIMessageChunk"""
+
+    def __add__(self, other):
+        return Chunk(content=self.content + other.content)
+
+
+class FakeStreamingLLM:
+    """Streams a fixed answer word by word; the first stream breaks off with a timeout"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.attempts = 0
+
+    def stream(self, prompt):
+        self.attempts += 1
+        for i, word in enumerate(self.answer.split(' ')):
+            if self.attempts == 1 and i == 2:
+                raise TimeoutError('stream interrupted')
+            yield Chunk(content=word if i == 0 else ' ' + word)
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.frames = []
+
+    def dataframe(self, df, **kwargs):
+        self.frames.append(df)
+
+
+class FakeContainer:
+    def __init__(self):
+        self.placeholders = []
+
+    def empty(self):
+        self.placeholders.append(FakePlaceholder())
+        return self.placeholders[-1]
+
+
+def test_stream_reasons():
+    """Check streamed text, retry restarts, best-first order and block-wise table updates"""
+
+    # the scheduler streams text as it arrives and restarts the text when an attempt is retried
+    texts = []
+    scheduler = LLMScheduler({'base_delay_seconds': 0.0, 'max_delay_seconds': 0.0}, sleep=lambda seconds: None)
+    llm = FakeStreamingLLM('Leads AI strategy at Acme')
+    message = scheduler.stream(llm, 'prompt', texts.append)
+    assert message.content == 'Leads AI strategy at Acme'
+    assert texts == ['Leads', 'Leads AI', 'Leads', 'Leads AI', 'Leads AI strategy', 'Leads AI strategy at', 'Leads AI strategy at Acme']
+    assert scheduler.stats['retries'] == 1
+
+    df = pd.DataFrame({
+        'title': ['VP', 'Chief Innovation Officer', 'Head of AI Strategy and Design Thinking'],
+        'summary': ['', 'Leading innovation initiatives with focus on AI and design thinking across Europe.', 'AI'],
+        'Companies Category': ['Category B', 'Category A', 'Category C'],
+        'criteria_a_passed': [False, True, True],
+    }, index=[10, 20, 30])
+
+    def fake_reason(row, topic, sub_topic, event_location, criteria_passed, on_text=None):
+        reason = f"{row['title']} fits {topic}"
+        for end in range(1, len(reason) + 1):
+            on_text(reason[:end])
+        return reason
+
+    streamed = []
+    finished = list(stream_reasons(df, 'AI', 'Design', 'UK', pd.Series('Criteria A', index=df.index),
+                                   generator=fake_reason, on_text=lambda label, text: streamed.append((label, text))))
+    print(finished)
+    # best AI score first, every partial text is reported with its row label
+    assert [label for label, _ in finished] == [20, 30, 10]
+    assert streamed[0] == (20, 'C') and streamed[-1] == (10, 'VP fits AI')
+
+    container = FakeContainer()
+    table = LiveTable(container, ['title', 'llm_reason'], block_rows=2)
+    for label, reason in finished:
+        table.append({**df.loc[label].to_dict(), 'llm_reason': reason})
+    assert len(table) == 3
+    # two blocks: each append redraws only the open block
+    assert [[len(frame) for frame in placeholder.frames] for placeholder in container.placeholders] == [[1, 2], [1]]
+    assert list(container.placeholders[1].frames[-1].columns) == ['title', 'llm_reason']
+    assert container.placeholders[1].frames[-1].iloc[0]['llm_reason'] == 'VP fits AI'
+
+    print("✅ Streaming reason tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_stream_reasons()
@@ -0,0 +1,45 @@
+"""
+Test script to verify the pyarrow string engine gives the same results as the pandas engine
+"""
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.title_elimination import title_elimination
+from src.profile_filtering_system.components.summary_jobdesc_elimination import summary_jobdesc_elimination
+from src.profile_filtering_system.components.company_exclusion import company_exclusion
+from src.profile_filtering_system.components.location_filter import location_filter
+
+
+def test_string_engines_match():
+    """Run stages 1, 2, 3 and 5 with both engines and compare the surviving rows"""
+
+    test_data = {
+        'title': ['Chief Innovation Officer', 'Sales Manager', np.nan, 'Chief AI Officer', 'VP Strategy'],
+        'companyName': ['SAP', 'BadCompany', np.nan, 'Siemens', 'Spotify'],
+        'summary': ['Leading innovation initiatives', 'Revenue growth and deals', np.nan, 'AI strategy', 'Strategic innovation'],
+        'location': ['Berlin, Germany', 'New York, USA', 'London, UK', 'Munich, Germany', 'Austin, USA'],
+        'companyLocation': ['Berlin, Germany', 'New York, USA', np.nan, 'MUNICH, GERMANY', 'Stockholm, Sweden  united states '],
+        'titleDescription': ['', np.nan, '', 'Leads the AI lab', ''],
+    }
+    companies_to_remove_df = pd.DataFrame({'Account Name': ['BadCompany', np.nan]})
+
+    df = pd.DataFrame(test_data)
+    arrow_df = df.astype('string[pyarrow]')
+
+    for event_location in [None, 'Germany', 'United States']:
+        results = {}
+        for engine, frame in [('pandas', df.copy()), ('pyarrow', arrow_df.copy())]:
+            frame = title_elimination(frame, engine)
+            frame = summary_jobdesc_elimination(frame, engine)
+            frame = company_exclusion(frame, companies_to_remove_df, engine)
+            frame = location_filter(frame, event_location, ['Sweden'], engine)
+            results[engine] = frame
+
+        print(f"Event location {event_location}: pandas {results['pandas'].index.tolist()}, pyarrow {results['pyarrow'].index.tolist()}")
+        assert results['pandas'].index.tolist() == results['pyarrow'].index.tolist()
+        assert results['pandas']['companyLocation'].tolist() == results['pyarrow']['companyLocation'].tolist()
+
+    print("✅ pandas and pyarrow engines agree!")
+
+
+if __name__ == "__main__":
+    test_string_engines_match()
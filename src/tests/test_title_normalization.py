@@ -0,0 +1,102 @@
+"""
+Test script for the title normalization stage: normalized titles, seniority levels and the columns read downstream
+"""
+import glob
+import numpy as np
+import pandas as pd
+from src.profile_filtering_system.components.title_normalization import (
+    normalize_title, seniority_level, title_features, title_normalization, TITLE_FEATURE_COLUMNS
+)
+from src.profile_filtering_system.utils.exports import result_sheets, APPROVED_SHEET, TOP_PROFILES_SHEET
+from src.profile_filtering_system.components.seniority_filter import seniority_mask
+from src.profile_filtering_system.components.ai_ranking import calculate_ai_scores
+from src.profile_filtering_system.constants import cat_a, cat_b, cat_c
+
+
+def _substring_match(title, category) -> bool:
+    # the seniority rule before the title normalization: category words within the raw lowercase title
+    words = {'Category A': cat_a, 'Category B': cat_b, 'Category C': cat_c}.get(category, [])
+    return any(word in str(title).lower() for word in words)
+
+
+def test_title_normalization():
+    """Check normalized titles, seniority levels, caching and the columns read by the filter and the ranking"""
+
+    assert normalize_title("Group Head of Disruptive Research 🔹 Senior Vice President") == \
+        "group head of disruptive research senior vice president"
+    assert normalize_title("Sr. Mgr | Ops & Strategy") == "senior manager ops & strategy"
+    assert normalize_title("CTO / Co-founder") == "chief technology officer co founder"
+    assert normalize_title("CINO") == "chief innovation officer" and normalize_title("CDIO") == "chief officer"
+    levels = {"SVP Digital": 3, "CEO": 3, "Head of AI": 3, "Senior Designer": 2, "Team Lead": 1,
+              "Leadership Coach": 1, "Intern": 0, "": 0}
+    for title, level in levels.items():
+        assert seniority_level(title) == level, (title, seniority_level(title))
+    # company names and ordinary words shaped like a C-level abbreviation are not titles
+    for title in ("Cisco Systems Analyst", "Cargo Specialist", "Software Engineer at Cisco", "Credo Consultant",
+                  "Congo Desk Officer", "Costco Buyer", "Combo Trainer"):
+        assert seniority_level(title) == 0, (title, normalize_title(title))
+    assert seniority_level("CXO Advisor") == 3 and seniority_level("CISO, Cisco") == 3
+    cisco = pd.DataFrame({'title': ["Cisco Systems Analyst", "Cargo Specialist", "CISO"],
+                          'Companies Category': ['Category C'] * 3})
+    assert list(seniority_mask(cisco)) == [False, False, True]
+    # physicians are not managing directors
+    assert normalize_title("Jane Doe, MD") == "jane doe md" and seniority_level("Pediatrician MD") == 0
+
+    # categories A, B and C accepted before (substring rule) and after the title normalization
+    pinned = {
+        "Vice President Marketing": ((False, False, False), (True, True, True)),
+        "Senior Vice President": ((True, True, False), (True, True, True)),
+        "CEO": ((False, False, False), (True, True, True)),
+        "CDIO": ((False, False, False), (True, True, True)),
+        "VP Sales": ((True, True, True), (True, True, True)),
+        "SVP Digital": ((True, True, True), (True, True, True)),
+        "Managing Director": ((True, True, True), (True, True, True)),
+        "Head of AI": ((True, True, True), (True, True, True)),
+        "Sr. Manager": ((True, True, False), (True, True, False)),
+        "Senior Designer": ((True, True, False), (True, True, False)),
+        "Team Lead": ((True, False, False), (True, False, False)),
+        "Jane Doe, MD": ((False, False, False), (False, False, False)),
+        "Pediatrician MD": ((False, False, False), (False, False, False)),
+        "GM Europe": ((False, False, False), (False, False, False)),
+        "Intern": ((False, False, False), (False, False, False)),
+    }
+    table = pd.DataFrame({'title': np.repeat(list(pinned), 3),
+                          'Companies Category': ['Category A', 'Category B', 'Category C'] * len(pinned)})
+    old = [_substring_match(t, c) for t, c in zip(table['title'], table['Companies Category'])]
+    assert old == [accepted for before, _ in pinned.values() for accepted in before]
+    assert list(seniority_mask(table)) == [accepted for _, after in pinned.values() for accepted in after]
+
+    # the levels give the substring rule of every category, except that "vice president" now counts like "vp"
+    # and abbreviations like their expansion
+    titles = pd.concat([pd.read_csv(path)['title'] for path in glob.glob('data/filtered_speaker_profiles*.csv')])
+    titles = pd.concat([titles, pd.Series(list(levels) + [None, np.nan, 'VP', 'MD', 'GM'])], ignore_index=True)
+    categories = ['Category A', 'Category B', 'Category C', None]
+    df = pd.DataFrame({'title': np.repeat(titles.to_numpy(), 4), 'Companies Category': categories * len(titles)})
+    expected = np.array([_substring_match(t, c) for t, c in zip(df['title'], df['Companies Category'])])
+    mask = seniority_mask(df)
+    expanded = (df['title'] == 'CEO') | df['title'].str.contains('Vice President', na=False)
+    assert np.array_equal(mask[~expanded], expected[~expanded])
+    assert mask[expanded & (df['Companies Category'] == 'Category C')].all()
+    print(f"{len(df)} (title, category) pairs checked against the substring rule")
+
+    # one computation per unique title, the stage columns give the same mask and AI scores
+    seniority_level.cache_clear()
+    features = title_features(df)
+    assert seniority_level.cache_info().misses == titles.astype(str).nunique()
+    normalized = title_normalization(df)
+    assert normalized['seniority_level'].dtype == np.int8 and normalized['title_length'].dtype == np.int32
+    assert np.array_equal(seniority_mask(normalized), mask)
+    assert (features['title_length'].to_numpy() == df['title'].map(lambda t: len(str(t))).to_numpy()).all()
+    df['summary'] = 'An experienced leader in innovation and design thinking programmes.'
+    assert np.array_equal(calculate_ai_scores(title_normalization(df)), calculate_ai_scores(df))
+
+    # the working columns are not exported
+    sheets = result_sheets(normalized, normalized.head(2), df)
+    assert not set(TITLE_FEATURE_COLUMNS) & (set(sheets[APPROVED_SHEET].columns) | set(sheets[TOP_PROFILES_SHEET].columns))
+    assert list(sheets[APPROVED_SHEET].columns) == list(df.columns[:2])
+
+    print("✅ Title normalization test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_title_normalization()
@@ -0,0 +1,77 @@
+"""
+Test script for the token cache and the vectorized keyword criteria
+"""
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.profile_filtering_system.utils.token_cache import TokenCache
+from src.profile_filtering_system.components.keyword_matching import (
+    classified_keyword_criteria, criteria_labels, keyword_match_classified
+)
+
+
+def test_token_cache():
+    """Check that cached criteria equal the row-wise keyword matching, also after a save/load round trip"""
+
+    rng = np.random.default_rng(0)
+    words = ['Innovation', 'AI', 'ai-driven', 'culture', 'Digital', 'strategy', 'trust', 'Café', 'design_thinking', 'the', '']
+    def text():
+        return ' '.join(rng.choice(words, rng.integers(0, 6)))
+    df = pd.DataFrame({
+        'title': [text() for _ in range(300)],
+        'titleDescription': [text() for _ in range(300)],
+        'summary': [text() for _ in range(300)],
+    })
+    df.loc[::17, 'summary'] = np.nan
+    df.loc[::23, 'title'] = np.nan
+
+    # duplicated and multi-word keywords behave as in the row-wise matcher
+    class_a = ['innovation', 'ai', 'culture', 'ai', 'design thinking']
+    class_b = ['digital', 'strategy', 'trust', 'café']
+
+    expected = df.apply(lambda row: keyword_match_classified(row, class_a, class_b), axis=1)
+    cache = TokenCache()
+    criteria = classified_keyword_criteria(df, class_a, class_b, cache)
+    for column in ['criteria_a', 'criteria_b', 'criteria_c', 'passes']:
+        assert criteria[column].tolist() == expected.apply(lambda x: x[column]).tolist(), column
+    assert criteria_labels(criteria).tolist() == expected.apply(
+        lambda x: ', '.join(x['criteria_passed']) if x['criteria_passed'] else 'None').tolist()
+    print(f"Cached texts: {len(cache)}, vocabulary: {len(cache.vocab)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'tokens.npz'
+        cache.save(path)
+        loaded = TokenCache.load(path)
+        assert len(loaded) == len(cache) and loaded.vocab == cache.vocab
+        # every text is already cached, nothing is tokenized again
+        again = classified_keyword_criteria(df, class_a, class_b, loaded)
+        assert again.equals(criteria)
+        assert not loaded.dirty
+
+        # a torn or foreign file gives an empty cache that the next save replaces, no temporary file is left
+        for damaged in (b'', b'PK\x03\x04torn', path.read_bytes()[:100]):
+            path.write_bytes(damaged)
+            broken = TokenCache.load(path)
+            assert len(broken) == 0 and broken.dirty
+        broken.save_if_dirty(path)
+        assert len(TokenCache.load(path)) == 0 and sorted(p.name for p in Path(tmp).iterdir()) == ['tokens.npz']
+        cache.save(path)
+        assert len(TokenCache.load(path)) == len(cache)
+
+    # a copy tokenizing other texts (a shard worker) hands its new entries back to the original cache
+    copy = pickle.loads(pickle.dumps(cache))
+    copy.record_additions()
+    extra = ['Culture and café strategy', 'Brand new words here', df['summary'].dropna().iloc[0]]
+    copy.keyword_counts(extra, class_a)
+    assert cache.merge(copy.additions()) == 2 and len(cache) == len(copy)
+    for keywords in (class_a, class_b):
+        assert cache.keyword_counts(extra, keywords)[0].tolist() == copy.keyword_counts(extra, keywords)[0].tolist()
+    assert cache.merge(copy.additions()) == 0
+
+    print("✅ Token cache tests completed successfully!")
+
+
+if __name__ == "__main__":
+    test_token_cache()
@@ -0,0 +1,47 @@
+"""
+Test script for the content-hash cache of parsed uploads
+"""
+import io
+import pandas as pd
+from src.profile_filtering_system.utils.ingestion import read_profile_files
+from src.profile_filtering_system.utils.upload_cache import ParsedFileCache, frame_bytes
+
+
+def test_upload_cache():
+    """Check that re-reading the same content reuses the parsed frame and that the cache stays under its cap"""
+
+    df = pd.DataFrame({'title': ['CEO', 'Head of AI', 'CTO'], 'companyName': ['Acme', 'Globex', 'Initech']})
+    csv_bytes = df.to_csv(index=False).encode('utf-8')
+    cache = ParsedFileCache()
+
+    first, metrics = read_profile_files([io.BytesIO(csv_bytes)], names=['a.csv'], cache=cache)
+    assert metrics[0]['cached'] is False and len(cache) == 1
+    # same content under another name and handle: no parsing, the very same frame (no copy)
+    second, metrics = read_profile_files([io.BytesIO(csv_bytes)], names=['copy of a.csv'], cache=cache)
+    assert metrics[0]['cached'] is True and second is first
+    assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+    # other content, or the same bytes read by another engine, is parsed again
+    changed = df.assign(title=['CEO', 'Head of AI', 'CIO']).to_csv(index=False).encode('utf-8')
+    _, metrics = read_profile_files([changed, csv_bytes], names=['b.csv', 'a.csv'], cache=cache)
+    assert [metric['cached'] for metric in metrics] == [False, True]
+    _, metrics = read_profile_files([csv_bytes], names=['a.csv'], engine='pyarrow', cache=cache)
+    assert metrics[0]['cached'] is False and len(cache) == 3
+
+    # memory cap: the least recently used frame is evicted first, a frame larger than the cap is not cached
+    size = frame_bytes(first)
+    small = ParsedFileCache(max_bytes=2 * size)
+    small.put('a', first)
+    small.put('b', first.copy())
+    assert small.get('a') is first
+    small.put('c', first.copy())
+    assert 'b' not in small and 'a' in small and 'c' in small
+    assert small.bytes <= small.max_bytes and small.stats['evictions'] == 1
+    assert not ParsedFileCache(max_bytes=size - 1).put('big', first)
+    print(f"Cache stats: {cache.stats}, {cache.bytes} bytes")
+
+    print("✅ Upload cache test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_upload_cache()